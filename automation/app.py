@@ -1,36 +1,47 @@
-from fastapi import FastAPI, Request, BackgroundTasks
+from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
 import os
+import asyncio
 import time
 from dotenv import load_dotenv
 
 # Import our custom modules
-from automation.webhooks.webhook_handler import process_call_data
+from automation.webhooks.webhook_handler import process_call_job, notify_processing_failure, EXTRACTION_STATS
 from automation.webhooks.missed_call_recovery import handle_missed_call
-from automation.webhooks.sms_ai_agent import get_ai_sms_response
-from automation.utils import send_slack_notification
+from automation.webhooks.sms_ai_agent import get_ai_sms_response_async, SMS_LATENCY_BUDGET, FALLBACK_SMS
+from automation.notifier import slack_notifier
+from automation.ghl_client import ghl
+from automation.extraction_cache import extraction_cache
+from automation.idempotency import build_idempotency_store
+from automation.job_queue import JobQueue
+from automation.limits import downstream
+from automation.conversation_store import sms_conversations
+from automation.twiml import incoming_response, dial_result_response, public_base_url, parse_status_callback
 from twilio.rest import Client
 
 load_dotenv()
 
 # ── Deduplication: track recently processed call_ids to prevent double-firing ──
-# Stores {call_id: timestamp}. Entries older than 5 minutes are discarded.
-_processed_calls: dict = {}
-_DEDUP_TTL = 300  # seconds
+# Backend chosen by DEDUP_BACKEND (memory | sqlite). Entries expire after DEDUP_TTL_SECONDS (default 5 min).
+_dedup_store = build_idempotency_store()
 
 def _already_processed(call_id: str) -> bool:
     """Returns True if this call_id was already processed within the TTL window."""
     if not call_id:
         return False
-    now = time.time()
-    # Evict stale entries
-    stale = [k for k, t in _processed_calls.items() if now - t > _DEDUP_TTL]
-    for k in stale:
-        del _processed_calls[k]
-    if call_id in _processed_calls:
-        return True
-    _processed_calls[call_id] = now
-    return False
+    try:
+        return not _dedup_store.claim(call_id)
+    except Exception as e:
+        # Fail open — a possible duplicate is better than a dropped lead
+        print(f"⚠️  Dedup store error for call_id={call_id}: {e}")
+        return False
+
+
+# ── Durable job queue: webhook work survives deploys/crashes and is retried with backoff ──
+job_queue = JobQueue()
+job_queue.register("process_call", process_call_job, on_dead=notify_processing_failure)
+job_queue.register("missed_call", lambda payload: handle_missed_call(
+    payload["phone"], payload.setdefault("_completed_steps", {})))
 
 
 # ── Startup: validate critical env vars and alert Slack if anything is missing ──
@@ -46,6 +57,7 @@ REQUIRED_ENV_VARS = {
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
+    await slack_notifier.start()
     missing = [f"• `{k}` — {v}" for k, v in REQUIRED_ENV_VARS.items() if not os.getenv(k)]
     if missing:
         msg = (
@@ -54,11 +66,18 @@ async def lifespan(_app: FastAPI):
             + "\nFix these in Railway environment variables."
         )
         print(msg)
-        send_slack_notification(msg)
+        slack_notifier.notify(msg)
     else:
         print("✅ All required environment variables present.")
-        send_slack_notification("✅ *AI Revenue Desk is online* — all systems configured and ready.")
+        slack_notifier.notify("✅ *AI Revenue Desk is online* — all systems configured and ready.")
+    await job_queue.start()
+    sms_conversations.purge_expired()
     yield
+    await job_queue.stop()
+    await slack_notifier.stop()
+    sms_conversations.persist_all()
+    # Release pooled GHL connections on shutdown
+    await ghl.aclose()
 
 
 app = FastAPI(title="AI Revenue Desk™ Engine", lifespan=lifespan)
@@ -84,8 +103,18 @@ async def health():
         "checks": checks,
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Process-local counters for the cost-saving fast paths."""
+    return {
+        "transcript_extraction": dict(EXTRACTION_STATS),
+        "extraction_cache": extraction_cache.snapshot(),
+        "job_queue": job_queue.stats(),
+        "slack": slack_notifier.snapshot(),
+    }
+
 @app.post("/webhooks/voice-sync")
-async def retell_webhook(request: Request, background_tasks: BackgroundTasks):
+async def retell_webhook(request: Request):
     """
     Receives post-call data from Retell AI.
     Filter for 'call_analyzed' to prevent duplicate Slack/Sheets events.
@@ -101,14 +130,14 @@ async def retell_webhook(request: Request, background_tasks: BackgroundTasks):
     if event_type == "call_started":
         call = payload.get("call", {})
         caller = call.get("from_number") or call.get("customer_number") or "Unknown number"
-        send_slack_notification(f"📞 *Call Started* — AI agent is speaking to {caller} right now.")
+        slack_notifier.notify(f"📞 *Call Started* — AI agent is speaking to {caller} right now.")
 
     elif event_type == "call_analyzed":
         print("[Retell] call_analyzed received — processing lead...")
         if _already_processed(call_id):
             print(f"[Retell] Duplicate call_analyzed ignored for call_id={call_id}")
         else:
-            background_tasks.add_task(process_call_data, payload)
+            job_queue.enqueue("process_call", payload)
 
     elif event_type == "call_ended":
         # Fallback: Retell sometimes sends call_ended without a following call_analyzed
@@ -119,7 +148,7 @@ async def retell_webhook(request: Request, background_tasks: BackgroundTasks):
             if _already_processed(call_id):
                 print(f"[Retell] Duplicate call_ended ignored for call_id={call_id}")
             else:
-                background_tasks.add_task(process_call_data, payload)
+                job_queue.enqueue("process_call", payload)
         else:
             print("[Retell] call_ended has no analysis — waiting for call_analyzed event")
 
@@ -129,7 +158,7 @@ async def retell_webhook(request: Request, background_tasks: BackgroundTasks):
     return {"message": "Webhook received"}
 
 @app.post("/webhooks/missed-call")
-async def missed_call_webhook(request: Request, background_tasks: BackgroundTasks):
+async def missed_call_webhook(request: Request):
     """
     Triggered by Twilio StatusCallback for missed/busy calls.
     Sends recovery SMS and Slack alert.
@@ -139,7 +168,7 @@ async def missed_call_webhook(request: Request, background_tasks: BackgroundTask
     call_status = form_data.get("CallStatus")
     
     if call_status in ["no-answer", "busy", "failed"]:
-        background_tasks.add_task(handle_missed_call, customer_phone)
+        job_queue.enqueue("missed_call", {"phone": customer_phone})
         return {"message": "Missed call recovery initiated"}
     return {"message": "Call status not eligible for recovery"}
 
@@ -148,22 +177,31 @@ async def sms_agent_webhook(request: Request):
     """
     Handles inbound SMS from Twilio and replies using the AI SMS Agent.
     """
+    started = time.monotonic()
     form_data = await request.form()
     customer_phone = form_data.get("From")
     incoming_msg = form_data.get("Body")
     
-    # 1. Get AI Response
-    ai_response = get_ai_sms_response(customer_phone, incoming_msg)
+    # 1. Get AI Response with this number's recent conversation as context,
+    #    within whatever is left of the end-to-end latency budget
+    history = sms_conversations.history(customer_phone)
+    remaining = SMS_LATENCY_BUDGET - (time.monotonic() - started)
+    ai_response = await get_ai_sms_response_async(customer_phone, incoming_msg, history=history, budget=remaining)
+    sms_conversations.record(customer_phone, "user", incoming_msg)
+    if ai_response != FALLBACK_SMS:
+        sms_conversations.record(customer_phone, "assistant", ai_response)
     
-    # 2. Reply via Twilio
+    # 2. Reply via Twilio (blocking client — run off the event loop)
     try:
-        twilio_client.messages.create(
-            body=ai_response,
-            from_=TWILIO_PHONE,
-            to=customer_phone
-        )
+        async with downstream("twilio"):
+            await asyncio.to_thread(
+                twilio_client.messages.create,
+                body=ai_response,
+                from_=TWILIO_PHONE,
+                to=customer_phone,
+            )
         # 3. Notify Slack of the conversation
-        send_slack_notification(f"💬 *AI SMS Conversation* with {customer_phone}\n*User:* {incoming_msg}\n*AI:* {ai_response}")
+        slack_notifier.notify(f"💬 *AI SMS Conversation* with {customer_phone}\n*User:* {incoming_msg}\n*AI:* {ai_response}")
     except Exception as e:
         print(f"Error sending SMS: {e}")
 
@@ -176,58 +214,17 @@ async def voice_incoming(request: Request):
     Rings the real phone for 6 seconds.
     If no answer, Twilio hits /voice/dial-result with status.
     """
-    from fastapi.responses import Response
-    
-    # Construct base URL dynamically for Railway
-    base_url = str(request.base_url).rstrip("/")
-    if "up.railway.app" in base_url and base_url.startswith("http://"):
-        base_url = base_url.replace("http://", "https://")
-        
-    action_url = f"{base_url}/voice/dial-result"
-    real_phone = os.getenv("REAL_MOBILE_NUMBER", "+17176780349")
-    
-    twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-  <Dial timeout="6" answerOnBridge="true" action="{action_url}" method="POST">
-    <Number>{real_phone}</Number>
-  </Dial>
-</Response>"""
-    return Response(content=twiml, media_type="text/xml")
+    # Construct base URL dynamically for Railway (rendered TwiML is cached per base URL)
+    return incoming_response(public_base_url(str(request.base_url)))
 
 @app.post("/voice/dial-result")
 async def voice_dial_result(request: Request):
     """
     Checks the status of the dial attempt. If not answered, connect to AI agent.
     """
-    from fastapi.responses import Response
-    
-    form_data = await request.form()
-    status = form_data.get("DialCallStatus", "failed")
-    
-    # Send empty response if answered
-    if status == 'answered':
-        return Response(content='<?xml version="1.0" encoding="UTF-8"?><Response></Response>', media_type="text/xml")
-        
-    # Trigger Retell AI Agent Fallback via their SIP Trunk
-    if status in ['no-answer', 'busy', 'failed', 'canceled']:
-        # Extract the original Twilio number that the customer called
-        to_number = form_data.get("To", "").replace("+", "")
-        if not to_number:
-             to_number = "unknown"
-             
-        # Create the Retell SIP routing URI dynamically using the number Retell knows about
-        ai_sip_uri = os.getenv("AI_AGENT_INBOUND_URL", f"sip:{to_number}@sip.retellai.com;transport=tcp")
-        
-        twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-  <Dial>
-    <Sip>{ai_sip_uri}</Sip>
-  </Dial>
-</Response>"""
-        return Response(content=twiml, media_type="text/xml")
-
-    # Catch-all
-    return Response(content='<?xml version="1.0" encoding="UTF-8"?><Response></Response>', media_type="text/xml")
+    form_data = parse_status_callback(await request.body())
+    # Extract the original Twilio number that the customer called
+    return dial_result_response(form_data.get("DialCallStatus", "failed"), form_data.get("To", ""))
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark: revenue reporting, per-row Python loop vs the columnar engine.
+
+Builds a synthetic lead log shaped like the "AI Lead Log" tab and times:
+
+  legacy weekly   — the previous reporter loop (strptime per row, one 7-day window)
+  legacy periods  — the same loop style extended to day/week/month x category
+  engine          — ``LogColumns.from_rows`` + ``dashboard`` (all three views)
+  engine compute  — ``dashboard`` alone, over columns already built
+
+Both multi-period paths are checked to agree before anything is printed,
+including on a log salted with malformed timestamps (which must drop the
+same rows from the bulk path as ``strptime`` does).
+
+Usage:
+    python -m automation.benchmarks.bench_reporting [--rows 1000000] [--days 365] [--repeat 3]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from automation.reporting.engine import PERIODS, LogColumns, dashboard
+
+
+ISSUES = ["No Heat", "AC Repair", "Water Heater", "Drain Clog", "Maintenance", "Emergency", ""]
+STATUSES = ["Booked", "Pending", "Recovered - Booked", "Recovered", "Lost", "Voicemail"]
+
+
+def synthetic_log(rows: int, days: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    end = datetime(2026, 6, 30, 23, 59, 59)
+    log = []
+    for i in range(rows):
+        ts = end - timedelta(seconds=rng.randrange(days * 86400))
+        status = rng.choice(STATUSES)
+        revenue = f"{rng.choice((150, 250, 400, 1200, 4500))}" if "Booked" in status else ""
+        log.append([ts.strftime("%Y-%m-%d %H:%M:%S"), f"call_{i}", "Jane Doe", "+15550001111",
+                    "12 Main St", rng.choice(ISSUES), status, revenue])
+    return log
+
+
+# ─────────────────────────────────────────────
+# Previous implementation (kept verbatim for comparison)
+# ─────────────────────────────────────────────
+
+def legacy_weekly(raw_data, now):
+    one_week_ago = now - timedelta(days=7)
+
+    total_calls = 0
+    total_booked = 0
+    total_recovered = 0
+    total_revenue = 0
+
+    for row in raw_data:
+        try:
+            # row[0] is Timestamp: "2026-02-16 10:51:29"
+            ts = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
+            if ts >= one_week_ago:
+                total_calls += 1
+                status = row[6].lower()
+                if "booked" in status:
+                    total_booked += 1
+                if "recovered" in status:
+                    total_recovered += 1
+
+                rev = float(row[7]) if row[7] else 0
+                total_revenue += rev
+        except Exception as e:
+            # print(f"Skipping row: {e}")
+            continue
+    return total_calls, total_booked, total_recovered, total_revenue
+
+
+def legacy_periods(raw_data):
+    """The loop above, bucketing every row into day/week/month x category instead of one window."""
+    views = {period: {} for period in PERIODS}
+    for row in raw_data:
+        try:
+            ts = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
+            status = row[6].lower()
+            rev = float(row[7]) if row[7] else 0
+        except Exception:
+            continue
+        category = row[5].strip() or "Uncategorized"
+        monday = ts.date() - timedelta(days=ts.weekday())
+        keys = {
+            "day": ts.strftime("%Y-%m-%d"),
+            "week": f"Week of {monday.isoformat()}",
+            "month": ts.strftime("%Y-%m"),
+        }
+        for period, label in keys.items():
+            b = views[period].setdefault((label, category), [0, 0, 0, 0.0])
+            b[0] += 1
+            b[1] += "booked" in status
+            b[2] += "recovered" in status
+            b[3] += rev
+    return views
+
+
+# ─────────────────────────────────────────────
+# Harness
+# ─────────────────────────────────────────────
+
+def _check(views, summaries):
+    for period in PERIODS:
+        expected = views[period]
+        summary = summaries[period]
+        got = {}
+        for p, label in enumerate(summary.labels):
+            for c, category in enumerate(summary.categories):
+                if summary.calls[p, c]:
+                    got[(label, category)] = [int(summary.calls[p, c]), int(summary.booked[p, c]),
+                                              int(summary.recovered[p, c]), float(summary.revenue[p, c])]
+        assert got.keys() == expected.keys(), f"{period}: bucket sets differ"
+        for key, b in expected.items():
+            assert got[key][:3] == b[:3] and abs(got[key][3] - b[3]) < 1e-6, f"{period} {key}: {got[key]} != {b}"
+
+
+MALFORMED_TIMESTAMPS = [
+    "2026-06-30T10:00:00",   # ISO separator
+    "+026-06-30 10:00:00",   # numpy accepts a signed year
+    "2026-06-30 10:00:0Z",
+    "2026-06-30 24:00:00",
+    "2026-02-30 10:00:00",
+    "2026-13-01 10:00:00",
+    "2026-06-30 1O:00:00",   # letter O
+    "2026-06-30 10:00",
+    "30/06/2026 10:00:00",
+    "",
+]
+
+
+def _check_malformed(log):
+    """Bulk path vs strptime on logs salted with each kind of bad timestamp."""
+    unbounded = dict.fromkeys(PERIODS)
+    # One kind per log: a row that fails the bulk path sends the whole log down the row-by-row one
+    for ts in MALFORMED_TIMESTAMPS:
+        salted = [list(row) for row in log[:1000]]
+        for row in salted[::97]:
+            row[0] = ts
+        _check(legacy_periods(salted), dashboard(LogColumns.from_rows(salted), unbounded))
+    for ts in MALFORMED_TIMESTAMPS:
+        assert len(LogColumns.from_rows([[ts, *log[0][1:]]])) == 0, f"accepted malformed timestamp {ts!r}"
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark revenue reporting over a synthetic lead log")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"🧪 Building synthetic log: {args.rows:,} rows over {args.days} days...")
+    log = synthetic_log(args.rows, args.days)
+    cols = LogColumns.from_rows(log)
+    now = datetime(2026, 6, 30, 23, 59, 59)
+    unbounded = dict.fromkeys(PERIODS)  # Every period, so both paths cover the same buckets
+
+    _check(legacy_periods(log), dashboard(cols, unbounded))
+    _check_malformed(log)
+    week = dashboard(cols)["week"]
+    print(f"✅ Engine matches the legacy loop ({len(cols.categories)} categories, "
+          f"{week.labels[-1]}: {int(week.totals()['calls'][-1])} calls)")
+
+    cases = [
+        ("legacy weekly", lambda: legacy_weekly(log, now)),
+        ("legacy periods", lambda: legacy_periods(log)),
+        ("engine", lambda: dashboard(LogColumns.from_rows(log), unbounded)),
+        ("engine compute", lambda: dashboard(cols, unbounded)),
+    ]
+    print(f"{'path':<18}{'median s':>10}{'rows/s':>14}")
+    for name, fn in cases:
+        seconds, _ = _time(fn, args.repeat)
+        print(f"{name:<18}{seconds:>10.3f}{args.rows / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: voice routing handler latency, before vs after the TwiML cache.
+
+Runs the previous inline handlers and the cached ``automation.twiml`` path
+against the same synthetic Starlette requests and prints p50/p99/max per
+handler. The "after" handlers are the exact bodies used in ``app.py``.
+
+Usage:
+    python -m automation.benchmarks.bench_twiml [--iterations 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from urllib.parse import urlencode
+
+from starlette.requests import Request
+
+from automation.twiml import dial_result_response, incoming_response, parse_status_callback, public_base_url
+
+
+# ─────────────────────────────────────────────
+# Previous implementation (kept verbatim for comparison)
+# ─────────────────────────────────────────────
+
+async def legacy_voice_incoming(request: Request):
+    from fastapi.responses import Response
+
+    base_url = str(request.base_url).rstrip("/")
+    if "up.railway.app" in base_url and base_url.startswith("http://"):
+        base_url = base_url.replace("http://", "https://")
+
+    action_url = f"{base_url}/voice/dial-result"
+    real_phone = os.getenv("REAL_MOBILE_NUMBER", "+17176780349")
+
+    twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+  <Dial timeout="6" answerOnBridge="true" action="{action_url}" method="POST">
+    <Number>{real_phone}</Number>
+  </Dial>
+</Response>"""
+    return Response(content=twiml, media_type="text/xml")
+
+
+async def legacy_voice_dial_result(request: Request):
+    from fastapi.responses import Response
+
+    form_data = await request.form()
+    status = form_data.get("DialCallStatus", "failed")
+    if status == 'answered':
+        return Response(content='<?xml version="1.0" encoding="UTF-8"?><Response></Response>', media_type="text/xml")
+    if status in ['no-answer', 'busy', 'failed', 'canceled']:
+        to_number = form_data.get("To", "").replace("+", "")
+        if not to_number:
+            to_number = "unknown"
+        ai_sip_uri = os.getenv("AI_AGENT_INBOUND_URL", f"sip:{to_number}@sip.retellai.com;transport=tcp")
+        twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+  <Dial>
+    <Sip>{ai_sip_uri}</Sip>
+  </Dial>
+</Response>"""
+        return Response(content=twiml, media_type="text/xml")
+    return Response(content='<?xml version="1.0" encoding="UTF-8"?><Response></Response>', media_type="text/xml")
+
+
+# ─────────────────────────────────────────────
+# Current implementation (same bodies as app.py)
+# ─────────────────────────────────────────────
+
+async def cached_voice_incoming(request: Request):
+    return incoming_response(public_base_url(str(request.base_url)))
+
+
+async def cached_voice_dial_result(request: Request):
+    form_data = parse_status_callback(await request.body())
+    return dial_result_response(form_data.get("DialCallStatus", "failed"), form_data.get("To", ""))
+
+
+# ─────────────────────────────────────────────
+# Harness
+# ─────────────────────────────────────────────
+
+def _make_request(path: str, form: dict = None) -> Request:
+    body = urlencode(form or {}).encode()
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "scheme": "http",
+        "server": ("desk.up.railway.app", 80),
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"desk.up.railway.app"),
+            (b"content-type", b"application/x-www-form-urlencoded"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(scope, receive)
+
+
+async def _time_handler(handler, path, form, iterations):
+    samples = []
+    for _ in range(iterations):
+        request = _make_request(path, form)
+        t0 = time.perf_counter_ns()
+        await handler(request)
+        samples.append((time.perf_counter_ns() - t0) / 1000)  # µs
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[int(len(samples) * 0.99) - 1],
+        "max": samples[-1],
+    }
+
+
+async def run(iterations: int):
+    cases = [
+        ("voice_incoming", "/voice/incoming", None, legacy_voice_incoming, cached_voice_incoming),
+        ("dial_result (no-answer)", "/voice/dial-result", {"DialCallStatus": "no-answer", "To": "+15550001111"},
+         legacy_voice_dial_result, cached_voice_dial_result),
+        ("dial_result (answered)", "/voice/dial-result", {"DialCallStatus": "answered", "To": "+15550001111"},
+         legacy_voice_dial_result, cached_voice_dial_result),
+    ]
+    print(f"{'handler':<26}{'impl':<8}{'p50 µs':>10}{'p99 µs':>10}{'max µs':>10}")
+    for name, path, form, legacy, cached in cases:
+        # Outputs must match byte-for-byte before timing means anything
+        old = await legacy(_make_request(path, form))
+        new = await cached(_make_request(path, form))
+        assert old.body == new.body, f"{name}: cached TwiML differs from legacy output"
+        for label, handler in (("legacy", legacy), ("cached", cached)):
+            stats = await _time_handler(handler, path, form, iterations)
+            print(f"{name:<26}{label:<8}{stats['p50']:>10.1f}{stats['p99']:>10.1f}{stats['max']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TwiML voice routing handlers")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ Loads per-client configuration for multi-client deployments.
 Each Railway deployment sets CLIENT_SLUG to identify which client's
 config to load from clients/{slug}/config.json.
 
+Batch jobs that serve every client from one process use
+list_client_configs() instead.
+
 Falls back to reading env vars directly (backward-compatible with
 single-client deployments that don't use CLIENT_SLUG).
 """
@@ -53,6 +56,23 @@ def get_active_config() -> dict:
     }
 
 
+def list_client_configs() -> list[dict]:
+    """
+    Returns every clients/{slug}/config.json, sorted by slug, for jobs that
+    run across all clients at once (e.g. the batch revenue report).
+    "slug" is always the folder name (a "slug" inside the file is ignored), so
+    it matches the clients/{slug}/ paths and the --clients filter.
+    """
+    if not os.path.isdir("clients"):
+        return []
+    configs = []
+    for slug in sorted(os.listdir("clients")):
+        file_config = _load_config_file(slug)
+        if file_config:
+            configs.append({**file_config, "slug": slug})
+    return configs
+
+
 def get_sms_prompt() -> str | None:
     """
     Returns the custom SMS prompt for the active client, or None
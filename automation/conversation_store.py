@@ -0,0 +1,173 @@
+"""
+AI Revenue Desk — SMS Conversation Store
+========================================
+Per-phone SMS history that feeds the AI SMS agent its recent context.
+
+- Hot conversations live in an in-memory LRU capped at SMS_HISTORY_MAX_ACTIVE.
+  The least recently used conversation is spilled to SQLite when the cap is
+  hit and reloaded transparently on its next message.
+- Each conversation keeps at most SMS_HISTORY_MAX_TURNS turns and
+  SMS_HISTORY_MAX_TOKENS (estimated) tokens; the oldest turns are dropped first.
+- Token counts are estimated once, when a turn is added, and stored with the
+  turn — trimming never re-reads the history text.
+- Conversations idle for longer than SMS_HISTORY_TTL_HOURS are forgotten.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SMS_HISTORY_PATH = os.getenv("SMS_HISTORY_PATH", ".tmp/sms_conversations.sqlite3")
+SMS_HISTORY_MAX_ACTIVE = int(os.getenv("SMS_HISTORY_MAX_ACTIVE", "1000"))
+SMS_HISTORY_MAX_TURNS = int(os.getenv("SMS_HISTORY_MAX_TURNS", "12"))
+SMS_HISTORY_MAX_TOKENS = int(os.getenv("SMS_HISTORY_MAX_TOKENS", "1200"))
+SMS_HISTORY_TTL = float(os.getenv("SMS_HISTORY_TTL_HOURS", "24")) * 3600
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars/token for English) plus per-message overhead."""
+    return len(text) // 4 + 4
+
+
+class Conversation:
+    __slots__ = ("turns", "tokens", "updated_at")
+
+    def __init__(self, turns=None, updated_at=None):
+        self.turns: deque = deque(turns or [])  # (role, content, tokens)
+        self.tokens = sum(t[2] for t in self.turns)
+        self.updated_at = updated_at or time.time()
+
+    def add(self, role: str, content: str, max_turns: int, max_tokens: int):
+        n = estimate_tokens(content)
+        self.turns.append((role, content, n))
+        self.tokens += n
+        # Always keep the newest turn, even if it alone is over the token budget
+        while len(self.turns) > 1 and (len(self.turns) > max_turns or self.tokens > max_tokens):
+            self.tokens -= self.turns.popleft()[2]
+        self.updated_at = time.time()
+
+    def messages(self) -> list:
+        return [{"role": role, "content": content} for role, content, _n in self.turns]
+
+
+class ConversationStore:
+    def __init__(self, path: str = SMS_HISTORY_PATH, max_active: int = SMS_HISTORY_MAX_ACTIVE,
+                 max_turns: int = SMS_HISTORY_MAX_TURNS, max_tokens: int = SMS_HISTORY_MAX_TOKENS,
+                 ttl: float = SMS_HISTORY_TTL):
+        self.max_active = max_active
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.ttl = ttl
+        self._active: OrderedDict = OrderedDict()  # phone -> Conversation, least recently used first
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                " phone TEXT PRIMARY KEY, turns TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_at)")
+        except sqlite3.Error as e:
+            print(f"⚠️  SMS history spillover unavailable ({e}) — keeping in-memory history only.")
+            self._conn = None
+
+    # ─────────────────────────────────────────────
+    # Spillover
+    # ─────────────────────────────────────────────
+
+    def _spill(self, phone: str, convo: Conversation):
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO conversations (phone, turns, updated_at) VALUES (?, ?, ?)",
+            (phone, json.dumps(list(convo.turns)), convo.updated_at),
+        )
+
+    def _load(self, phone: str):
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT turns, updated_at FROM conversations WHERE phone = ?", (phone,)
+        ).fetchone()
+        if not row:
+            return None
+        self._conn.execute("DELETE FROM conversations WHERE phone = ?", (phone,))
+        return Conversation([tuple(t) for t in json.loads(row[0])], row[1])
+
+    def _get(self, phone: str):
+        convo = self._active.get(phone)
+        if convo is None:
+            convo = self._load(phone)
+            if convo is None:
+                return None
+            self._active[phone] = convo
+        self._active.move_to_end(phone)
+        if time.time() - convo.updated_at > self.ttl:
+            del self._active[phone]
+            return None
+        return convo
+
+    def _enforce_cap(self):
+        while len(self._active) > self.max_active:
+            phone, convo = self._active.popitem(last=False)
+            if time.time() - convo.updated_at <= self.ttl:
+                self._spill(phone, convo)
+
+    # ─────────────────────────────────────────────
+    # Public API
+    # ─────────────────────────────────────────────
+
+    def history(self, phone: str) -> list:
+        """Trimmed chat history for ``phone`` as OpenAI-style messages (oldest first)."""
+        if not phone:
+            return []
+        with self._lock:
+            convo = self._get(phone)
+            self._enforce_cap()
+            return convo.messages() if convo else []
+
+    def record(self, phone: str, role: str, content: str):
+        """Appends one turn ("user" or "assistant") to the conversation with ``phone``."""
+        if not phone or not content:
+            return
+        with self._lock:
+            convo = self._get(phone)
+            if convo is None:
+                convo = self._active[phone] = Conversation()
+            convo.add(role, content, self.max_turns, self.max_tokens)
+            self._enforce_cap()
+
+    def purge_expired(self) -> int:
+        """Drops expired conversations from memory and disk. Returns how many were removed."""
+        cutoff = time.time() - self.ttl
+        removed = 0
+        with self._lock:
+            for phone in [p for p, c in self._active.items() if c.updated_at < cutoff]:
+                del self._active[phone]
+                removed += 1
+            if self._conn is not None:
+                removed += self._conn.execute("DELETE FROM conversations WHERE updated_at < ?", (cutoff,)).rowcount
+        return removed
+
+    def persist_all(self):
+        """Writes every in-memory conversation to SQLite (app shutdown) so context survives restarts."""
+        with self._lock:
+            for phone, convo in self._active.items():
+                self._spill(phone, convo)
+
+    def __len__(self):
+        return len(self._active)
+
+
+sms_conversations = ConversationStore()
@@ -0,0 +1,132 @@
+"""
+AI Revenue Desk — Transcript Extraction Cache
+=============================================
+Persistent cache for ``extract_from_transcript`` results.
+
+Retell redelivers the same call (``call_ended`` with analysis followed by
+``call_analyzed``) and incident recovery replays whole batches of calls, so
+identical transcripts would otherwise pay for the same GPT round trip again.
+
+Entries are keyed by a SHA-256 of (prompt version, model, requested fields,
+transcript) and stored in a local SQLite file. Expired entries are ignored and
+purged; once the table grows past ``max_entries`` the least recently used rows
+are evicted.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", ".tmp/extraction_cache.sqlite3")  # "off" disables
+CACHE_TTL = float(os.getenv("EXTRACTION_CACHE_TTL_HOURS", "168")) * 3600
+CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+
+
+def cache_key(transcript: str, prompt_version: str, model: str, fields=()) -> str:
+    """Content address for one extraction request."""
+    h = hashlib.sha256()
+    for part in (prompt_version, model, ",".join(fields), transcript):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """Thread-safe SQLite-backed cache (extraction runs on worker threads)."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.enabled = bool(path) and path.lower() != "off"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expired": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        if not self.enabled:
+            return
+        try:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_accessed ON extractions(accessed_at)")
+        except sqlite3.Error as e:
+            print(f"⚠️  Extraction cache unavailable ({e}) — continuing without it.")
+            self.enabled = False
+            self._conn = None
+
+    def get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM extractions WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] > self.ttl:
+                    self._conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+                    self.stats["expired"] += 1
+                    row = None
+                if not row:
+                    self.stats["misses"] += 1
+                    return None
+                self._conn.execute("UPDATE extractions SET accessed_at = ? WHERE key = ?", (now, key))
+                self.stats["hits"] += 1
+                return json.loads(row[0])
+            except sqlite3.Error as e:
+                print(f"⚠️  Extraction cache read error: {e}")
+                self.stats["misses"] += 1
+                return None
+
+    def put(self, key: str, value: dict):
+        if not self.enabled or not value:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO extractions (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now),
+                )
+                self.stats["writes"] += 1
+                self._evict(now)
+            except sqlite3.Error as e:
+                print(f"⚠️  Extraction cache write error: {e}")
+
+    def _evict(self, now: float):
+        cur = self._conn.execute("DELETE FROM extractions WHERE created_at < ?", (now - self.ttl,))
+        self.stats["expired"] += max(cur.rowcount, 0)
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM extractions WHERE key IN ("
+                " SELECT key FROM extractions ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.stats["evictions"] += overflow
+
+    def snapshot(self) -> dict:
+        """Counters plus hit rate, for /metrics."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+extraction_cache = ExtractionCache()
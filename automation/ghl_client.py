@@ -4,12 +4,24 @@ Direct REST API integration (no webhook workflows needed).
 
 Handles: contact create/update, notes, SMS, pipeline opportunities.
 Docs: https://highlevel.stoplight.io/docs/integrations
+
+Failed requests (timeouts, connection errors, non-2xx responses) are logged
+and raised as ``GHLRequestError`` so the job queue can retry the lead.
+Methods still return None when there is nothing to do (GHL not configured,
+no phone or email to match on).
+
+All GHL calls go through a single async ``GHLClient`` that keeps a pool of
+keep-alive connections open to services.leadconnectorhq.com, so a burst of
+post-call webhooks reuses TLS sessions instead of handshaking per request.
 """
 
+import asyncio
 import os
-import requests
+import httpx
 from typing import Optional
 from dotenv import load_dotenv
+from automation.lead_pipeline import Step, run_steps
+from automation.limits import downstream
 
 load_dotenv()
 
@@ -19,6 +31,12 @@ GHL_PIPELINE_ID = os.getenv("GHL_PIPELINE_ID")                         # Optiona
 GHL_STAGE_NEW_LEAD = os.getenv("GHL_PIPELINE_STAGE_NEW_LEAD")          # Optional
 GHL_STAGE_HOT_LEAD = os.getenv("GHL_PIPELINE_STAGE_HOT_LEAD")          # Optional
 
+# Connection pool tuning (optional)
+GHL_POOL_SIZE = int(os.getenv("GHL_POOL_SIZE", "20"))
+GHL_KEEPALIVE = int(os.getenv("GHL_POOL_KEEPALIVE", "10"))
+GHL_TIMEOUT = float(os.getenv("GHL_TIMEOUT_SECONDS", "10"))
+GHL_CONNECT_TIMEOUT = float(os.getenv("GHL_CONNECT_TIMEOUT_SECONDS", "5"))
+
 TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_FROM = os.getenv("TWILIO_PHONE_NUMBER")
@@ -31,6 +49,17 @@ HEADERS = {
     "Content-Type": "application/json",
 }
 
+# HTTP/2 needs the optional `h2` package — fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+class GHLRequestError(Exception):
+    """A GHL or Twilio request failed; the job that made it should be retried."""
+
 
 def _is_configured():
     if not GHL_API_KEY or not GHL_LOCATION_ID:
@@ -39,127 +68,211 @@ def _is_configured():
     return True
 
 
-# ─────────────────────────────────────────────
-# Contact Management
-# ─────────────────────────────────────────────
-
-def _find_contact_by_query(query: str) -> Optional[str]:
-    """Searches GHL contacts by any query string (phone or email). Returns contactId or None."""
-    if not _is_configured() or not query:
-        return None
-    try:
-        resp = requests.get(
-            f"{BASE_URL}/contacts/",
-            headers=HEADERS,
-            params={"locationId": GHL_LOCATION_ID, "query": query},
-            timeout=10,
-        )
-        if resp.status_code == 200:
-            contacts = resp.json().get("contacts", [])
-            if contacts:
-                return contacts[0].get("id")
-    except Exception as e:
-        print(f"❌ GHL find_contact error: {e}")
-    return None
-
-
-def upsert_contact(lead_data: dict) -> Optional[str]:
+class GHLClient:
     """
-    Creates or updates a GHL contact matched by phone or email (whichever is available).
-    Requires at least one of phone or email — skips if neither is present.
-    Returns the contactId or None on failure.
+    Async GoHighLevel client backed by one pooled ``httpx.AsyncClient``.
+
+    The underlying connection pool is created lazily on first use and shared
+    by every call until ``aclose()`` is awaited (app shutdown).
     """
-    if not _is_configured():
-        return None
-
-    phone = lead_data.get("phone", "")
-    email = lead_data.get("email", "")
-
-    if not phone and not email:
-        print("⚠️  GHL upsert skipped — no phone or email available to identify contact.")
-        return None
-
-    # Try phone first, fall back to email for deduplication
-    existing_id = _find_contact_by_query(phone) if phone else None
-    if not existing_id and email:
-        existing_id = _find_contact_by_query(email)
-
-    # Split name into first/last best-effort
-    full_name = lead_data.get("name", "").strip()
-    parts = full_name.split(" ", 1)
-    first_name = parts[0] if parts else "Unknown"
-    last_name = parts[1] if len(parts) > 1 else ""
-
-    # Build tags list
-    tags = ["AI-Captured"]
-    if lead_data.get("category"):
-        tags.append(lead_data["category"])
-    if lead_data.get("urgency") == "high":
-        tags.append("Hot Lead")
-    if lead_data.get("sms_consent") is True:
-        tags.append("SMS-Consented")
-    else:
-        tags.append("SMS-Declined")
-
-    payload = {
-        "locationId": GHL_LOCATION_ID,
-        "firstName": first_name,
-        "lastName": last_name,
-        "companyName": lead_data.get("company") or "",
-        "source": lead_data.get("source", "PA Digital Growth AI Agent"),
-        "tags": tags,
-    }
-    if phone:
-        payload["phone"] = phone
-    if email:
-        payload["email"] = email
 
-    try:
-        if existing_id:
-            resp = requests.put(
-                f"{BASE_URL}/contacts/{existing_id}",
+    def __init__(self, pool_size: int = GHL_POOL_SIZE, keepalive: int = GHL_KEEPALIVE,
+                 timeout: float = GHL_TIMEOUT, connect_timeout: float = GHL_CONNECT_TIMEOUT):
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=BASE_URL,
                 headers=HEADERS,
-                json=payload,
-                timeout=10,
+                http2=_HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.keepalive,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
             )
-            action = "Updated"
-        else:
-            resp = requests.post(
-                f"{BASE_URL}/contacts/",
-                headers=HEADERS,
-                json=payload,
-                timeout=10,
+        return self._http
+
+    async def aclose(self):
+        """Closes pooled connections. Safe to call more than once."""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+    async def _request(self, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+        async with downstream("ghl"):
+            return await self._client().request(method, path, **kwargs)
+
+    # ─────────────────────────────────────────────
+    # Contact Management
+    # ─────────────────────────────────────────────
+
+    async def find_contact(self, query: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Searches GHL contacts by any query string (phone or email). Returns contactId or None."""
+        if not _is_configured() or not query:
+            return None
+        try:
+            resp = await self._request(
+                "GET", "/contacts/",
+                params={"locationId": GHL_LOCATION_ID, "query": query},
+                timeout=timeout,
             )
-            action = "Created"
-
-        if resp.status_code in [200, 201]:
-            contact_id = resp.json().get("contact", {}).get("id") or existing_id
-            print(f"✅ GHL Contact {action}: {contact_id}")
-            return contact_id
+        except Exception as e:
+            print(f"❌ GHL find_contact error: {e}")
+            raise GHLRequestError(f"find_contact: {e}") from e
+        if resp.status_code != 200:
+            print(f"⚠️  GHL find_contact {resp.status_code}: {resp.text}")
+            raise GHLRequestError(f"find_contact: HTTP {resp.status_code}")
+        contacts = resp.json().get("contacts", [])
+        return contacts[0].get("id") if contacts else None
+
+    async def upsert_contact(self, lead_data: dict, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Creates or updates a GHL contact matched by phone or email (whichever is available).
+        Requires at least one of phone or email — skips if neither is present.
+        Returns the contactId, or None if skipped; raises GHLRequestError on failure.
+        """
+        if not _is_configured():
+            return None
+
+        phone = lead_data.get("phone", "")
+        email = lead_data.get("email", "")
+
+        if not phone and not email:
+            print("⚠️  GHL upsert skipped — no phone or email available to identify contact.")
+            return None
+
+        # Try phone first, fall back to email for deduplication
+        existing_id = await self.find_contact(phone, timeout) if phone else None
+        if not existing_id and email:
+            existing_id = await self.find_contact(email, timeout)
+
+        # Split name into first/last best-effort
+        full_name = lead_data.get("name", "").strip()
+        parts = full_name.split(" ", 1)
+        first_name = parts[0] if parts else "Unknown"
+        last_name = parts[1] if len(parts) > 1 else ""
+
+        # Build tags list
+        tags = ["AI-Captured"]
+        if lead_data.get("category"):
+            tags.append(lead_data["category"])
+        if lead_data.get("urgency") == "high":
+            tags.append("Hot Lead")
+        if lead_data.get("sms_consent") is True:
+            tags.append("SMS-Consented")
         else:
-            print(f"⚠️  GHL upsert_contact {resp.status_code}: {resp.text}")
-    except Exception as e:
-        print(f"❌ GHL upsert_contact error: {e}")
-    return None
+            tags.append("SMS-Declined")
+
+        payload = {
+            "locationId": GHL_LOCATION_ID,
+            "firstName": first_name,
+            "lastName": last_name,
+            "companyName": lead_data.get("company") or "",
+            "source": lead_data.get("source", "PA Digital Growth AI Agent"),
+            "tags": tags,
+        }
+        if phone:
+            payload["phone"] = phone
+        if email:
+            payload["email"] = email
 
+        try:
+            if existing_id:
+                resp = await self._request("PUT", f"/contacts/{existing_id}", json=payload, timeout=timeout)
+                action = "Updated"
+            else:
+                resp = await self._request("POST", "/contacts/", json=payload, timeout=timeout)
+                action = "Created"
+        except Exception as e:
+            print(f"❌ GHL upsert_contact error: {e}")
+            raise GHLRequestError(f"upsert_contact: {e}") from e
 
-def add_note(contact_id: str, note_body: str):
-    """Attaches a note (call summary) to a GHL contact."""
-    if not _is_configured() or not contact_id:
-        return
-    try:
-        resp = requests.post(
-            f"{BASE_URL}/contacts/{contact_id}/notes",
-            headers=HEADERS,
-            json={"body": note_body},
-            timeout=10,
-        )
-        if resp.status_code in [200, 201]:
-            print("✅ GHL Note added.")
-        else:
+        if resp.status_code not in [200, 201]:
+            print(f"⚠️  GHL upsert_contact {resp.status_code}: {resp.text}")
+            raise GHLRequestError(f"upsert_contact: HTTP {resp.status_code}")
+        contact_id = resp.json().get("contact", {}).get("id") or existing_id
+        print(f"✅ GHL Contact {action}: {contact_id}")
+        return contact_id
+
+    async def create_contact(self, payload: dict, timeout: Optional[float] = None) -> Optional[str]:
+        """Creates a contact from a raw GHL payload. Returns the contactId; raises GHLRequestError on failure."""
+        if not _is_configured():
+            return None
+        try:
+            resp = await self._request("POST", "/contacts/", json=payload, timeout=timeout)
+        except Exception as e:
+            print(f"❌ GHL create_contact error: {e}")
+            raise GHLRequestError(f"create_contact: {e}") from e
+        if resp.status_code not in [200, 201]:
+            print(f"⚠️  GHL create_contact {resp.status_code}: {resp.text}")
+            raise GHLRequestError(f"create_contact: HTTP {resp.status_code}")
+        return resp.json().get("contact", {}).get("id")
+
+    async def add_note(self, contact_id: str, note_body: str, timeout: Optional[float] = None):
+        """Attaches a note (call summary) to a GHL contact."""
+        if not _is_configured() or not contact_id:
+            return
+        try:
+            resp = await self._request(
+                "POST", f"/contacts/{contact_id}/notes",
+                json={"body": note_body},
+                timeout=timeout,
+            )
+        except Exception as e:
+            print(f"❌ GHL add_note error: {e}")
+            raise GHLRequestError(f"add_note: {e}") from e
+        if resp.status_code not in [200, 201]:
             print(f"⚠️  GHL add_note {resp.status_code}: {resp.text}")
-    except Exception as e:
-        print(f"❌ GHL add_note error: {e}")
+            raise GHLRequestError(f"add_note: HTTP {resp.status_code}")
+        print("✅ GHL Note added.")
+
+    # ─────────────────────────────────────────────
+    # Pipeline / Opportunities
+    # ─────────────────────────────────────────────
+
+    async def add_to_pipeline(self, contact_id: str, lead_name: str, category: str, urgency: str,
+                              timeout: Optional[float] = None):
+        """
+        Creates a pipeline opportunity for this contact.
+        Requires GHL_PIPELINE_ID in .env. Stage is chosen by urgency level.
+        Skipped silently if pipeline is not configured.
+        """
+        if not _is_configured() or not contact_id or not GHL_PIPELINE_ID:
+            return
+
+        stage_id = GHL_STAGE_HOT_LEAD if urgency == "high" else GHL_STAGE_NEW_LEAD
+
+        payload = {
+            "pipelineId": GHL_PIPELINE_ID,
+            "locationId": GHL_LOCATION_ID,
+            "name": f"{lead_name} — {category}",
+            "contactId": contact_id,
+            "status": "open",
+        }
+        if stage_id:
+            payload["pipelineStageId"] = stage_id
+
+        try:
+            resp = await self._request("POST", "/opportunities/", json=payload, timeout=timeout)
+        except Exception as e:
+            print(f"❌ GHL add_to_pipeline error: {e}")
+            raise GHLRequestError(f"add_to_pipeline: {e}") from e
+        if resp.status_code not in [200, 201]:
+            print(f"⚠️  GHL add_to_pipeline {resp.status_code}: {resp.text}")
+            raise GHLRequestError(f"add_to_pipeline: HTTP {resp.status_code}")
+        print("✅ GHL Opportunity created.")
+
+
+# Shared client used by the webhook flows below
+ghl = GHLClient()
 
 
 # ─────────────────────────────────────────────
@@ -167,7 +280,7 @@ def add_note(contact_id: str, note_body: str):
 # ─────────────────────────────────────────────
 
 def send_sms(to_phone: str, message: str):
-    """Sends an SMS via Twilio using the configured Twilio number."""
+    """Sends an SMS via Twilio using the configured Twilio number. Raises GHLRequestError if Twilio rejects it."""
     if not to_phone or not TWILIO_SID or not TWILIO_AUTH or not TWILIO_FROM:
         print("⚠️  Twilio not fully configured — skipping SMS.")
         return
@@ -178,64 +291,21 @@ def send_sms(to_phone: str, message: str):
         print(f"✅ SMS sent via Twilio to {to_phone}")
     except Exception as e:
         print(f"❌ Twilio send_sms error: {e}")
-
-
-# ─────────────────────────────────────────────
-# Pipeline / Opportunities
-# ─────────────────────────────────────────────
-
-def add_to_pipeline(contact_id: str, lead_name: str, category: str, urgency: str):
-    """
-    Creates a pipeline opportunity for this contact.
-    Requires GHL_PIPELINE_ID in .env. Stage is chosen by urgency level.
-    Skipped silently if pipeline is not configured.
-    """
-    if not _is_configured() or not contact_id or not GHL_PIPELINE_ID:
-        return
-
-    stage_id = GHL_STAGE_HOT_LEAD if urgency == "high" else GHL_STAGE_NEW_LEAD
-
-    payload = {
-        "pipelineId": GHL_PIPELINE_ID,
-        "locationId": GHL_LOCATION_ID,
-        "name": f"{lead_name} — {category}",
-        "contactId": contact_id,
-        "status": "open",
-    }
-    if stage_id:
-        payload["pipelineStageId"] = stage_id
-
-    try:
-        resp = requests.post(
-            f"{BASE_URL}/opportunities/",
-            headers=HEADERS,
-            json=payload,
-            timeout=10,
-        )
-        if resp.status_code in [200, 201]:
-            print("✅ GHL Opportunity created.")
-        else:
-            print(f"⚠️  GHL add_to_pipeline {resp.status_code}: {resp.text}")
-    except Exception as e:
-        print(f"❌ GHL add_to_pipeline error: {e}")
+        raise GHLRequestError(f"send_sms: {e}") from e
 
 
 # ─────────────────────────────────────────────
 # High-level helpers used by webhook_handler
 # ─────────────────────────────────────────────
 
-def log_call_lead(lead_data: dict):
+def lead_steps(lead_data: dict) -> list:
     """
-    Full post-call flow:
-    1. Create/update contact
-    2. Attach call note
-    3. Send SMS confirmation
-    4. Add to pipeline (if configured)
+    Post-call GHL flow as pipeline steps:
+    1. Create/update contact                      (upsert_contact)
+    2. Attach call note      ┐
+    3. Send SMS confirmation ├ concurrently, once the contact id is known
+    4. Add to pipeline       ┘ (if configured)
     """
-    contact_id = upsert_contact(lead_data)
-    if not contact_id:
-        return
-
     # Build note body
     note = (
         f"📞 AI Agent Call — {lead_data.get('call_time', '')}\n"
@@ -246,70 +316,91 @@ def log_call_lead(lead_data: dict):
         f"Urgency: {lead_data.get('urgency', '')}\n\n"
         f"Notes: {lead_data.get('notes', '')}"
     )
-    add_note(contact_id, note)
 
-    # SMS confirmation — only sent if caller gave explicit consent and a phone number is available
-    name = lead_data.get("name", "there")
-    phone = lead_data.get("phone", "")
-    if lead_data.get("sms_consent") is True:
-        if phone:
-            sms_msg = (
-                f"Hi {name.split()[0]}, thanks for calling PA Digital Growth! "
-                f"Someone from our team will be in touch with you as soon as possible. "
-                f"Feel free to reply here with any questions. Reply STOP to opt out."
-            )
-            send_sms(phone, sms_msg)
-        else:
+    async def _upsert(_results):
+        return await ghl.upsert_contact(lead_data)
+
+    async def _note(results):
+        await ghl.add_note(results["upsert_contact"], note)
+        return True
+
+    async def _sms(_results):
+        # SMS confirmation — only sent if caller gave explicit consent and a phone number is available
+        name = lead_data.get("name", "there")
+        phone = lead_data.get("phone", "")
+        if lead_data.get("sms_consent") is not True:
+            print(f"ℹ️  SMS skipped — no consent recorded for {phone or 'unknown'}")
+            return False
+        if not phone:
             print("ℹ️  SMS skipped — consent given but no phone number available.")
-    else:
-        print(f"ℹ️  SMS skipped — no consent recorded for {phone or 'unknown'}")
-
-    # Pipeline
-    add_to_pipeline(
-        contact_id,
-        lead_data.get("name", "Unknown"),
-        lead_data.get("category", "General Enquiry"),
-        lead_data.get("urgency", "standard"),
-    )
+            return False
+        sms_msg = (
+            f"Hi {name.split()[0]}, thanks for calling PA Digital Growth! "
+            f"Someone from our team will be in touch with you as soon as possible. "
+            f"Feel free to reply here with any questions. Reply STOP to opt out."
+        )
+        # Twilio's client is blocking — keep it off the event loop
+        async with downstream("twilio"):
+            await asyncio.to_thread(send_sms, phone, sms_msg)
+        return True
+
+    async def _pipeline(results):
+        await ghl.add_to_pipeline(
+            results["upsert_contact"],
+            lead_data.get("name", "Unknown"),
+            lead_data.get("category", "General Enquiry"),
+            lead_data.get("urgency", "standard"),
+        )
+        return True
+
+    contact = ("upsert_contact",)
+    return [
+        Step("upsert_contact", _upsert),
+        Step("add_note", _note, requires=contact),
+        Step("send_sms", _sms, requires=contact),
+        Step("add_to_pipeline", _pipeline, requires=contact),
+    ]
 
 
-def log_missed_call(phone: str):
+async def log_call_lead(lead_data: dict, completed: Optional[dict] = None):
+    """Runs the full post-call GHL flow (see ``lead_steps``). Returns the PipelineResult."""
+    return await run_steps(lead_steps(lead_data), label=f"GHL {lead_data.get('call_id') or ''}".strip(),
+                           completed=completed)
+
+
+async def log_missed_call(phone: str, completed: Optional[dict] = None):
     """
     Missed call flow:
     1. Create contact (phone only)
     2. Tag as missed call
     3. Send recovery SMS
+
+    Raises GHLRequestError if GHL or Twilio fails, so the job is retried.
+    Finished steps are recorded in ``completed`` (same convention as
+    ``run_steps``), so a retry reuses the contact and never re-sends the SMS.
     """
     if not _is_configured() or not phone:
         return
+    completed = {} if completed is None else completed
+    if completed.get("send_sms"):
+        return
 
     # Create minimal contact
-    existing_id = _find_contact_by_query(phone)
+    existing_id = completed.get("contact") or await ghl.find_contact(phone)
     if existing_id:
         contact_id = existing_id
         print(f"ℹ️  Existing contact found for missed call: {contact_id}")
     else:
-        try:
-            resp = requests.post(
-                f"{BASE_URL}/contacts/",
-                headers=HEADERS,
-                json={
-                    "locationId": GHL_LOCATION_ID,
-                    "phone": phone,
-                    "source": "Missed Call - PA Digital Growth",
-                    "tags": ["Missed Call", "AI-Recovery"],
-                },
-                timeout=10,
-            )
-            if resp.status_code in [200, 201]:
-                contact_id = resp.json().get("contact", {}).get("id")
-                print(f"✅ GHL Contact created for missed call: {contact_id}")
-            else:
-                print(f"⚠️  GHL missed call contact {resp.status_code}: {resp.text}")
-                return
-        except Exception as e:
-            print(f"❌ GHL log_missed_call error: {e}")
-            return
+        contact_id = await ghl.create_contact({
+            "locationId": GHL_LOCATION_ID,
+            "phone": phone,
+            "source": "Missed Call - PA Digital Growth",
+            "tags": ["Missed Call", "AI-Recovery"],
+        })
+        if not contact_id:
+            raise GHLRequestError("create_contact: no contact id in response")
+        print(f"✅ GHL Contact created for missed call: {contact_id}")
+    completed["contact"] = contact_id
 
     client_name = os.getenv("CLIENT_NAME", "PA Digital Growth")
     sms_msg = (
@@ -317,4 +408,6 @@ def log_missed_call(phone: str):
         f"What can we help you with today? Reply here and we'll get straight back to you. "
         f"Reply STOP to opt out."
     )
-    send_sms(phone, sms_msg)
+    async with downstream("twilio"):
+        await asyncio.to_thread(send_sms, phone, sms_msg)
+    completed["send_sms"] = True
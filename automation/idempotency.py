@@ -0,0 +1,104 @@
+"""
+AI Revenue Desk — Webhook Idempotency Store
+===========================================
+Remembers which call_ids have already been processed so redelivered Retell
+webhooks don't trigger double CRM writes.
+
+Backends (select with DEDUP_BACKEND):
+- memory: per-process, insertion-ordered dict. Because every entry has the
+          same TTL, the oldest entry is always at the front, so eviction pops
+          expired entries from the head — O(1) amortised per webhook.
+- sqlite: shared file (DEDUP_DB_PATH) usable by every uvicorn worker on the
+          host and surviving restarts. Expired rows are deleted through an
+          index on seen_at, so each claim only touches rows that just expired.
+
+Both expose ``claim(key) -> bool``: True the first time a key is seen within
+the TTL window, False for duplicates.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEDUP_BACKEND = os.getenv("DEDUP_BACKEND", "memory")
+DEDUP_DB_PATH = os.getenv("DEDUP_DB_PATH", ".tmp/dedup.sqlite3")
+DEDUP_TTL = int(os.getenv("DEDUP_TTL_SECONDS", "300"))
+
+
+class MemoryIdempotencyStore:
+    """Per-process store with O(1) amortised eviction."""
+
+    def __init__(self, ttl: float = DEDUP_TTL):
+        self.ttl = ttl
+        self._seen: OrderedDict = OrderedDict()  # key -> first-seen timestamp, oldest first
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self._seen:
+            _key, seen_at = next(iter(self._seen.items()))
+            if now - seen_at <= self.ttl:
+                break
+            self._seen.popitem(last=False)
+
+    def claim(self, key: str) -> bool:
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            if key in self._seen:
+                return False
+            self._seen[key] = now
+            return True
+
+    def __len__(self):
+        return len(self._seen)
+
+
+class SQLiteIdempotencyStore:
+    """Cross-worker store backed by a shared SQLite file."""
+
+    def __init__(self, path: str = DEDUP_DB_PATH, ttl: float = DEDUP_TTL):
+        self.ttl = ttl
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS processed (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_seen_at ON processed(seen_at)")
+        self._lock = threading.Lock()
+
+    def claim(self, key: str) -> bool:
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up-front so two workers can't both claim the same key
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM processed WHERE seen_at < ?", (now - self.ttl,))
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO processed (key, seen_at) VALUES (?, ?)", (key, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return cur.rowcount == 1
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+
+def build_idempotency_store(backend: str = DEDUP_BACKEND):
+    """Returns the configured store, falling back to memory if SQLite can't be opened."""
+    if backend == "sqlite":
+        try:
+            return SQLiteIdempotencyStore()
+        except sqlite3.Error as e:
+            print(f"⚠️  Dedup SQLite store unavailable ({e}) — falling back to in-memory dedup.")
+    elif backend != "memory":
+        print(f"⚠️  Unknown DEDUP_BACKEND '{backend}' — using in-memory dedup.")
+    return MemoryIdempotencyStore()
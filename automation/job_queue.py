@@ -0,0 +1,207 @@
+"""
+AI Revenue Desk — Durable Job Queue
+===================================
+Local SQLite (WAL) job queue that replaces FastAPI ``BackgroundTasks`` for
+webhook work, so a deploy or crash mid-processing no longer loses the lead.
+
+- Webhooks ``enqueue()`` a job and return immediately.
+- A pool of async workers claims jobs with a lease. If the process dies while
+  a job is running, the lease expires and another worker picks it up again.
+- Failed jobs are retried with exponential backoff; after JOB_MAX_ATTEMPTS
+  they are moved to the dead-letter state and the handler's ``on_dead``
+  callback is invoked (e.g. a Slack alert). Only an exception from the
+  handler counts as a failure.
+- The payload is saved again when a job fails, so a handler can record its
+  progress in it (e.g. steps already done) and skip that work on the retry.
+
+How fast each downstream API is hit is governed by ``automation.limits``.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", ".tmp/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "5"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_POLL_SECONDS = 1.0
+
+
+class JobQueue:
+    def __init__(self, path: str = JOB_QUEUE_PATH, workers: int = JOB_WORKERS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, backoff_base: float = JOB_BACKOFF_BASE,
+                 backoff_max: float = JOB_BACKOFF_MAX, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self._handlers: dict = {}
+        self._tasks: list = []
+        self._stopping = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " kind TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"  # pending | running | dead
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " run_at REAL NOT NULL,"
+            " lease_until REAL,"
+            " last_error TEXT,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_at)")
+
+    # ─────────────────────────────────────────────
+    # Producer side
+    # ─────────────────────────────────────────────
+
+    def register(self, kind: str, handler: Callable[[dict], Awaitable],
+                 on_dead: Optional[Callable[[dict, str], Awaitable]] = None):
+        """Registers the coroutine that processes jobs of ``kind``."""
+        self._handlers[kind] = (handler, on_dead)
+
+    def enqueue(self, kind: str, payload: dict) -> int:
+        """Persists a job and wakes the workers. Returns the job id."""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (kind, payload, run_at, created_at) VALUES (?, ?, ?, ?)",
+                (kind, json.dumps(payload), now, now),
+            )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return cur.lastrowid
+
+    # ─────────────────────────────────────────────
+    # Worker side
+    # ─────────────────────────────────────────────
+
+    def _claim(self) -> Optional[tuple]:
+        """Atomically leases the next runnable job (pending, or running with an expired lease)."""
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?"
+                " WHERE id = ("
+                "  SELECT id FROM jobs"
+                "  WHERE (status = 'pending' AND run_at <= ?)"
+                "     OR (status = 'running' AND lease_until < ?)"
+                "  ORDER BY run_at, id LIMIT 1)"
+                " RETURNING id, kind, payload, attempts",
+                (now + self.lease_seconds, now, now),
+            ).fetchone()
+
+    def _complete(self, job_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def _fail(self, job_id: int, attempts: int, error: str, payload: Optional[dict] = None) -> bool:
+        """Schedules a retry, or dead-letters the job. Returns True if dead-lettered."""
+        with self._lock:
+            if payload is not None:
+                self._conn.execute("UPDATE jobs SET payload = ? WHERE id = ?", (json.dumps(payload), job_id))
+            if attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'dead', lease_until = NULL, last_error = ? WHERE id = ?",
+                    (error, job_id),
+                )
+                return True
+            delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', lease_until = NULL, run_at = ?, last_error = ? WHERE id = ?",
+                (time.time() + delay, error, job_id),
+            )
+            return False
+
+    async def _run_job(self, job_id: int, kind: str, payload: dict, attempts: int):
+        handler, on_dead = self._handlers.get(kind, (None, None))
+        if handler is None:
+            await asyncio.to_thread(self._fail, job_id, self.max_attempts, f"No handler for kind '{kind}'")
+            print(f"❌ Job {job_id}: no handler registered for '{kind}' — dead-lettered.")
+            return
+        try:
+            await handler(payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"❌ Job {job_id} ({kind}) attempt {attempts}/{self.max_attempts} failed: {error}")
+            traceback.print_exc()
+            dead = await asyncio.to_thread(self._fail, job_id, attempts, error, payload)
+            if dead and on_dead is not None:
+                try:
+                    await on_dead(payload, error)
+                except Exception as cb_err:
+                    print(f"❌ Dead-letter callback for job {job_id} failed: {cb_err}")
+            return
+        await asyncio.to_thread(self._complete, job_id)
+
+    async def _worker(self, idx: int):
+        while not self._stopping:
+            try:
+                row = await asyncio.to_thread(self._claim)
+            except sqlite3.Error as e:
+                # e.g. "database is locked" — keep the worker alive and poll again
+                print(f"⚠️  Job worker {idx}: claim failed ({e}) — retrying in {JOB_POLL_SECONDS:.0f}s")
+                await asyncio.sleep(JOB_POLL_SECONDS)
+                continue
+            if row is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            job_id, kind, payload, attempts = row
+            try:
+                await self._run_job(job_id, kind, json.loads(payload), attempts)
+            except sqlite3.Error as e:
+                # Could not record the outcome; the lease expires and the job runs again
+                print(f"⚠️  Job worker {idx}: could not update job {job_id} ({e})")
+
+    async def start(self):
+        """Starts the worker pool on the running event loop."""
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"🧵 Job queue started with {self.workers} workers — {self.stats()}")
+
+    async def stop(self, timeout: float = 20.0):
+        """Lets in-flight jobs finish (up to ``timeout``); unfinished ones resume after restart."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._tasks:
+            _done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for t in pending:
+                t.cancel()
+        self._tasks = []
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {"pending": 0, "running": 0, "dead": 0}
+        counts.update(dict(rows))
+        return counts
@@ -0,0 +1,138 @@
+"""
+AI Revenue Desk — Lead Pipeline Executor
+========================================
+Runs the post-call lead flow as a small dependency graph instead of a
+straight line.
+
+Each ``Step`` names the steps it depends on:
+- ``requires``: must finish with a truthy result (e.g. a contact id),
+  otherwise this step is skipped.
+- ``after``: must finish (success, failure or skip) before this step starts.
+
+Everything whose dependencies are satisfied runs concurrently, and the
+wall-clock time of every step is reported once the graph completes.
+
+Passing a ``completed`` dict makes a run resumable: every step that
+succeeds is recorded there (name -> result), and steps already in it are
+not run again — their stored result is reused. Queue jobs keep this dict
+in their payload so a retry does not repeat a note or SMS that already
+went out.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+
+@dataclass
+class Step:
+    name: str
+    fn: Callable[[dict], Awaitable[Any]]
+    requires: tuple = ()
+    after: tuple = ()
+
+
+@dataclass
+class StepTiming:
+    status: str = "pending"   # ok | failed | skipped | done (completed by an earlier run)
+    started_ms: float = 0.0   # offset from pipeline start
+    duration_ms: float = 0.0
+
+
+@dataclass
+class PipelineResult:
+    results: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    @property
+    def failed(self) -> list:
+        return [name for name, t in self.timings.items() if t.status == "failed"]
+
+    def summary(self) -> str:
+        parts = []
+        for name, t in self.timings.items():
+            if t.status in ("skipped", "done"):
+                parts.append(f"{name} {t.status}")
+            else:
+                mark = "" if t.status == "ok" else " ✗"
+                parts.append(f"{name} {t.duration_ms:.0f}ms{mark}")
+        return " | ".join(parts) + f" | total {self.total_ms:.0f}ms"
+
+
+def _check_acyclic(by_name: dict):
+    """Raises ValueError if the steps contain a dependency cycle (would deadlock)."""
+    state: dict = {}  # name -> "visiting" | "done"
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependency cycle in lead pipeline: {' -> '.join(path + [name])}")
+        state[name] = "visiting"
+        step = by_name[name]
+        for d in (*step.requires, *step.after):
+            visit(d, path + [name])
+        state[name] = "done"
+
+    for name in by_name:
+        visit(name, [])
+
+
+async def run_steps(steps: list, label: str = "lead", completed: dict = None) -> PipelineResult:
+    """
+    Executes ``steps`` respecting their dependencies and returns every step's
+    result and timing. Step functions receive the shared results dict so they
+    can read what their dependencies produced. A failing step never aborts the
+    rest of the graph — it is logged and treated as a falsy result.
+
+    Steps named in ``completed`` are not re-run; successful steps are added to it.
+    """
+    by_name = {s.name: s for s in steps}
+    for s in steps:
+        unknown = [d for d in (*s.requires, *s.after) if d not in by_name]
+        if unknown:
+            raise ValueError(f"Step '{s.name}' depends on unknown step(s): {unknown}")
+    _check_acyclic(by_name)
+
+    out = PipelineResult(timings={s.name: StepTiming() for s in steps})
+    started = time.perf_counter()
+    tasks: dict = {}
+
+    async def _run(step: Step):
+        deps = set(step.requires) | set(step.after)
+        if deps:
+            await asyncio.gather(*(tasks[d] for d in deps))
+
+        timing = out.timings[step.name]
+        if completed is not None and step.name in completed:
+            timing.status = "done"
+            out.results[step.name] = completed[step.name]
+            return
+        if any(not out.results.get(d) for d in step.requires):
+            timing.status = "skipped"
+            out.results[step.name] = None
+            return
+
+        t0 = time.perf_counter()
+        timing.started_ms = (t0 - started) * 1000
+        try:
+            out.results[step.name] = await step.fn(out.results)
+            timing.status = "ok"
+            if completed is not None:
+                completed[step.name] = out.results[step.name]
+        except Exception as e:
+            print(f"❌ Pipeline step '{step.name}' failed: {e}")
+            out.results[step.name] = None
+            timing.status = "failed"
+        timing.duration_ms = (time.perf_counter() - t0) * 1000
+
+    # Create every task up-front so dependents can await their parents by name
+    for s in steps:
+        tasks[s.name] = asyncio.ensure_future(_run(s))
+    await asyncio.gather(*tasks.values())
+
+    out.total_ms = (time.perf_counter() - started) * 1000
+    print(f"⏱️  {label} pipeline: {out.summary()}")
+    return out
@@ -0,0 +1,41 @@
+"""
+AI Revenue Desk — Downstream Concurrency Limits
+===============================================
+One asyncio semaphore per external service, so webhooks can be accepted at
+full rate while GHL, Twilio, Slack and OpenAI are called only as fast as they
+tolerate.
+
+Usage:
+    async with downstream("ghl"):
+        await client.request(...)
+
+Limits come from DOWNSTREAM_LIMIT_<NAME> env vars (e.g. DOWNSTREAM_LIMIT_GHL=4).
+"""
+
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_LIMITS = {
+    "ghl": 4,
+    "twilio": 4,
+    "slack": 2,
+    "openai": 4,
+}
+
+_semaphores: dict = {}
+
+
+def limit_for(name: str) -> int:
+    return int(os.getenv(f"DOWNSTREAM_LIMIT_{name.upper()}", DEFAULT_LIMITS.get(name, 4)))
+
+
+def downstream(name: str) -> asyncio.Semaphore:
+    """Returns the shared semaphore for ``name`` (created on first use)."""
+    sem = _semaphores.get(name)
+    if sem is None:
+        sem = _semaphores[name] = asyncio.Semaphore(limit_for(name))
+    return sem
@@ -0,0 +1,164 @@
+"""
+AI Revenue Desk — Batched Slack Notifier
+========================================
+Non-blocking replacement for calling ``send_slack_notification`` inline.
+
+``slack_notifier.notify(msg)`` only appends to a bounded in-memory buffer and
+returns immediately. A background flusher waits SLACK_BATCH_WINDOW_SECONDS
+after the first message of a burst, then posts everything buffered as one
+Slack payload (one section block per message). A 429 from Slack pauses the
+flusher for Retry-After seconds and keeps the batch for the next attempt.
+
+When the buffer is full, SLACK_OVERFLOW_POLICY decides what is lost:
+``drop_oldest`` (default — the newest alerts are usually the actionable ones)
+or ``drop_newest``.
+
+Outside the running app (scripts, ``__main__`` tests) ``notify`` falls back to
+the synchronous ``send_slack_notification``.
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from automation.limits import downstream
+from automation.utils import send_slack_notification
+
+load_dotenv()
+
+SLACK_BATCH_WINDOW = float(os.getenv("SLACK_BATCH_WINDOW_SECONDS", "2"))
+SLACK_BUFFER_SIZE = int(os.getenv("SLACK_BUFFER_SIZE", "500"))
+SLACK_OVERFLOW_POLICY = os.getenv("SLACK_OVERFLOW_POLICY", "drop_oldest")
+
+# Slack allows 50 blocks per message; messages are separated by dividers
+_MAX_MESSAGES_PER_POST = 25
+_MAX_SECTION_CHARS = 3000
+
+
+def build_payload(messages: list) -> dict:
+    """One message is sent as plain text (unchanged look); bursts become section blocks."""
+    if len(messages) == 1:
+        return {"text": messages[0]}
+    blocks = []
+    for msg in messages:
+        if blocks:
+            blocks.append({"type": "divider"})
+        text = msg if len(msg) <= _MAX_SECTION_CHARS else msg[:_MAX_SECTION_CHARS - 1] + "…"
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": text}})
+    return {"text": f"{len(messages)} AI Revenue Desk updates", "blocks": blocks}
+
+
+class SlackNotifier:
+    def __init__(self, window: float = SLACK_BATCH_WINDOW, buffer_size: int = SLACK_BUFFER_SIZE,
+                 overflow_policy: str = SLACK_OVERFLOW_POLICY):
+        self.window = window
+        self.buffer_size = buffer_size
+        self.overflow_policy = overflow_policy
+        self.stats = {"queued": 0, "dropped": 0, "posts": 0, "messages_sent": 0, "rate_limited": 0, "errors": 0}
+        self._buffer: deque = deque()
+        self._pending: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._webhook_url: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def notify(self, message: str) -> bool:
+        """Buffers ``message`` for the next flush. Returns False if it was dropped."""
+        if not self.running:
+            send_slack_notification(message)
+            return True
+        if len(self._buffer) >= self.buffer_size:
+            self.stats["dropped"] += 1
+            if self.overflow_policy == "drop_newest":
+                print("⚠️  Slack buffer full — dropping new message.")
+                return False
+            self._buffer.popleft()
+            print("⚠️  Slack buffer full — dropped oldest message.")
+        self._buffer.append(message)
+        self.stats["queued"] += 1
+        self._pending.set()
+        return True
+
+    async def start(self):
+        self._webhook_url = os.getenv("SLACK_WEBHOOK_URL")
+        if not self._webhook_url:
+            print("⚠️ SLACK_WEBHOOK_URL not set. Slack notifier disabled.")
+        self._http = httpx.AsyncClient(timeout=httpx.Timeout(10, connect=5))
+        self._pending = asyncio.Event()
+        self._task = asyncio.create_task(self._flusher())
+
+    async def stop(self):
+        """Stops the flusher after one final flush of whatever is buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._buffer:
+            if not await self._flush_once():
+                break
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _flusher(self):
+        while True:
+            await self._pending.wait()
+            # Let the burst accumulate before posting
+            await asyncio.sleep(self.window)
+            while self._buffer:
+                if not await self._flush_once():
+                    break
+            if not self._buffer:
+                self._pending.clear()
+
+    async def _flush_once(self) -> bool:
+        """Posts one batch. Returns False if the batch should be retried later."""
+        batch = [self._buffer.popleft() for _ in range(min(_MAX_MESSAGES_PER_POST, len(self._buffer)))]
+        if not self._webhook_url:
+            self.stats["dropped"] += len(batch)
+            return True
+        try:
+            async with downstream("slack"):
+                resp = await self._http.post(self._webhook_url, json=build_payload(batch))
+        except asyncio.CancelledError:
+            # Shutdown mid-post: hand the batch back so stop()'s final drain sends it
+            self._buffer.extendleft(reversed(batch))
+            raise
+        except Exception as e:
+            print(f"❌ Slack Connection Error: {e}")
+            self.stats["errors"] += 1
+            self._buffer.extendleft(reversed(batch))
+            await asyncio.sleep(self.window)
+            return False
+
+        if resp.status_code == 429:
+            retry_after = float(resp.headers.get("Retry-After", "1") or 1)
+            print(f"⏳ Slack rate limited — retrying {len(batch)} message(s) in {retry_after:g}s")
+            self.stats["rate_limited"] += 1
+            self._buffer.extendleft(reversed(batch))
+            await asyncio.sleep(retry_after)
+            return False
+        if resp.status_code == 200:
+            self.stats["posts"] += 1
+            self.stats["messages_sent"] += len(batch)
+            print(f"✅ Slack notification sent ({len(batch)} message{'s' if len(batch) > 1 else ''}).")
+        else:
+            print(f"❌ Slack Error: Received status code {resp.status_code}. Response: {resp.text}")
+            self.stats["errors"] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "buffered": len(self._buffer)}
+
+
+slack_notifier = SlackNotifier()
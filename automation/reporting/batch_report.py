@@ -0,0 +1,136 @@
+"""
+AI Revenue Desk — Batch Revenue Reports
+=======================================
+Runs the weekly revenue report for every client in clients/*/config.json
+from one process, instead of one deploy per client.
+
+1. One authenticated Sheets service is shared by every client. Each
+   client's new log rows are read into ReportState on a thread pool; every
+   thread gets its own authorized HTTP transport, because httplib2
+   connections are not thread-safe.
+2. Dashboard tabs are built from each client's buckets in a process pool
+   (``reporter.build_report``).
+3. Dashboards are written back on the thread pool, using each client's own
+   ``fees.retainer`` for the ROI figures.
+
+Each client config needs the spreadsheet its lead log lives in:
+
+    {"slug": "acme-hvac", "name": "Acme HVAC", "google_sheets_id": "1AbC...",
+     "fees": {"retainer": 3500, ...}}
+
+Clients without ``google_sheets_id`` are skipped with a warning.
+
+Usage (from the repo root):
+    python -m automation.reporting.batch_report [--clients acme-hvac ...] [--rebuild] [--workers N]
+"""
+
+import argparse
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import httplib2
+from dotenv import load_dotenv
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+
+from automation.config_loader import list_client_configs
+from automation.reporting.report_state import ReportState
+from automation.reporting.reporter import RevenueReporter, authenticate, build_report
+
+load_dotenv()
+
+REPORT_IO_WORKERS = int(os.getenv("REPORT_IO_WORKERS", "8"))
+
+_thread = threading.local()
+
+
+def _thread_http(creds):
+    """This thread's authorized transport for the shared service (None → the service's own)."""
+    if creds is None:
+        return None
+    if not hasattr(_thread, "http"):
+        _thread.http = AuthorizedHttp(creds, http=httplib2.Http())
+    return _thread.http
+
+
+def _build_report(args):
+    return build_report(*args)
+
+
+def client_reporters(configs, service, state):
+    """One RevenueReporter per client config that names a spreadsheet."""
+    reporters = []
+    for config in configs:
+        sheet_id = config.get("google_sheets_id")
+        if not sheet_id:
+            print(f"⚠️  Skipping {config['slug']}: no google_sheets_id in clients/{config['slug']}/config.json")
+            continue
+        reporters.append(RevenueReporter(
+            spreadsheet_id=sheet_id,
+            retainer_fee=config.get("fees", {}).get("retainer", 2000),
+            service=service,
+            state=state,
+            name=config.get("name") or config["slug"],
+        ))
+    return reporters
+
+
+def run_batch_report(slugs=None, rebuild=False, workers=None, io_workers=REPORT_IO_WORKERS):
+    configs = [c for c in list_client_configs() if not slugs or c["slug"] in slugs]
+    if not configs:
+        print("❌ No client configs found under clients/*/config.json")
+        return
+    print(f"📊 Generating Weekly Revenue Reports for {len(configs)} client(s)...")
+
+    creds = authenticate()
+    service = build('sheets', 'v4', credentials=creds)
+    if creds is None:
+        io_workers = 1  # No credentials to give each thread its own transport
+    reporters = client_reporters(configs, service, ReportState())
+
+    def ingest(reporter):
+        try:
+            return reporter.ingest(rebuild, _thread_http(creds))
+        except Exception as e:
+            print(f"{reporter.log_prefix}❌ Error reading log: {e}")
+            return False
+
+    def write(reporter, tabs):
+        return reporter.write_tabs(tabs, _thread_http(creds))
+
+    # 1. Read new log rows for every client
+    with ThreadPoolExecutor(max_workers=io_workers) as pool:
+        ready = [r for r, found in zip(reporters, pool.map(ingest, reporters)) if found]
+    if not ready:
+        return
+
+    # 2. Build every client's tabs from its buckets
+    now = datetime.now()
+    inputs = [(*r.report_inputs(now), r.retainer_fee, now) for r in ready]
+    if workers == 1:
+        reports = [build_report(*args) for args in inputs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(inputs))) as pool:
+            reports = list(pool.map(_build_report, inputs))
+
+    # 3. Write dashboards
+    with ThreadPoolExecutor(max_workers=io_workers) as pool:
+        written = sum(pool.map(write, ready, reports))
+    print(f"✅ Batch report done: {written}/{len(configs)} dashboards updated "
+          f"({len(configs) - len(reporters)} without a spreadsheet, {len(reporters) - len(ready)} without a log)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update every client's Executive Dashboard from its lead log.")
+    parser.add_argument("--clients", nargs="+", metavar="SLUG", help="Only these client slugs (default: all)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Re-aggregate each client's whole log (picks up rows edited after they were first reported)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes building reports (default: CPU count; 1 builds in-process)")
+    parser.add_argument("--io-workers", type=int, default=REPORT_IO_WORKERS,
+                        help=f"Concurrent Sheets reads/writes (default: {REPORT_IO_WORKERS})")
+    args = parser.parse_args()
+
+    run_batch_report(args.clients, rebuild=args.rebuild, workers=args.workers, io_workers=args.io_workers)
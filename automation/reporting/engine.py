@@ -0,0 +1,212 @@
+"""
+AI Revenue Desk — Columnar Reporting Engine
+===========================================
+NumPy reporting over the lead log for multi-period dashboards.
+
+The log is held as parallel arrays (one element per row, or per daily
+bucket from ``ReportState``):
+
+    day        int64   days since 1970-01-01
+    category   int64   index into ``categories``
+    calls      int64   1 per raw row; the bucket count for pre-aggregated input
+    booked     int64
+    recovered  int64
+    revenue    float64
+
+``summarize`` turns any period (day / week / month) into a
+(period x category) grid with one ``np.bincount`` per metric, so daily,
+weekly and monthly views, booking rate, recovery rate and revenue per
+category all come out of the same arrays without a per-row Python loop.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from automation.reporting.report_state import COL_ISSUE, COL_REVENUE, COL_STATUS, COL_TIMESTAMP, parse_log_row
+
+PERIODS = ("day", "week", "month")
+TIMESTAMP_LENGTH = len("2026-01-01 00:00:00")  # TIMESTAMP_FORMAT
+# TIMESTAMP_FORMAT character by character: "0" marks an ASCII digit, anything else must match exactly
+_TIMESTAMP_TEMPLATE = np.array(list("0000-00-00 00:00:00"))
+
+
+@dataclass
+class LogColumns:
+    day: np.ndarray
+    category: np.ndarray
+    calls: np.ndarray
+    booked: np.ndarray
+    recovered: np.ndarray
+    revenue: np.ndarray
+    categories: list
+
+    def __len__(self):
+        return len(self.day)
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "LogColumns":
+        """
+        Raw lead-log rows (``values().get`` output), with the same row rules as
+        ``parse_log_row``. Columns are converted in bulk; if any row is short or
+        has a timestamp that isn't exactly TIMESTAMP_FORMAT (or a malformed
+        revenue), rows are checked one by one instead and the bad ones dropped.
+        """
+        if not rows:
+            return cls.empty()
+        if any(len(r) <= COL_STATUS or len(r[COL_TIMESTAMP]) != TIMESTAMP_LENGTH for r in rows):
+            return cls._from_rows_checked(rows)
+        chars = np.array([r[COL_TIMESTAMP] for r in rows], dtype=f"U{TIMESTAMP_LENGTH}").view("U1")
+        chars = chars.reshape(len(rows), TIMESTAMP_LENGTH)
+        digit = _TIMESTAMP_TEMPLATE == "0"
+        if not np.where(digit, (chars >= "0") & (chars <= "9"), chars == _TIMESTAMP_TEMPLATE).all():
+            return cls._from_rows_checked(rows)
+        chars[:, 10] = "T"  # ISO 8601, so numpy range-checks every field (month 13, Feb 30, hour 24...)
+        try:
+            ts = chars.view(f"U{TIMESTAMP_LENGTH}").ravel().astype("datetime64[s]").astype("datetime64[D]")
+            revenue = np.array([(r[COL_REVENUE] if len(r) > COL_REVENUE else "") or 0 for r in rows], dtype=np.float64)
+        except ValueError:
+            return cls._from_rows_checked(rows)
+
+        status = np.char.lower(np.array([r[COL_STATUS] for r in rows], dtype=str))
+        categories, category = np.unique(
+            np.array([r[COL_ISSUE].strip() or "Uncategorized" for r in rows], dtype=str), return_inverse=True
+        )
+        return cls(
+            day=ts.astype(np.int64),
+            category=category.astype(np.int64),
+            calls=np.ones(len(rows), dtype=np.int64),
+            booked=(np.char.find(status, "booked") >= 0).astype(np.int64),
+            recovered=(np.char.find(status, "recovered") >= 0).astype(np.int64),
+            revenue=revenue,
+            categories=categories.tolist(),
+        )
+
+    @classmethod
+    def _from_rows_checked(cls, rows: list) -> "LogColumns":
+        parsed = [p for p in map(parse_log_row, rows) if p is not None]
+        return cls.from_buckets([(day, cat, 1, int(b), int(r), rev) for day, cat, b, r, rev in parsed])
+
+    @classmethod
+    def from_buckets(cls, buckets: list) -> "LogColumns":
+        """``ReportState.buckets()`` rows: (day 'YYYY-MM-DD', category, calls, booked, recovered, revenue)."""
+        if not buckets:
+            return cls.empty()
+        days, cats, calls, booked, recovered, revenue = zip(*buckets)
+        categories, category = np.unique(np.array(cats, dtype=str), return_inverse=True)
+        return cls(
+            day=np.array(days, dtype="datetime64[D]").astype(np.int64),
+            category=category.astype(np.int64),
+            calls=np.array(calls, dtype=np.int64),
+            booked=np.array(booked, dtype=np.int64),
+            recovered=np.array(recovered, dtype=np.int64),
+            revenue=np.array(revenue, dtype=np.float64),
+            categories=categories.tolist(),
+        )
+
+    @classmethod
+    def empty(cls) -> "LogColumns":
+        i = np.zeros(0, dtype=np.int64)
+        return cls(i, i, i, i, i, np.zeros(0, dtype=np.float64), [])
+
+
+@dataclass
+class PeriodSummary:
+    """Metrics on a (period x category) grid; ``labels`` name the periods, oldest first."""
+    period: str
+    labels: list
+    categories: list
+    calls: np.ndarray
+    booked: np.ndarray
+    recovered: np.ndarray
+    revenue: np.ndarray
+
+    def totals(self) -> dict:
+        """Per-period totals across categories, rates in percent."""
+        calls = self.calls.sum(axis=1)
+        booked = self.booked.sum(axis=1)
+        recovered = self.recovered.sum(axis=1)
+        return {
+            "calls": calls,
+            "booked": booked,
+            "recovered": recovered,
+            "revenue": self.revenue.sum(axis=1),
+            "booking_rate": _rate(booked, calls),
+            "recovery_rate": _rate(recovered, calls),
+        }
+
+    def by_category(self, period_index: int = -1) -> list:
+        """(category, calls, booked, recovered, revenue, booking_rate) for one period, highest revenue first."""
+        if not self.labels:
+            return []
+        calls, booked = self.calls[period_index], self.booked[period_index]
+        rates = _rate(booked, calls)
+        rows = [
+            (cat, int(calls[i]), int(booked[i]), int(self.recovered[period_index][i]),
+             float(self.revenue[period_index][i]), float(rates[i]))
+            for i, cat in enumerate(self.categories) if calls[i]
+        ]
+        return sorted(rows, key=lambda r: r[4], reverse=True)
+
+
+def _rate(part: np.ndarray, whole: np.ndarray) -> np.ndarray:
+    return np.divide(part * 100.0, whole, out=np.zeros(len(whole), dtype=np.float64), where=whole > 0)
+
+
+def _period_index(day: np.ndarray, period: str) -> np.ndarray:
+    if period == "day":
+        return day
+    if period == "week":
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        return (day + 3) // 7
+    if period == "month":
+        return day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unknown period '{period}' (expected one of {PERIODS})")
+
+
+def _period_label(index: int, period: str) -> str:
+    if period == "day":
+        return str(np.datetime64(index, "D"))
+    if period == "week":
+        return f"Week of {np.datetime64(index * 7 - 3, 'D')}"
+    return str(np.datetime64(index, "M"))
+
+
+def summarize(cols: LogColumns, period: str = "week", last: int = None, until_day: str = None) -> PeriodSummary:
+    """
+    Buckets ``cols`` by ``period`` and category. ``last`` keeps only the most
+    recent N periods (ending at ``until_day``, default the newest data);
+    empty periods inside the range are kept as zero rows.
+    """
+    ncat = len(cols.categories)
+    if not len(cols):
+        empty = np.zeros((0, ncat))
+        return PeriodSummary(period, [], cols.categories, empty, empty, empty, empty)
+
+    pidx = _period_index(cols.day, period)
+    end = _period_index(np.array([np.datetime64(until_day, "D").astype(np.int64)]), period)[0] if until_day else pidx.max()
+    start = end - last + 1 if last else pidx.min()
+    keep = (pidx >= start) & (pidx <= end)
+    nperiods = int(end - start + 1)
+
+    flat = (pidx[keep] - start) * ncat + cols.category[keep]
+    size = nperiods * ncat
+
+    def grid(values):
+        return np.bincount(flat, weights=values[keep], minlength=size).reshape(nperiods, ncat)
+
+    return PeriodSummary(
+        period=period,
+        labels=[_period_label(int(i), period) for i in range(int(start), int(end) + 1)],
+        categories=cols.categories,
+        calls=grid(cols.calls).astype(np.int64),
+        booked=grid(cols.booked).astype(np.int64),
+        recovered=grid(cols.recovered).astype(np.int64),
+        revenue=grid(cols.revenue),
+    )
+
+
+def dashboard(cols: LogColumns, last: dict = None, until_day: str = None) -> dict:
+    """Day, week and month summaries from the same arrays. ``last`` caps periods per view."""
+    last = last or {"day": 14, "week": 8, "month": 6}
+    return {period: summarize(cols, period, last.get(period), until_day) for period in PERIODS}
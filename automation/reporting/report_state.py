@@ -0,0 +1,138 @@
+"""
+AI Revenue Desk — Incremental Report State
+==========================================
+Local SQLite state that lets the revenue reporter read only the lead-log
+rows appended since its last run.
+
+- ``cursors`` remembers, per spreadsheet, which tab holds the log and the
+  last sheet row already aggregated.
+- ``daily`` holds rolling buckets per (spreadsheet, day, category):
+  calls, booked, recovered and revenue. Report windows are sums over
+  buckets, never a re-scan of the log.
+
+Rows edited in the sheet after they were aggregated (e.g. a status changed
+from Pending to Booked) are only picked up by a rebuild
+(``python -m automation.reporting.reporter --rebuild``).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REPORT_STATE_PATH = os.getenv("REPORT_STATE_PATH", ".tmp/report_state.sqlite3")
+
+# Lead log layout (RevenueDeskLogger): Timestamp | Call ID | Name | Phone | Address | Issue | Status | Est. Revenue
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+COL_TIMESTAMP, COL_ISSUE, COL_STATUS, COL_REVENUE = 0, 5, 6, 7
+FIRST_DATA_ROW = 2  # Row 1 is the header
+
+
+def parse_log_row(row):
+    """(day 'YYYY-MM-DD', category, booked, recovered, revenue) for one log row, or None if unusable."""
+    try:
+        day = datetime.strptime(row[COL_TIMESTAMP], TIMESTAMP_FORMAT).strftime("%Y-%m-%d")
+        status = row[COL_STATUS].lower()
+        revenue = float(row[COL_REVENUE]) if len(row) > COL_REVENUE and row[COL_REVENUE] else 0.0
+    except (IndexError, ValueError, TypeError):
+        return None
+    category = (row[COL_ISSUE].strip() if len(row) > COL_ISSUE else "") or "Uncategorized"
+    return day, category, "booked" in status, "recovered" in status, revenue
+
+
+class ReportState:
+    def __init__(self, path: str = REPORT_STATE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cursors (
+                spreadsheet_id TEXT PRIMARY KEY,
+                tab TEXT NOT NULL,
+                last_row INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS daily (
+                spreadsheet_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                category TEXT NOT NULL,
+                calls INTEGER NOT NULL DEFAULT 0,
+                booked INTEGER NOT NULL DEFAULT 0,
+                recovered INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (spreadsheet_id, day, category)
+            );
+        """)
+
+    def cursor(self, spreadsheet_id: str):
+        """(tab, last aggregated sheet row) — (None, 1) before the first run."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tab, last_row FROM cursors WHERE spreadsheet_id = ?", (spreadsheet_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, FIRST_DATA_ROW - 1)
+
+    def apply(self, spreadsheet_id: str, tab: str, rows: list, first_row: int) -> int:
+        """
+        Folds ``rows`` (sheet rows ``first_row``..) into the daily buckets and
+        advances the cursor past them, atomically. Returns rows aggregated.
+        """
+        buckets = {}
+        used = 0
+        for row in rows:
+            parsed = parse_log_row(row)
+            if parsed is None:
+                continue
+            day, category, booked, recovered, revenue = parsed
+            b = buckets.setdefault((day, category), [0, 0, 0, 0.0])
+            b[0] += 1
+            b[1] += booked
+            b[2] += recovered
+            b[3] += revenue
+            used += 1
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO daily (spreadsheet_id, day, category, calls, booked, recovered, revenue)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (spreadsheet_id, day, category) DO UPDATE SET"
+                "  calls = calls + excluded.calls, booked = booked + excluded.booked,"
+                "  recovered = recovered + excluded.recovered, revenue = revenue + excluded.revenue",
+                [(spreadsheet_id, day, category, *b) for (day, category), b in buckets.items()],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cursors (spreadsheet_id, tab, last_row, updated_at) VALUES (?, ?, ?, ?)",
+                (spreadsheet_id, tab, first_row + len(rows) - 1, time.time()),
+            )
+        return used
+
+    def totals(self, spreadsheet_id: str, since_day: str, until_day: str = "9999-12-31") -> dict:
+        """Summed buckets for days in [since_day, until_day]."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(calls), 0), COALESCE(SUM(booked), 0), COALESCE(SUM(recovered), 0),"
+                " COALESCE(SUM(revenue), 0) FROM daily WHERE spreadsheet_id = ? AND day BETWEEN ? AND ?",
+                (spreadsheet_id, since_day, until_day),
+            ).fetchone()
+        return {"calls": row[0], "booked": row[1], "recovered": row[2], "revenue": row[3]}
+
+    def buckets(self, spreadsheet_id: str) -> list:
+        """Every (day, category, calls, booked, recovered, revenue) bucket, oldest day first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT day, category, calls, booked, recovered, revenue FROM daily"
+                " WHERE spreadsheet_id = ? ORDER BY day", (spreadsheet_id,)
+            ).fetchall()
+
+    def reset(self, spreadsheet_id: str):
+        """Drops the cursor and buckets so the next run re-aggregates the whole log."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cursors WHERE spreadsheet_id = ?", (spreadsheet_id,))
+            self._conn.execute("DELETE FROM daily WHERE spreadsheet_id = ?", (spreadsheet_id,))
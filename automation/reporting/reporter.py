@@ -5,148 +5,228 @@ from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials as UserCredentials
 from googleapiclient.discovery import build
 from dotenv import load_dotenv
+import argparse
 import json
 
+from automation.config_loader import get_active_config
+from automation.reporting.engine import LogColumns, dashboard
+from automation.reporting.report_state import ReportState
+
 load_dotenv()
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+TREND_PERIODS = {"day": 14, "week": 8, "month": 6}  # How many of each period the trends tab shows
+
+
+def authenticate():
+    # 1. Try Environment Variable (For Railway/Cloud)
+    env_creds = os.getenv("GOOGLE_CREDS_JSON")
+    if env_creds:
+        print("🔐 Using credentials from GOOGLE_CREDS_JSON environment variable...")
+        cred_data = json.loads(env_creds)
+        return service_account.Credentials.from_service_account_info(cred_data, scopes=SCOPES)
+
+    # 2. Fallback to Local Files
+    cred_file = 'Credentials.json' if os.path.exists('Credentials.json') else 'credentials.json'
+    if not os.path.exists(cred_file):
+        if os.path.exists('token.json'):
+            return UserCredentials.from_authorized_user_file('token.json', SCOPES)
+        raise FileNotFoundError("Credentials.json not found.")
+
+
+# ─────────────────────────────────────────────
+# Report tabs (pure: bucket data in, sheet rows out)
+# ─────────────────────────────────────────────
+
+def dashboard_rows(totals, retainer_fee, now):
+    """Executive Dashboard tab from the last-7-days ``ReportState.totals``."""
+    total_calls = totals["calls"]
+    total_booked = totals["booked"]
+    total_recovered = totals["recovered"]
+    total_revenue = totals["revenue"]
+
+    # Calculate METRICS
+    booking_rate = (total_booked / total_calls * 100) if total_calls > 0 else 0
+    weekly_cost = retainer_fee / 4 # Rough weekly estimate
+    roi = (total_revenue / weekly_cost) if weekly_cost > 0 else 0
+
+    # Format: Stat Name | Value | Description
+    return [
+        ["EXECUTIVE REVENUE DASHBOARD", "", f"Report Generated: {now.strftime('%Y-%m-%d')}"],
+        ["", "", ""],
+        ["KEY PERFORMANCE INDICATORS (Last 7 Days)", "", ""],
+        ["---------------------------------", "", ""],
+        ["Total Calls Handled", total_calls, "Every inbound lead processed by AI"],
+        ["Total Jobs Booked", total_booked, "Appointments added to schedule"],
+        ["Missed Call Recoveries", total_recovered, "Leads saved via SMS recovery"],
+        ["AI Booking Rate", f"{booking_rate:.1f}%", "Efficiency of the AI voice agent"],
+        ["", "", ""],
+        ["FINANCIAL IMPACT", "", ""],
+        ["---------------------------------", "", ""],
+        ["Est. Attributed Revenue", f"${total_revenue:,.2f}", "Gross value of AI-booked jobs"],
+        ["Weekly Operating Cost", f"${weekly_cost:,.2f}", "Prorated retainer fee"],
+        ["Weekly ROI Multiplier", f"{roi:.2f}x", "Return on investment this week"],
+        ["", "", ""],
+        ["Recommended Action", "Scale Ad Spend" if roi > 5 else "Optimize Prompt", "AI-driven growth suggestion"]
+    ]
+
+
+def trend_rows(buckets, now):
+    """Revenue Trends tab: one table per period (oldest first), then this month by category."""
+    cols = LogColumns.from_buckets(buckets)
+    views = dashboard(cols, TREND_PERIODS, until_day=now.strftime("%Y-%m-%d"))
+    header = ["Period", "Calls", "Booked", "Recovered", "Booking Rate", "Recovery Rate", "Est. Revenue"]
+    rows = [["REVENUE TRENDS", "", "", "", "", "", f"Report Generated: {now.strftime('%Y-%m-%d')}"]]
+    for period, title in (("day", "DAILY"), ("week", "WEEKLY"), ("month", "MONTHLY")):
+        summary = views[period]
+        t = summary.totals()
+        rows += [[""] * 7, [f"{title} (Last {TREND_PERIODS[period]})"] + [""] * 6, header]
+        for i, label in enumerate(summary.labels):
+            rows.append([label, int(t["calls"][i]), int(t["booked"][i]), int(t["recovered"][i]),
+                         f"{t['booking_rate'][i]:.1f}%", f"{t['recovery_rate'][i]:.1f}%",
+                         f"${t['revenue'][i]:,.2f}"])
+
+    rows += [[""] * 7, ["THIS MONTH BY CATEGORY"] + [""] * 6,
+             ["Category"] + header[1:]]
+    for category, calls, booked, recovered, revenue, rate in views["month"].by_category():
+        rows.append([category, calls, booked, recovered, f"{rate:.1f}%",
+                     f"{recovered / calls * 100:.1f}%", f"${revenue:,.2f}"])
+    return rows
+
+
+def build_report(totals, buckets, retainer_fee, now):
+    """Every dashboard tab for one client, keyed by tab name. Safe to run in a worker process."""
+    return {
+        "Executive Dashboard": dashboard_rows(totals, retainer_fee, now),
+        "Revenue Trends": trend_rows(buckets, now),
+    }
+
 
 class RevenueReporter:
-    def __init__(self):
-        self.creds = self._authenticate()
-        self.service = build('sheets', 'v4', credentials=self.creds)
-        self.spreadsheet_id = os.getenv('GOOGLE_SHEETS_ID')
-        self.retainer_fee = 2000 # Default Tier 1 Retainer
-
-    def _authenticate(self):
-        # 1. Try Environment Variable (For Railway/Cloud)
-        env_creds = os.getenv("GOOGLE_CREDS_JSON")
-        if env_creds:
-            print("🔐 Using credentials from GOOGLE_CREDS_JSON environment variable...")
-            cred_data = json.loads(env_creds)
-            return service_account.Credentials.from_service_account_info(cred_data, scopes=SCOPES)
-
-        # 2. Fallback to Local Files
-        cred_file = 'Credentials.json' if os.path.exists('Credentials.json') else 'credentials.json'
-        if not os.path.exists(cred_file):
-            if os.path.exists('token.json'):
-                return UserCredentials.from_authorized_user_file('token.json', SCOPES)
-            raise FileNotFoundError("Credentials.json not found.")
-
-    def run_weekly_report(self):
+    """
+    Weekly revenue report for one client spreadsheet. Defaults come from the
+    environment (GOOGLE_SHEETS_ID, the active client's fees); the batch runner
+    passes each client's own values plus a shared service and state.
+    """
+
+    def __init__(self, spreadsheet_id=None, retainer_fee=None, service=None, state=None, name=""):
+        if service is None:
+            self.creds = authenticate()
+            service = build('sheets', 'v4', credentials=self.creds)
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id or os.getenv('GOOGLE_SHEETS_ID')
+        if retainer_fee is None:
+            retainer_fee = get_active_config().get("fees", {}).get("retainer", 2000) # Default Tier 1 Retainer
+        self.retainer_fee = retainer_fee
+        self.state = state or ReportState()
+        self.log_prefix = f"[{name}] " if name else ""
+
+    def _read_new_rows(self, http=None):
         """
-        Reads raw logs, aggregates data, and updates the Executive Dashboard.
+        Reads only the log rows appended since the last run (from the cursor in
+        ReportState). Returns (tab, first_row, rows), or (None, None, []) if no log tab was found.
         """
-        print("📊 Generating Weekly Revenue Report...")
-        
-        # 1. Read Raw Data
-        # We try AI Lead Log first, then Sheet1
-        raw_data = None
-        for tab in ['AI Lead Log', 'Sheet1']:
+        tab, last_row = self.state.cursor(self.spreadsheet_id)
+        first_row = last_row + 1
+        # We try AI Lead Log first, then Sheet1 (once found, the tab is remembered)
+        for candidate in ([tab] if tab else ['AI Lead Log', 'Sheet1']):
             try:
                 result = self.service.spreadsheets().values().get(
                     spreadsheetId=self.spreadsheet_id,
-                    range=f'{tab}!A2:H'
-                ).execute()
-                raw_data = result.get('values', [])
-                if raw_data:
-                    print(f"✅ Found {len(raw_data)} rows in '{tab}'")
-                    break
-            except:
+                    range=f'{candidate}!A{first_row}:H'
+                ).execute(http=http)
+            except Exception:
                 continue
+            rows = result.get('values', [])
+            if rows or tab:
+                return candidate, first_row, rows
+        return None, None, []
+
+    def ingest(self, rebuild=False, http=None):
+        """Folds log rows appended since the last run into the daily buckets. False if no log tab was found."""
+        if rebuild:
+            self.state.reset(self.spreadsheet_id)
+            print(f"{self.log_prefix}♻️  Rebuilding aggregates from the full log")
+
+        tab, first_row, new_rows = self._read_new_rows(http)
+        if tab is None:
+            print(f"{self.log_prefix}❌ No data found to report on.")
+            return False
+        if new_rows:
+            used = self.state.apply(self.spreadsheet_id, tab, new_rows, first_row)
+            print(f"{self.log_prefix}✅ Aggregated {used} new rows from '{tab}' (rows {first_row}-{first_row + len(new_rows) - 1})")
+        else:
+            print(f"{self.log_prefix}✅ No new rows in '{tab}' since last run")
+        return True
+
+    def report_inputs(self, now):
+        """(last-7-days totals, all buckets) — everything ``build_report`` needs besides the fee."""
+        since_day = (now - timedelta(days=6)).strftime("%Y-%m-%d")
+        return self.state.totals(self.spreadsheet_id, since_day), self.state.buckets(self.spreadsheet_id)
+
+    def run_weekly_report(self, rebuild=False):
+        """
+        Folds new log rows into the daily buckets, then updates the Executive
+        Dashboard from the last 7 days of buckets (today and the 6 days before)
+        and the Revenue Trends tab from all of them.
+        """
+        print("📊 Generating Weekly Revenue Report...")
 
-        if not raw_data:
-            print("❌ No data found to report on.")
+        # 1. Read only rows appended since the last run
+        if not self.ingest(rebuild):
             return
 
-        # 2. Filter & Aggregate (Last 7 Days)
+        # 2. Build every tab from the pre-aggregated buckets
         now = datetime.now()
-        one_week_ago = now - timedelta(days=7)
-        
-        total_calls = 0
-        total_booked = 0
-        total_recovered = 0
-        total_revenue = 0
-
-        for row in raw_data:
-            try:
-                # row[0] is Timestamp: "2026-02-16 10:51:29"
-                ts = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
-                if ts >= one_week_ago:
-                    total_calls += 1
-                    status = row[6].lower()
-                    if "booked" in status:
-                        total_booked += 1
-                    if "recovered" in status:
-                        total_recovered += 1
-                    
-                    rev = float(row[7]) if row[7] else 0
-                    total_revenue += rev
-            except Exception as e:
-                # print(f"Skipping row: {e}")
-                continue
+        totals, buckets = self.report_inputs(now)
+
+        # 3. Write to Sheet (Executive Dashboard + Revenue Trends)
+        self.write_tabs(build_report(totals, buckets, self.retainer_fee, now))
 
-        # 3. Calculate METRICS
-        booking_rate = (total_booked / total_calls * 100) if total_calls > 0 else 0
-        weekly_cost = self.retainer_fee / 4 # Rough weekly estimate
-        roi = (total_revenue / weekly_cost) if weekly_cost > 0 else 0
-
-        # 4. Prepare Dashboard Data
-        # Format: Stat Name | Value | Description
-        dashboard_rows = [
-            ["EXECUTIVE REVENUE DASHBOARD", "", f"Report Generated: {now.strftime('%Y-%m-%d')}"],
-            ["", "", ""],
-            ["KEY PERFORMANCE INDICATORS (Last 7 Days)", "", ""],
-            ["---------------------------------", "", ""],
-            ["Total Calls Handled", total_calls, "Every inbound lead processed by AI"],
-            ["Total Jobs Booked", total_booked, "Appointments added to schedule"],
-            ["Missed Call Recoveries", total_recovered, "Leads saved via SMS recovery"],
-            ["AI Booking Rate", f"{booking_rate:.1f}%", "Efficiency of the AI voice agent"],
-            ["", "", ""],
-            ["FINANCIAL IMPACT", "", ""],
-            ["---------------------------------", "", ""],
-            ["Est. Attributed Revenue", f"${total_revenue:,.2f}", "Gross value of AI-booked jobs"],
-            ["Weekly Operating Cost", f"${weekly_cost:,.2f}", "Prorated retainer fee"],
-            ["Weekly ROI Multiplier", f"{roi:.2f}x", "Return on investment this week"],
-            ["", "", ""],
-            ["Recommended Action", "Scale Ad Spend" if roi > 5 else "Optimize Prompt", "AI-driven growth suggestion"]
-        ]
-
-        # 5. Write to Sheet (Executive Dashboard)
-        self._write_to_dashboard(dashboard_rows)
-
-    def _write_to_dashboard(self, rows):
-        tab_name = "Executive Dashboard"
-        
-        # Check if tab exists, if not create it
+    def write_tabs(self, tabs, http=None):
+        """Writes {tab name: rows}, creating missing tabs first. Four API calls at most, however many tabs."""
+        sheets = self.service.spreadsheets()
+
+        # Check which tabs exist, create the rest in one request
         try:
-            spreadsheet = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
-            sheet_exists = any(s['properties']['title'] == tab_name for s in spreadsheet.get('sheets', []))
-            
-            if not sheet_exists:
+            spreadsheet = sheets.get(spreadsheetId=self.spreadsheet_id, fields='sheets.properties.title').execute(http=http)
+            existing = {s['properties']['title'] for s in spreadsheet.get('sheets', [])}
+            missing = [tab_name for tab_name in tabs if tab_name not in existing]
+            if missing:
                 batch_update_request = {
-                    'requests': [{'addSheet': {'properties': {'title': tab_name}}}]
+                    'requests': [{'addSheet': {'properties': {'title': tab_name}}} for tab_name in missing]
                 }
-                self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=batch_update_request).execute()
-                print(f"✨ Created new tab: {tab_name}")
+                sheets.batchUpdate(spreadsheetId=self.spreadsheet_id, body=batch_update_request).execute(http=http)
+                print(f"{self.log_prefix}✨ Created new tab(s): {', '.join(missing)}")
         except Exception as e:
-            print(f"Note on tab creation: {e}")
+            print(f"{self.log_prefix}Note on tab creation: {e}")
 
         # Clear and Write
         try:
-            self.service.spreadsheets().values().clear(spreadsheetId=self.spreadsheet_id, range=f"{tab_name}!A1:Z100").execute()
-            
-            body = {'values': rows}
-            self.service.spreadsheets().values().update(
+            sheets.values().batchClear(
+                spreadsheetId=self.spreadsheet_id,
+                body={'ranges': [f"{tab_name}!A:Z" for tab_name in tabs]}
+            ).execute(http=http)
+            sheets.values().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
-                range=f"{tab_name}!A1",
-                valueInputOption="USER_ENTERED",
-                body=body
-            ).execute()
-            print(f"✅ Dashboard updated: https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}")
+                body={
+                    'valueInputOption': 'USER_ENTERED',
+                    'data': [{'range': f"{tab_name}!A1", 'values': rows} for tab_name, rows in tabs.items()],
+                }
+            ).execute(http=http)
+            print(f"{self.log_prefix}✅ Dashboard updated: https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}")
+            return True
         except Exception as e:
-            print(f"❌ Error updating dashboard: {e}")
+            print(f"{self.log_prefix}❌ Error updating dashboard: {e}")
+            return False
 
 if __name__ == "__main__":
+    # Run from the repo root: python -m automation.reporting.reporter [--rebuild]
+    # Every client at once: python -m automation.reporting.batch_report
+    parser = argparse.ArgumentParser(description="Update the Executive Dashboard from the lead log.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Re-aggregate the whole log (picks up rows edited after they were first reported)")
+    args = parser.parse_args()
+
     reporter = RevenueReporter()
-    reporter.run_weekly_report()
+    reporter.run_weekly_report(rebuild=args.rebuild)
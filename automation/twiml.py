@@ -0,0 +1,95 @@
+"""
+AI Revenue Desk — TwiML Rendering
+=================================
+Pre-rendered TwiML responses for the live call-answer path.
+
+Every millisecond spent in /voice/incoming and /voice/dial-result is ring
+time for the caller, so the TwiML is rendered once per distinct input
+— (base_url) for incoming calls, (status, to_number) for dial results — and
+the encoded XML bytes are reused for every later request with the same
+inputs. Each request still gets its own ``Response`` around those bytes, so
+a header or cookie set on one response never leaks into another.
+Environment lookups happen once at import.
+"""
+
+import os
+from functools import lru_cache
+from urllib.parse import parse_qsl
+from xml.sax.saxutils import escape, quoteattr
+
+from dotenv import load_dotenv
+from fastapi.responses import Response
+
+load_dotenv()
+
+REAL_MOBILE_NUMBER = os.getenv("REAL_MOBILE_NUMBER", "+17176780349")
+AI_AGENT_INBOUND_URL = os.getenv("AI_AGENT_INBOUND_URL")
+RING_TIMEOUT_SECONDS = 6
+
+# Dial outcomes that hand the caller to the Retell AI agent
+AI_FALLBACK_STATUSES = frozenset({"no-answer", "busy", "failed", "canceled"})
+
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>'
+
+
+def _twiml(body: bytes) -> Response:
+    return Response(content=body, media_type="text/xml")
+
+
+EMPTY_TWIML = f"{_XML_HEADER}<Response></Response>".encode("utf-8")
+
+
+def public_base_url(raw_base_url: str) -> str:
+    """Railway terminates TLS at its proxy, so the app sees http:// — Twilio must call back on https://."""
+    base_url = raw_base_url.rstrip("/")
+    if "up.railway.app" in base_url and base_url.startswith("http://"):
+        base_url = base_url.replace("http://", "https://")
+    return base_url
+
+
+@lru_cache(maxsize=64)
+def _incoming_twiml(base_url: str) -> bytes:
+    action_url = f"{base_url}/voice/dial-result"
+    return f"""{_XML_HEADER}
+<Response>
+  <Dial timeout="{RING_TIMEOUT_SECONDS}" answerOnBridge="true" action={quoteattr(action_url)} method="POST">
+    <Number>{escape(REAL_MOBILE_NUMBER)}</Number>
+  </Dial>
+</Response>""".encode("utf-8")
+
+
+def incoming_response(base_url: str) -> Response:
+    """Rings the real phone; Twilio posts the outcome to {base_url}/voice/dial-result."""
+    return _twiml(_incoming_twiml(base_url))
+
+
+@lru_cache(maxsize=256)
+def _sip_twiml(to_number: str) -> bytes:
+    # Create the Retell SIP routing URI dynamically using the number Retell knows about
+    ai_sip_uri = AI_AGENT_INBOUND_URL or f"sip:{to_number}@sip.retellai.com;transport=tcp"
+    return f"""{_XML_HEADER}
+<Response>
+  <Dial>
+    <Sip>{escape(ai_sip_uri)}</Sip>
+  </Dial>
+</Response>""".encode("utf-8")
+
+
+def dial_result_response(status: str, to_number: str) -> Response:
+    """
+    Empty TwiML if the real phone answered (or for unknown statuses);
+    otherwise route the caller to the Retell AI agent over SIP.
+    """
+    if status not in AI_FALLBACK_STATUSES:
+        return _twiml(EMPTY_TWIML)
+    # With a fixed AI_AGENT_INBOUND_URL the dialled number doesn't matter — share one cache entry
+    return _twiml(_sip_twiml("" if AI_AGENT_INBOUND_URL else (to_number.replace("+", "") or "unknown")))
+
+
+def parse_status_callback(body: bytes) -> dict:
+    """
+    Parses a Twilio status callback body. Twilio always posts
+    application/x-www-form-urlencoded, so the stdlib parser is enough and
+    skips Starlette's multipart-capable form machinery on the hot path.
+    """
+    return dict(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
@@ -17,7 +17,7 @@ def validate_address(address_string):
     url = f"https://maps.googleapis.com/maps/api/geocode/json?address={address_string}&key={api_key}"
     
     try:
-        response = requests.get(url).json()
+        response = requests.get(url, timeout=10).json()
         if response["status"] == "OK":
             result = response["results"][0]
             # Check if it's a precise address (not just a city or state)
@@ -42,7 +42,7 @@ def send_slack_notification(message):
 
     payload = {"text": message}
     try:
-        response = requests.post(webhook_url, json=payload)
+        response = requests.post(webhook_url, json=payload, timeout=10)
         if response.status_code == 200:
             print("✅ Slack notification sent successfully!")
         else:
@@ -1,5 +1,12 @@
 import os
+import re
 import sys
+import time
+import uuid
+import atexit
+import threading
+import weakref
+from pathlib import Path
 from datetime import datetime
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials as UserCredentials
@@ -7,17 +14,92 @@ from googleapiclient.discovery import build
 from dotenv import load_dotenv
 import json
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 load_dotenv()
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+# Buffered writes: one values().append per flush instead of one per call (Sheets write quota is per request)
+SHEETS_FLUSH_ROWS = int(os.getenv('SHEETS_FLUSH_ROWS', '25'))
+SHEETS_FLUSH_SECONDS = float(os.getenv('SHEETS_FLUSH_SECONDS', '30'))
+SHEETS_SPOOL_PATH = os.getenv('SHEETS_SPOOL_PATH', '.tmp/sheets_spool.jsonl')
+
+# Try 'AI Lead Log' first, fallback to 'Sheet1'
+POSSIBLE_RANGES = ['AI Lead Log!A2', 'Sheet1!A2']
+
+def _spool_in_use(spool_path, pid):
+    """
+    True while the logger that owns ``spool_path`` is alive. Each logger holds
+    an exclusive flock on ``{spool_path}.lock`` for its lifetime and the kernel
+    drops it when the process exits, so a spool whose lock can be taken belongs
+    to a dead logger. This still works after a container restart reuses the PID.
+    """
+    if fcntl is None:
+        return _pid_alive(pid)
+    try:
+        f = open(spool_path + '.lock', 'a')
+    except FileNotFoundError:
+        return False
+    with f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+    return False
+
+
+def _pid_alive(pid):
+    """Fallback liveness check where flock is unavailable."""
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        return True  # os.kill would terminate the process on Windows; never treat another PID as dead
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
 class RevenueDeskLogger:
-    def __init__(self):
+    # spreadsheet_id -> range that accepted the last append (shared by every logger in the process)
+    _resolved_ranges = {}
+    # Every open logger, closed once at interpreter exit
+    _instances = weakref.WeakSet()
+
+    def __init__(self, flush_rows=SHEETS_FLUSH_ROWS, flush_seconds=SHEETS_FLUSH_SECONDS, spool_path=SHEETS_SPOOL_PATH):
         self.creds = self._authenticate()
         # discovery_service_local=True avoids the background network call that causes SegFaults in some environments
         self.service = build('sheets', 'v4', credentials=self.creds, static_discovery=True)
         self.spreadsheet_id = os.getenv('GOOGLE_SHEETS_ID')
 
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        # Each logger appends to its own spool ({spool_path}.{pid}.{token}); the configured
+        # path is only read at startup, together with spools left behind by exited processes
+        self.shared_spool_path = spool_path
+        self.spool_path = f"{spool_path}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._spool_lock = self._hold_spool_lock()
+
+        # Rows accepted but not yet written to Sheets survive restarts via the spool file
+        self._buffer = self._claim_spools()
+        if self._buffer:
+            print(f"♻️  Recovered {len(self._buffer)} unflushed Sheets row(s) into {self.spool_path}")
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="sheets-flusher", daemon=True)
+        self._flusher.start()
+        self._instances.add(self)
+
     def _authenticate(self):
         # 1. Try Environment Variable (For Railway/Cloud)
         env_creds = os.getenv("GOOGLE_CREDS_JSON")
@@ -33,9 +115,95 @@ class RevenueDeskLogger:
                 return UserCredentials.from_authorized_user_file('token.json', SCOPES)
             raise FileNotFoundError("Credentials.json or token.json not found. Please authenticate.")
 
+    # ─────────────────────────────────────────────
+    # Local spool (crash safety for buffered rows)
+    # ─────────────────────────────────────────────
+
+    def _hold_spool_lock(self):
+        """Takes the lock that marks this logger's spool as in use (see ``_spool_in_use``)."""
+        if fcntl is None:
+            return None
+        os.makedirs(os.path.dirname(self.spool_path) or '.', exist_ok=True)
+        f = open(self.spool_path + '.lock', 'a')
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def _orphaned_spools(self):
+        """The shared spool path plus per-logger spools whose logger is gone."""
+        shared = Path(self.shared_spool_path)
+        pattern = re.compile(re.escape(shared.name) + r'(\.(\d+)\.[0-9a-f]+)(\.claim\d+)?$')
+        orphans = [shared]
+        if shared.parent.is_dir():
+            for path in sorted(shared.parent.iterdir()):
+                match = pattern.match(path.name)
+                if match and not _spool_in_use(str(shared) + match.group(1), int(match.group(2))):
+                    orphans.append(path)
+        return orphans
+
+    def _claim_spools(self):
+        """
+        Takes over every orphaned spool and returns its rows. Each file is first
+        renamed to a claim name of our own: the rename is atomic, so when several
+        loggers (or uvicorn workers) start together only one of them gets each row.
+        """
+        claim_path = self.spool_path + '.claim'
+        rows, claimed = [], []
+        for n, path in enumerate(self._orphaned_spools()):
+            claim = f"{claim_path}{n}"
+            try:
+                os.rename(path, claim)
+            except FileNotFoundError:
+                continue  # Claimed by another logger first
+            rows.extend(self._load_spool(claim))
+            claimed.append(claim)
+            if path.name != Path(self.shared_spool_path).name:
+                # The dead logger's lock file (the .claimN suffix is ours, not part of its name)
+                owner = re.sub(r'\.claim\d+$', '', str(path))
+                try:
+                    os.remove(owner + '.lock')
+                except FileNotFoundError:
+                    pass
+        if rows:
+            os.makedirs(os.path.dirname(self.spool_path) or '.', exist_ok=True)
+            self._spool_rewrite(rows)
+        for claim in claimed:
+            os.remove(claim)
+        return rows
+
+    def _load_spool(self, path):
+        rows = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Partially written last line from a crash
+        return rows
+
+    def _spool_append(self, row):
+        os.makedirs(os.path.dirname(self.spool_path) or '.', exist_ok=True)
+        with open(self.spool_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(row) + "\n")
+
+    def _spool_rewrite(self, rows):
+        tmp_path = self.spool_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        os.replace(tmp_path, self.spool_path)
+
+    # ─────────────────────────────────────────────
+    # Logging
+    # ─────────────────────────────────────────────
+
     def log_call(self, data):
         """
-        Appends a row to the 'AI Lead Log' sheet (falls back to Sheet1).
+        Buffers a row for the 'AI Lead Log' sheet (falls back to Sheet1).
+        Rows are written in one append once SHEETS_FLUSH_ROWS are buffered or
+        SHEETS_FLUSH_SECONDS have passed, whichever comes first.
         Data keys: [Call ID, Name, Phone, Address, Issue, Status, Est Revenue]
         """
         if not self.spreadsheet_id:
@@ -55,12 +223,42 @@ class RevenueDeskLogger:
             data.get('est_revenue', 0)
         ]
 
-        # Try 'AI Lead Log' first, fallback to 'Sheet1'
-        possible_ranges = ['AI Lead Log!A2', 'Sheet1!A2']
-        
-        for range_name in possible_ranges:
+        with self._lock:
+            self._buffer.append(row)
+            self._spool_append(row)
+            due = len(self._buffer) >= self.flush_rows
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Writes every buffered row in a single append. Rows stay buffered (and spooled) on failure."""
+        if not self.spreadsheet_id:
+            return
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+            self._last_flush = time.monotonic()
+            if not rows:
+                return
+
+            range_name = self._append_rows(rows)
+            if not range_name:
+                return
+
+            with self._lock:
+                # Rows logged while the request was in flight stay for the next flush
+                del self._buffer[:len(rows)]
+                self._spool_rewrite(self._buffer)
+
+    def _append_rows(self, rows):
+        """Appends ``rows`` to the cached tab, resolving it on first use. Returns the range used or None."""
+        cached = self._resolved_ranges.get(self.spreadsheet_id)
+        candidates = [cached] if cached else POSSIBLE_RANGES
+
+        for range_name in candidates:
             try:
-                body = {'values': [row]}
+                body = {'values': rows}
                 result = self.service.spreadsheets().values().append(
                     spreadsheetId=self.spreadsheet_id,
                     range=range_name,
@@ -68,12 +266,46 @@ class RevenueDeskLogger:
                     insertDataOption='INSERT_ROWS',
                     body=body
                 ).execute()
-                print(f"✅ Logged to Sheets ({range_name.split('!')[0]}): {result.get('updates').get('updatedRange')}")
-                return
+                self._resolved_ranges[self.spreadsheet_id] = range_name
+                print(f"✅ Logged {len(rows)} row(s) to Sheets ({range_name.split('!')[0]}): {result.get('updates').get('updatedRange')}")
+                return range_name
             except Exception as e:
-                if "Unable to parse range" in str(e) and range_name != possible_ranges[-1]:
-                    continue # Try next range
+                if "Unable to parse range" in str(e):
+                    if range_name == cached:
+                        # Tab was renamed/deleted since we cached it — resolve again next flush
+                        self._resolved_ranges.pop(self.spreadsheet_id, None)
+                    elif range_name != candidates[-1]:
+                        continue # Try next range
                 print(f"❌ Error logging to Sheets: {e}")
+                return None
+        return None
+
+    def _flush_loop(self):
+        while not self._stop.wait(min(self.flush_seconds, 5)):
+            if self._buffer and time.monotonic() - self._last_flush >= self.flush_seconds:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"❌ Background Sheets flush failed: {e}")
+
+    def close(self):
+        """Stops the background flusher and writes anything still buffered."""
+        self._stop.set()
+        self.flush()
+        with self._lock:
+            if not self._buffer and os.path.exists(self.spool_path):
+                # Anything left unflushed stays spooled for the next process to claim
+                os.remove(self.spool_path)
+            if self._spool_lock is not None:
+                os.remove(self._spool_lock.name)
+                self._spool_lock.close()
+                self._spool_lock = None
+
+
+@atexit.register
+def _close_all_loggers():
+    for logger in list(RevenueDeskLogger._instances):
+        logger.close()
 
 if __name__ == "__main__":
     # Test
@@ -88,3 +320,4 @@ if __name__ == "__main__":
         "est_revenue": 150
     }
     logger.log_call(test_data)
+    logger.close()
@@ -1,22 +1,24 @@
 from dotenv import load_dotenv
-from automation.utils import send_slack_notification
+from automation.notifier import slack_notifier
 from automation.ghl_client import log_missed_call
 
 load_dotenv()
 
 
-def handle_missed_call(customer_phone):
+async def handle_missed_call(customer_phone, completed=None):
     """
     Triggered by Twilio StatusCallback when a call is missed/busy/no-answer.
     Creates contact in GHL and sends recovery SMS via GHL API.
+    Raises if GHL or Twilio fails so the job queue retries; ``completed``
+    (kept in the job payload) records what a previous attempt already did.
     """
     print(f"--- Missed Call from {customer_phone} ---")
 
     # 1. GHL: create contact + send recovery SMS
-    log_missed_call(customer_phone)
+    await log_missed_call(customer_phone, completed)
 
     # 2. Notify team on Slack
-    send_slack_notification(
+    slack_notifier.notify(
         f"💥 *Missed Call*\n"
         f"📞 {customer_phone}\n"
         f"GHL contact created and recovery SMS sent."
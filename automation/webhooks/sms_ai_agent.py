@@ -1,9 +1,23 @@
 import os
-from openai import OpenAI
+import asyncio
+import re
+import time
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from automation.limits import downstream
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+SMS_MODEL = "gpt-4o-mini"
+# Seconds from inbound SMS to having a reply ready; past this we send what we have or the canned fallback
+SMS_LATENCY_BUDGET = float(os.getenv("SMS_LATENCY_BUDGET_SECONDS", "6"))
+FALLBACK_SMS = "Sorry, I'm having a little trouble right now. Our team will get back to you as soon as possible — PA Digital Growth."
+
+# A streamed partial reply is only usable if it ends on a full sentence
+_SENTENCE_END = re.compile(r"[.!?](?=\s|$)")
+_MIN_PARTIAL_CHARS = 20
 
 # Load client-specific SMS prompt if available, otherwise use PA Digital Growth default
 _slug = os.getenv("CLIENT_SLUG")
@@ -38,28 +52,80 @@ Goal: Understand what they need, keep the conversation warm, and get them to a p
 """
 
 
-def get_ai_sms_response(_customer_phone, message_body, history=None):
-    """
-    Generates an AI SMS response for an inbound text message.
-    """
-    if history is None:
-        history = []
-
+def _build_messages(message_body, history=None):
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for h in history:
+    for h in history or []:
         messages.append(h)
     messages.append({"role": "user", "content": message_body})
+    return messages
+
+
+def _usable_partial(text: str):
+    """Trims a cut-off streamed reply back to its last complete sentence, or None if too short."""
+    last = None
+    for m in _SENTENCE_END.finditer(text):
+        last = m
+    if not last:
+        return None
+    trimmed = text[:last.end()].strip()
+    return trimmed if len(trimmed) >= _MIN_PARTIAL_CHARS else None
 
+
+def get_ai_sms_response(_customer_phone, message_body, history=None):
+    """
+    Generates an AI SMS response for an inbound text message.
+    Blocking — used by scripts; the webhook uses get_ai_sms_response_async.
+    """
     try:
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
+            model=SMS_MODEL,
+            messages=_build_messages(message_body, history),
             max_tokens=150
         )
         return response.choices[0].message.content
     except Exception as e:
         print(f"AI Error: {e}")
-        return "Sorry, I'm having a little trouble right now. Our team will get back to you as soon as possible — PA Digital Growth."
+        return FALLBACK_SMS
+
+
+async def get_ai_sms_response_async(_customer_phone, message_body, history=None, budget=None):
+    """
+    Async, streamed version of get_ai_sms_response with a hard latency budget.
+    If the budget runs out mid-stream, the reply is cut back to its last full
+    sentence; if nothing usable arrived in time, FALLBACK_SMS is returned.
+    """
+    budget = SMS_LATENCY_BUDGET if budget is None else budget
+    started = time.perf_counter()
+    chunks = []
+    stream = None
+    try:
+        async with asyncio.timeout(max(budget, 0)):
+            async with downstream("openai"):
+                stream = await async_client.chat.completions.create(
+                    model=SMS_MODEL,
+                    messages=_build_messages(message_body, history),
+                    max_tokens=150,
+                    stream=True,
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        chunks.append(chunk.choices[0].delta.content)
+        return "".join(chunks).strip() or FALLBACK_SMS
+    except TimeoutError:
+        partial = _usable_partial("".join(chunks))
+        print(f"⏱️  SMS AI exceeded {budget:.2f}s budget — "
+              f"{'sending partial reply' if partial else 'sending fallback'}.")
+        return partial or FALLBACK_SMS
+    except Exception as e:
+        print(f"AI Error: {e}")
+        return FALLBACK_SMS
+    finally:
+        if stream is not None:
+            try:
+                await stream.close()
+            except Exception:
+                pass
+        print(f"💬 SMS AI reply ready in {(time.perf_counter() - started) * 1000:.0f}ms")
 
 
 if __name__ == "__main__":
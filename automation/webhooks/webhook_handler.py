@@ -1,91 +1,165 @@
 import os
 import json
+import asyncio
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from automation.utils import send_slack_notification
-from automation.ghl_client import log_call_lead
+from automation.notifier import slack_notifier
+from automation.ghl_client import GHLRequestError, lead_steps
+from automation.lead_pipeline import Step, run_steps
+from automation.extraction_cache import extraction_cache, cache_key
+from automation.limits import downstream
 from openai import OpenAI
 
 openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+EXTRACTION_MODEL = "gpt-4o-mini"
+# Bump whenever EXTRACTION_FIELDS or the prompt template wording changes — invalidates cached extractions
+EXTRACTION_PROMPT_VERSION = "2"
 
-def extract_from_transcript(transcript):
-    """
-    AI fallback extraction using GPT-4o-mini when Retell's structured data is missing.
-    Tailored for PA Digital Growth's full service offering.
-    """
-    if not transcript:
-        return {}
 
-    print("🤖 Triggering AI Data Extraction from Transcript...")
+# Fields the transcript fallback can fill, in prompt order: key -> instruction line
+EXTRACTION_FIELDS = {
+    "name": "Customer Full Name",
+    "email": "Email Address",
+    "phone": "Phone Number (if mentioned verbally — not the caller ID)",
+    "company": "Company Name (if mentioned)",
+    "category": (
+        "Category — MUST be exactly one of:\n"
+        "   AI Agents & Automation | AI Consulting | AI Training | AI Services | SEO | Web Design | Social Media | General Enquiry | Job Application | Spam/Sales"
+    ),
+    "budget": 'Budget — any budget figure or range mentioned (e.g. "around £2k a month", "£500"). Use "Not disclosed" if not mentioned.',
+    "is_spam": "Is Spam/Sales Call? (Boolean: True if job seeker, solicitor, robocall, or trying to sell something. False if genuine lead.)",
+    "notes": "Qualification Notes & Summary — what do they need, how urgent, any key context",
+    "action_triggered": "Requested Action — one of: capture_lead | notify_sales_hot_lead | book_strategy_call | request_human_takeover | flag_spam_call",
+    "sms_consent": "SMS Consent — did the caller verbally agree to receive a follow-up text message? (Boolean: True if they said yes/agreed, False if they declined or it was never asked.)",
+}
 
-    prompt = f"""
+# Retell must provide all of these for the GPT round trip to be skipped
+REQUIRED_FIELDS = ("name", "email", "category", "budget", "sms_consent")
+
+# How often the transcript fallback was skipped / narrowed / run in full (see /metrics)
+EXTRACTION_STATS = {"skipped": 0, "partial": 0, "full": 0, "no_transcript": 0}
+
+
+def missing_fields(known: dict) -> list:
+    """
+    Returns the EXTRACTION_FIELDS keys the LLM should be asked for, given what
+    Retell already captured. Empty when every REQUIRED_FIELDS value is present.
+    Once a call is going to the LLM anyway, the optional gaps (phone, company,
+    notes, action) and the spam verdict ride along in the same prompt.
+    """
+    def _absent(key):
+        value = known.get(key)
+        if key == "sms_consent":
+            return value is None
+        if key == "action_triggered":
+            return not value or value == "none"
+        return not value
+
+    if not any(_absent(k) for k in REQUIRED_FIELDS):
+        return []
+    return [k for k in EXTRACTION_FIELDS if k == "is_spam" or _absent(k)]
+
+
+def build_extraction_prompt(transcript, fields) -> str:
+    """Builds the extraction prompt asking only for ``fields`` (EXTRACTION_FIELDS keys)."""
+    numbered = "\n".join(f"{i}. {EXTRACTION_FIELDS[k]}" for i, k in enumerate(fields, 1))
+    keys = ", ".join(f'"{k}"' for k in fields)
+    return f"""
 You are a data extraction assistant for PA Digital Growth, a digital agency.
 Extract the following from this call transcript:
 
-1. Customer Full Name
-2. Email Address
-3. Phone Number (if mentioned verbally — not the caller ID)
-4. Company Name (if mentioned)
-5. Category — MUST be exactly one of:
-   AI Agents & Automation | AI Consulting | AI Training | AI Services | SEO | Web Design | Social Media | General Enquiry | Job Application | Spam/Sales
-6. Budget — any budget figure or range mentioned (e.g. "around £2k a month", "£500"). Use "Not disclosed" if not mentioned.
-7. Is Spam/Sales Call? (Boolean: True if job seeker, solicitor, robocall, or trying to sell something. False if genuine lead.)
-8. Qualification Notes & Summary — what do they need, how urgent, any key context
-9. Requested Action — one of: capture_lead | notify_sales_hot_lead | book_strategy_call | request_human_takeover | flag_spam_call
-10. SMS Consent — did the caller verbally agree to receive a follow-up text message? (Boolean: True if they said yes/agreed, False if they declined or it was never asked.)
+{numbered}
 
 Transcript:
 \"\"\"{transcript}\"\"\"
 
 Return ONLY a JSON object with keys:
-"name", "email", "phone", "company", "category", "budget", "is_spam", "notes", "action_triggered", "sms_consent"
+{keys}
 If a field is missing or not mentioned, use null.
 """
 
+
+def extract_from_transcript(transcript, fields=None):
+    """
+    AI fallback extraction using GPT-4o-mini when Retell's structured data is missing.
+    Tailored for PA Digital Growth's full service offering.
+    Pass ``fields`` to ask only for those keys; defaults to every field.
+    """
+    if not transcript:
+        return {}
+
+    fields = list(fields) if fields else list(EXTRACTION_FIELDS)
+    key = cache_key(transcript, EXTRACTION_PROMPT_VERSION, EXTRACTION_MODEL, fields)
+    cached = extraction_cache.get(key)
+    if cached is not None:
+        print("♻️  Transcript extraction served from cache.")
+        return cached
+
+    print(f"🤖 Triggering AI Data Extraction from Transcript ({len(fields)}/{len(EXTRACTION_FIELDS)} fields)...")
+
+    prompt = build_extraction_prompt(transcript, fields)
+
     try:
         response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=EXTRACTION_MODEL,
             messages=[
                 {"role": "system", "content": "Return JSON only. No markdown, no explanation."},
                 {"role": "user", "content": prompt}
             ],
             response_format={"type": "json_object"}
         )
-        return json.loads(response.choices[0].message.content)
+        result = json.loads(response.choices[0].message.content)
+        extraction_cache.put(key, result)
+        return result
     except Exception as e:
         print(f"❌ AI Fallback Error: {e}")
         return {}
 
 
-def process_call_data(call_payload):
+async def process_call_data(call_payload):
     """
     Processes post-call data from Retell AI.
     Extracts enriched lead data and routes it to GoHighLevel (GHL) and Slack.
     """
     try:
-        _process_call_data_inner(call_payload)
+        await _process_call_data_inner(call_payload)
     except Exception as e:
-        call_id = None
-        try:
-            call_obj = call_payload.get("call") if isinstance(call_payload.get("call"), dict) else call_payload
-            call_id = call_obj.get("call_id") or call_payload.get("call_id")
-        except Exception:
-            pass
-        print(f"❌ Fatal error in process_call_data (call_id={call_id}): {e}")
-        from automation.utils import send_slack_notification
-        send_slack_notification(
-            f"🔴 *Webhook Processing Failed*\n"
-            f"Call ID: `{call_id or 'unknown'}`\n"
-            f"Error: `{type(e).__name__}: {e}`\n"
-            f"Action required: Check Railway logs and manually review this call in Retell."
-        )
+        await notify_processing_failure(call_payload, f"{type(e).__name__}: {e}")
+
+
+async def process_call_job(call_payload):
+    """
+    Job-queue entry point. Same as process_call_data, but errors propagate so
+    the queue can retry with backoff; notify_processing_failure runs once the
+    job is dead-lettered. Steps that succeeded are recorded in the payload
+    ("_completed_steps"), which the queue saves with the retry, so a retry
+    does not add the note or send the SMS a second time.
+    """
+    await _process_call_data_inner(call_payload, completed=call_payload.setdefault("_completed_steps", {}))
 
 
-def _process_call_data_inner(call_payload):
+async def notify_processing_failure(call_payload, error):
+    """Alerts the team that a call could not be processed (also the job queue's dead-letter hook)."""
+    call_id = None
+    try:
+        call_obj = call_payload.get("call") if isinstance(call_payload.get("call"), dict) else call_payload
+        call_id = call_obj.get("call_id") or call_payload.get("call_id")
+    except Exception:
+        pass
+    print(f"❌ Fatal error in process_call_data (call_id={call_id}): {error}")
+    slack_notifier.notify(
+        f"🔴 *Webhook Processing Failed*\n"
+        f"Call ID: `{call_id or 'unknown'}`\n"
+        f"Error: `{error}`\n"
+        f"Action required: Check Railway logs and manually review this call in Retell."
+    )
+
+
+async def _process_call_data_inner(call_payload, completed=None):
     call_obj = call_payload.get("call") if isinstance(call_payload.get("call"), dict) else call_payload
     call_id = call_obj.get("call_id") or call_payload.get("call_id")
     transcript = call_obj.get("transcript") or call_payload.get("transcript")
@@ -129,9 +203,25 @@ def _process_call_data_inner(call_payload):
     is_spam = analysis.get("is_spam", False)
     sms_consent = analysis.get("sms_consent")
 
-    # AI fallback extraction if Retell didn't capture everything
-    fallback = extract_from_transcript(transcript)
-    if fallback:
+    # AI fallback extraction — only for the fields Retell didn't capture
+    wanted = missing_fields({
+        "name": customer_name, "email": email, "phone": customer_number, "company": company,
+        "category": category, "budget": budget, "notes": notes,
+        "action_triggered": action_triggered, "sms_consent": sms_consent,
+    })
+    fallback = {}
+    if not wanted:
+        EXTRACTION_STATS["skipped"] += 1
+        print("⚡ Retell analysis complete — skipping transcript extraction.")
+    elif not transcript:
+        EXTRACTION_STATS["no_transcript"] += 1
+    else:
+        EXTRACTION_STATS["full" if len(wanted) == len(EXTRACTION_FIELDS) else "partial"] += 1
+        async with downstream("openai"):
+            fallback = await asyncio.to_thread(extract_from_transcript, transcript, wanted)
+
+    # Fill gaps + defaults when the LLM ran, or when Retell was already complete
+    if fallback or not wanted:
         customer_name = customer_name or fallback.get("name") or "Unknown"
         email = email or fallback.get("email") or ""
         company = company or fallback.get("company") or ""
@@ -182,52 +272,55 @@ def _process_call_data_inner(call_payload):
     # Spam — light alert only, skip CRM
     if urgency_level == "spam" or is_spam:
         print("⚠️ Call flagged as SPAM/Sales. Skipping CRM. Sending light Slack alert.")
-        send_slack_notification(
+        slack_notifier.notify(
             f"🚫 *Spam Call Filtered*\n"
             f"📞 {customer_number}  |  Reason: {notes or action_triggered}"
         )
         return
 
-    # 1. Send to GoHighLevel (direct API — create/update contact, note, SMS, pipeline)
-    print("🚀 Pushing lead to GHL via API...")
-    log_call_lead(lead_data)
+    # 1. Slack lead card — built up-front, sent alongside the GHL follow-ups
+    if urgency_level == "high":
+        header = "🔥 *URGENT Lead — PA Digital Growth*"
+        action_line = f"⚡ *Action Required:* URGENT — Call back as soon as possible"
+    else:
+        header = "✅ *New Lead — PA Digital Growth*"
+        action_line = f"📋 *Action:* {action_triggered.replace('_', ' ').title()}"
+
+    budget_display = budget if budget and budget != "Not disclosed" else "_Not disclosed_"
+    company_display = company if company else "_Not provided_"
+    email_display = email if email else "_Not provided_"
+    consent_display = "✅ Consented" if sms_consent else "❌ Declined / Not captured"
+
+    slack_msg = (
+        f"{header}\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━\n"
+        f"👤 *Name:* {lead_data['name']}\n"
+        f"📞 *Phone:* {customer_number}\n"
+        f"📧 *Email:* {email_display}\n"
+        f"🏢 *Company:* {company_display}\n"
+        f"🎯 *Interest:* {lead_data['category']}\n"
+        f"⏱️ *Called:* {call_time_iso}  ({call_duration_seconds}s)\n"
+        f"💰 *Budget:* {budget_display}\n"
+        f"📱 *SMS Consent:* {consent_display}\n"
+        f"💬 *Notes:* {notes}\n"
+        f"{action_line}\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━"
+    )
 
-    # 2. Send rich Slack lead card to the team
-    try:
-        if urgency_level == "high":
-            header = "🔥 *URGENT Lead — PA Digital Growth*"
-            action_line = f"⚡ *Action Required:* URGENT — Call back as soon as possible"
-        else:
-            header = "✅ *New Lead — PA Digital Growth*"
-            action_line = f"📋 *Action:* {action_triggered.replace('_', ' ').title()}"
-
-        budget_display = budget if budget and budget != "Not disclosed" else "_Not disclosed_"
-        company_display = company if company else "_Not provided_"
-        email_display = email if email else "_Not provided_"
-        consent_display = "✅ Consented" if sms_consent else "❌ Declined / Not captured"
-
-        slack_msg = (
-            f"{header}\n"
-            f"━━━━━━━━━━━━━━━━━━━━━━\n"
-            f"👤 *Name:* {lead_data['name']}\n"
-            f"📞 *Phone:* {customer_number}\n"
-            f"📧 *Email:* {email_display}\n"
-            f"🏢 *Company:* {company_display}\n"
-            f"🎯 *Interest:* {lead_data['category']}\n"
-            f"⏱️ *Called:* {call_time_iso}  ({call_duration_seconds}s)\n"
-            f"💰 *Budget:* {budget_display}\n"
-            f"📱 *SMS Consent:* {consent_display}\n"
-            f"💬 *Notes:* {notes}\n"
-            f"{action_line}\n"
-            f"━━━━━━━━━━━━━━━━━━━━━━"
-        )
-        send_slack_notification(slack_msg)
-    except Exception as e:
-        print(f"❌ Error sending Slack Alert: {e}")
+    async def _slack_card(_results):
+        return slack_notifier.notify(slack_msg)
 
+    # 2. Run GHL (contact → note / SMS / pipeline) and the Slack card as one graph.
+    # The card waits for the upsert attempt so the contact exists when the team
+    # looks it up, but — unlike the GHL follow-ups — is still sent if it failed.
+    print("🚀 Pushing lead to GHL via API...")
+    steps = lead_steps(lead_data) + [Step("slack_card", _slack_card, after=("upsert_contact",))]
+    result = await run_steps(steps, label=f"Lead {call_id}", completed=completed)
+    if result.failed:
+        raise GHLRequestError(f"Lead {call_id}: step(s) failed: {', '.join(result.failed)}")
 
 if __name__ == "__main__":
-    process_call_data({
+    asyncio.run(process_call_data({
         "call": {
             "call_id": "test_ghl_001",
             "from_number": "+15550293847",
@@ -240,4 +333,4 @@ if __name__ == "__main__":
                 "Would love to speak to someone this week if possible."
             ),
         }
-    })
+    }))
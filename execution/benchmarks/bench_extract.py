@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark: contact extraction, BeautifulSoup + regex vs the single-pass extractor.
+
+Runs the previous extraction (email regex over the raw HTML, a full
+BeautifulSoup tree for the links, per-link social regexes, a second tree for
+contact-page ranking) and ``html_extract.extract_page`` over the same saved
+pages, checks that they agree and prints per-page timings.
+
+Usage:
+    python execution/benchmarks/bench_extract.py --corpus .tmp/pages [--repeat 5]
+
+The corpus is any directory of saved ``*.html`` pages (e.g. ``curl -o`` of a
+few lead websites). Without ``--corpus`` a synthetic set of pages is used.
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402  (legacy path only)
+
+from enrich_leads import CONTACT_PAGE_HINTS, LeadEnricher  # noqa: E402
+from html_extract import extract_page, pick_email  # noqa: E402
+
+
+BASE_URL = 'https://www.example-hvac.com/'
+
+
+# ─────────────────────────────────────────────
+# Previous implementation (kept verbatim for comparison)
+# ─────────────────────────────────────────────
+
+class LegacyExtractor:
+    def extract_emails(self, html, url):
+        """Extract email addresses from HTML content."""
+        emails = set()
+        
+        # Email regex pattern
+        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        
+        # Find all emails in HTML
+        found_emails = re.findall(email_pattern, html)
+        
+        # Filter out common generic emails and images
+        generic_prefixes = ['info', 'support', 'hello', 'contact', 'admin', 'webmaster', 
+                           'noreply', 'no-reply', 'sales', 'marketing']
+        
+        for email in found_emails:
+            email_lower = email.lower()
+            
+            # Skip image files and generic emails
+            if email_lower.endswith(('.png', '.jpg', '.gif', '.jpeg')):
+                continue
+            
+            prefix = email_lower.split('@')[0]
+            
+            # Prefer specific emails over generic ones
+            if not any(gen in prefix for gen in generic_prefixes):
+                emails.add(email)
+        
+        # If no specific emails found, use generic ones
+        if not emails:
+            for email in found_emails:
+                if not email.lower().endswith(('.png', '.jpg', '.gif', '.jpeg')):
+                    emails.add(email)
+                    break
+        
+        return list(emails)[:1]  # Return first email only
+    
+    def extract_social_media(self, html, base_url):
+        """Extract social media handles from HTML content."""
+        social = {
+            'facebook': None,
+            'instagram': None,
+            'tiktok': None,
+            'linkedin': None,
+            'twitter': None
+        }
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Find all links
+        links = soup.find_all('a', href=True)
+        
+        for link in links:
+            href = link['href'].lower()
+            
+            # Facebook
+            if 'facebook.com' in href or 'fb.com' in href or 'fb.me' in href:
+                handle = re.search(r'(?:facebook\.com|fb\.com|fb\.me)/([^/?]+)', href)
+                if handle and not social['facebook']:
+                    social['facebook'] = f"facebook.com/{handle.group(1)}"
+            
+            # Instagram
+            elif 'instagram.com' in href:
+                handle = re.search(r'instagram\.com/([^/?]+)', href)
+                if handle and not social['instagram']:
+                    social['instagram'] = f"instagram.com/{handle.group(1)}"
+            
+            # TikTok
+            elif 'tiktok.com' in href:
+                handle = re.search(r'tiktok\.com/@?([^/?]+)', href)
+                if handle and not social['tiktok']:
+                    social['tiktok'] = f"tiktok.com/@{handle.group(1)}"
+            
+            # LinkedIn
+            elif 'linkedin.com' in href:
+                handle = re.search(r'linkedin\.com/(?:company|in)/([^/?]+)', href)
+                if handle and not social['linkedin']:
+                    social['linkedin'] = f"linkedin.com/company/{handle.group(1)}"
+            
+            # Twitter/X
+            elif 'twitter.com' in href or 'x.com' in href:
+                handle = re.search(r'(?:twitter\.com|x\.com)/([^/?]+)', href)
+                if handle and not social['twitter']:
+                    social['twitter'] = f"x.com/{handle.group(1)}"
+        
+        return social
+
+    def find_contact_pages(self, html, base_url):
+        """
+        Return same-site links that likely hold contact details, best first.
+        Ranked by the first CONTACT_PAGE_HINTS keyword found in the link's
+        path or anchor text.
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        home = urlparse(base_url)
+        ranked = {}
+        
+        for link in soup.find_all('a', href=True):
+            href = link['href'].strip()
+            if href.startswith(('mailto:', 'tel:', 'javascript:', '#')):
+                continue
+            absolute = urljoin(base_url, href).split('#')[0]
+            parsed = urlparse(absolute)
+            if parsed.scheme not in ('http', 'https'):
+                continue
+            # Same site only (www. and bare domain count as the same site)
+            if parsed.netloc.lower().removeprefix('www.') != home.netloc.lower().removeprefix('www.'):
+                continue
+            if parsed.path.rstrip('/') == home.path.rstrip('/'):
+                continue
+            
+            haystack = f"{parsed.path} {link.get_text(' ', strip=True)}".lower()
+            for rank, hint in enumerate(CONTACT_PAGE_HINTS):
+                if hint in haystack:
+                    if absolute not in ranked or rank < ranked[absolute]:
+                        ranked[absolute] = rank
+                    break
+        
+        return sorted(ranked, key=ranked.get)
+
+
+def legacy_extract(extractor, html):
+    emails = extractor.extract_emails(html, BASE_URL)
+    social = extractor.extract_social_media(html, BASE_URL)
+    pages = extractor.find_contact_pages(html, BASE_URL)
+    return (emails[0] if emails else None), social, pages
+
+
+def single_pass_extract(enricher, html):
+    page = extract_page(html)
+    return pick_email(page.emails), page.social, enricher.find_contact_pages(page.links, BASE_URL)
+
+
+# ─────────────────────────────────────────────
+# Corpus
+# ─────────────────────────────────────────────
+
+def synthetic_corpus(count=40):
+    """Pages shaped like small-business sites: big nav, footer socials, long body copy, inline scripts."""
+    pages = []
+    for i in range(count):
+        nav = ''.join(f'<li><a href="/service-{j}">Service {j}</a></li>' for j in range(30 + i))
+        body = ''.join(
+            f'<section><h2>Heating &amp; cooling {j}</h2><p>{"We repair furnaces and AC units. " * 20}</p>'
+            f'<img src="/img/photo{j}.jpg" alt="photo {j}"></section>'
+            for j in range(20 + i * 2)
+        )
+        footer = (
+            f'<footer><a href="/contact-us">Contact Us</a> <a href="/about">About our team</a>'
+            f'<a href="mailto:owner{i}@example-hvac.com">Email the owner</a> info@example-hvac.com'
+            f'<a href="https://www.facebook.com/examplehvac{i}">Facebook</a>'
+            f'<a href="https://instagram.com/examplehvac{i}/">Instagram</a>'
+            f'<a href="https://www.linkedin.com/company/example-hvac-{i}">LinkedIn</a></footer>'
+        )
+        script = '<script>window.dataLayer = [];' + 'function f(a){return a*2;}' * 200 + '</script>'
+        pages.append(f'<html><head>{script}</head><body><nav><ul>{nav}</ul></nav>{body}{footer}</body></html>')
+    return pages
+
+
+def load_corpus(path):
+    files = sorted(Path(path).glob('*.htm*'))
+    if not files:
+        sys.exit(f"No .html files found in {path}")
+    return [f.read_text(encoding='utf-8', errors='replace') for f in files]
+
+
+def time_per_page(fn, pages, repeat):
+    samples = []
+    for _ in range(repeat):
+        for html in pages:
+            start = time.perf_counter()
+            fn(html)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark contact extraction implementations')
+    parser.add_argument('--corpus', type=str, default=None, help='Directory of saved *.html pages')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes over the corpus (default: 5)')
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    legacy = LegacyExtractor()
+    enricher = LeadEnricher()
+    size_kb = sum(len(p) for p in pages) / 1024
+    print(f"Corpus: {len(pages)} pages, {size_kb:.0f} KB total")
+
+    # Same email presence, same social handles, same top contact page
+    disagreements = 0
+    for html in pages:
+        old_email, old_social, old_pages = legacy_extract(legacy, html)
+        new_email, new_social, new_pages = single_pass_extract(enricher, html)
+        if bool(old_email) != bool(new_email) or old_social != new_social or old_pages[:1] != new_pages[:1]:
+            disagreements += 1
+    print(f"Agreement: {len(pages) - disagreements}/{len(pages)} pages\n")
+
+    results = {
+        'bs4 + regex': time_per_page(lambda h: legacy_extract(legacy, h), pages, args.repeat),
+        'single-pass': time_per_page(lambda h: single_pass_extract(enricher, h), pages, args.repeat),
+    }
+    print(f"{'implementation':<16}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, samples in results.items():
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{name:<16}{statistics.mean(samples):>10.2f}{statistics.median(samples):>10.2f}{p99:>10.2f}")
+    speedup = statistics.mean(results['bs4 + regex']) / statistics.mean(results['single-pass'])
+    print(f"\nSingle-pass is {speedup:.1f}x faster per page")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,69 +10,123 @@ import re
 import time
 import random
 import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
 
+from html_extract import extract_page, pick_email
+from http_cache import HTTPCache
+from lead_format import FORMATS, Checkpoint, atomic_open, is_jsonl, iter_jsonl, lead_key, output_paths, write_jsonl
+
 try:
     import requests
-    from bs4 import BeautifulSoup
+    from requests.adapters import HTTPAdapter
 except ImportError:
     print("ERROR: Required packages not installed.")
-    print("Run: pip install requests beautifulsoup4")
+    print("Run: pip install requests")
     sys.exit(1)
 
 
+# Link path/text keywords that suggest a page with contact details, most promising first
+CONTACT_PAGE_HINTS = ['contact', 'get-in-touch', 'reach', 'about', 'team', 'staff', 'company', 'location']
+
+# GMB report lines: a "LEAD #n" section header, or one "Field:   value" line
+GMB_FIELDS = {
+    'Business Name': 'name',
+    'Category': 'category',
+    'Address': 'address',
+    'Phone': 'phone',
+    'Website': 'website',
+    'Rating': 'rating',
+}
+GMB_LINE_PATTERN = re.compile(
+    r'LEAD #\d+\s*$|(?P<field>Business Name|Category|Address|Phone|Website|Rating):[ \t]+(?P<value>\S.*)'
+)
+GMB_CITY_PATTERN = re.compile(r',\s*([^,]+),\s*[A-Z]{2}')
+
+
 class LeadEnricher:
     """Enriches business leads with contact data from websites."""
     
-    def __init__(self):
-        """Initialize the enricher."""
+    def __init__(self, concurrency=8, domain_delay=2.0, max_pages=3, cache=None):
+        """
+        Initialize the enricher.
+
+        concurrency:  websites fetched in parallel (one worker thread each)
+        domain_delay: minimum seconds between two requests to the same domain
+                      (plus up to 1s jitter) — politeness is per site, not global
+        max_pages:    extra contact/about pages to try per site when the
+                      landing page lacks an email or social handle (0 = landing only)
+        cache:        optional HTTPCache; fresh hits skip both the network and
+                      the per-domain delay, so re-runs over the same sites are fast
+        """
+        self.concurrency = max(1, concurrency)
+        self.domain_delay = domain_delay
+        self.max_pages = max_pages
+        self.cache = cache
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        # Keep-alive pool sized to the worker count so connections are reused, not re-opened
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.enriched_leads = []
-        
+        self._domain_next_slot = {}
+        self._domain_lock = threading.Lock()
+        
+    def iter_gmb_file(self, filepath):
+        """
+        Stream leads from a GMB leads file, yielding one dict per lead as soon as
+        its section has been read. Reads line by line, so memory stays flat no
+        matter how many leads the file holds. ``.jsonl`` files from
+        ``scrape_gmb_leads.py --format jsonl`` are read as records, no regex.
+        """
+        if is_jsonl(filepath):
+            for lead in iter_jsonl(filepath):
+                if lead.get('name'):
+                    yield self._finish_gmb_lead(lead)
+            return
+        
+        lead = None
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = GMB_LINE_PATTERN.match(line)
+                if not match:
+                    continue
+                if match.group('field') is None:
+                    # "LEAD #n" header: the previous section is complete
+                    if lead and 'name' in lead:
+                        yield self._finish_gmb_lead(lead)
+                    lead = {}
+                elif lead is not None and GMB_FIELDS[match.group('field')] not in lead:
+                    lead[GMB_FIELDS[match.group('field')]] = match.group('value').strip()
+        if lead and 'name' in lead:
+            yield self._finish_gmb_lead(lead)
+
+    @staticmethod
+    def _finish_gmb_lead(lead):
+        for key in ('category', 'address', 'phone', 'website', 'rating'):
+            lead.setdefault(key, 'N/A')
+        # JSONL leads carry the review count separately; the text report folds it into the rating
+        reviews = lead.pop('reviews', None)
+        if reviews not in (None, 'N/A'):
+            lead['rating'] = f"{lead['rating']} ({reviews} reviews)"
+        
+        # Extract city from address
+        if lead['address'] != 'N/A':
+            city_match = GMB_CITY_PATTERN.search(lead['address'])
+            lead['city'] = city_match.group(1) if city_match else 'your area'
+        else:
+            lead['city'] = 'your area'
+        return lead
+
     def parse_gmb_file(self, filepath):
         """Parse GMB leads file and extract business data."""
-        leads = []
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Split by lead sections
-        lead_sections = re.split(r'LEAD #\d+\n-+', content)
-        
-        for section in lead_sections[1:]:  # Skip header
-            lead = {}
-            
-            # Extract fields
-            name_match = re.search(r'Business Name:\s+(.+)', section)
-            category_match = re.search(r'Category:\s+(.+)', section)
-            address_match = re.search(r'Address:\s+(.+)', section)
-            phone_match = re.search(r'Phone:\s+(.+)', section)
-            website_match = re.search(r'Website:\s+(.+)', section)
-            rating_match = re.search(r'Rating:\s+(.+)', section)
-            
-            if name_match:
-                lead['name'] = name_match.group(1).strip()
-                lead['category'] = category_match.group(1).strip() if category_match else 'N/A'
-                lead['address'] = address_match.group(1).strip() if address_match else 'N/A'
-                lead['phone'] = phone_match.group(1).strip() if phone_match else 'N/A'
-                lead['website'] = website_match.group(1).strip() if website_match else 'N/A'
-                lead['rating'] = rating_match.group(1).strip() if rating_match else 'N/A'
-                
-                # Extract city from address
-                if lead['address'] != 'N/A':
-                    city_match = re.search(r',\s*([^,]+),\s*[A-Z]{2}', lead['address'])
-                    lead['city'] = city_match.group(1) if city_match else 'your area'
-                else:
-                    lead['city'] = 'your area'
-                
-                leads.append(lead)
-        
-        return leads
+        return list(self.iter_gmb_file(filepath))
     
     def clean_website_url(self, url):
         """Clean and normalize website URL."""
@@ -88,121 +142,120 @@ class LeadEnricher:
         
         return url
     
-    def extract_emails(self, html, url):
-        """Extract email addresses from HTML content."""
-        emails = set()
-        
-        # Email regex pattern
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        # Find all emails in HTML
-        found_emails = re.findall(email_pattern, html)
-        
-        # Filter out common generic emails and images
-        generic_prefixes = ['info', 'support', 'hello', 'contact', 'admin', 'webmaster', 
-                           'noreply', 'no-reply', 'sales', 'marketing']
-        
-        for email in found_emails:
-            email_lower = email.lower()
-            
-            # Skip image files and generic emails
-            if email_lower.endswith(('.png', '.jpg', '.gif', '.jpeg')):
+    def _polite_wait(self, url):
+        """Blocks until this domain's next request slot; other domains are unaffected."""
+        domain = urlparse(url).netloc.lower()
+        with self._domain_lock:
+            now = time.monotonic()
+            slot = max(now, self._domain_next_slot.get(domain, now))
+            self._domain_next_slot[domain] = slot + self.domain_delay + random.uniform(0, 1)
+        if slot > now:
+            time.sleep(slot - now)
+
+    def find_contact_pages(self, links, base_url):
+        """
+        Return same-site links that likely hold contact details, best first.
+        ``links`` are the (href, anchor text) pairs from ``extract_page``;
+        ranked by the first CONTACT_PAGE_HINTS keyword found in the link's
+        path or anchor text.
+        """
+        home = urlparse(base_url)
+        ranked = {}
+        
+        for href, text in links:
+            if not href or href.startswith(('mailto:', 'tel:', 'javascript:', '#')):
+                continue
+            absolute = urljoin(base_url, href).split('#')[0]
+            parsed = urlparse(absolute)
+            if parsed.scheme not in ('http', 'https'):
+                continue
+            # Same site only (www. and bare domain count as the same site)
+            if parsed.netloc.lower().removeprefix('www.') != home.netloc.lower().removeprefix('www.'):
+                continue
+            if parsed.path.rstrip('/') == home.path.rstrip('/'):
                 continue
             
-            prefix = email_lower.split('@')[0]
-            
-            # Prefer specific emails over generic ones
-            if not any(gen in prefix for gen in generic_prefixes):
-                emails.add(email)
-        
-        # If no specific emails found, use generic ones
-        if not emails:
-            for email in found_emails:
-                if not email.lower().endswith(('.png', '.jpg', '.gif', '.jpeg')):
-                    emails.add(email)
+            haystack = f"{parsed.path} {text}".lower()
+            for rank, hint in enumerate(CONTACT_PAGE_HINTS):
+                if hint in haystack:
+                    if absolute not in ranked or rank < ranked[absolute]:
+                        ranked[absolute] = rank
                     break
         
-        return list(emails)[:1]  # Return first email only
+        return sorted(ranked, key=ranked.get)
     
-    def extract_social_media(self, html, base_url):
-        """Extract social media handles from HTML content."""
-        social = {
-            'facebook': None,
-            'instagram': None,
-            'tiktok': None,
-            'linkedin': None,
-            'twitter': None
-        }
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Find all links
-        links = soup.find_all('a', href=True)
-        
-        for link in links:
-            href = link['href'].lower()
-            
-            # Facebook
-            if 'facebook.com' in href or 'fb.com' in href or 'fb.me' in href:
-                handle = re.search(r'(?:facebook\.com|fb\.com|fb\.me)/([^/?]+)', href)
-                if handle and not social['facebook']:
-                    social['facebook'] = f"facebook.com/{handle.group(1)}"
-            
-            # Instagram
-            elif 'instagram.com' in href:
-                handle = re.search(r'instagram\.com/([^/?]+)', href)
-                if handle and not social['instagram']:
-                    social['instagram'] = f"instagram.com/{handle.group(1)}"
-            
-            # TikTok
-            elif 'tiktok.com' in href:
-                handle = re.search(r'tiktok\.com/@?([^/?]+)', href)
-                if handle and not social['tiktok']:
-                    social['tiktok'] = f"tiktok.com/@{handle.group(1)}"
-            
-            # LinkedIn
-            elif 'linkedin.com' in href:
-                handle = re.search(r'linkedin\.com/(?:company|in)/([^/?]+)', href)
-                if handle and not social['linkedin']:
-                    social['linkedin'] = f"linkedin.com/company/{handle.group(1)}"
-            
-            # Twitter/X
-            elif 'twitter.com' in href or 'x.com' in href:
-                handle = re.search(r'(?:twitter\.com|x\.com)/([^/?]+)', href)
-                if handle and not social['twitter']:
-                    social['twitter'] = f"x.com/{handle.group(1)}"
-        
-        return social
+    def _fetch_html(self, url, polite=False):
+        if self.cache is not None:
+            html = self.cache.fresh(url)
+            if html is not None:
+                return html
+        if polite:
+            self._polite_wait(url)
+        if self.cache is not None:
+            return self.cache.fetch(self.session, url, timeout=10)
+        response = self.session.get(url, timeout=10, allow_redirects=True)
+        response.raise_for_status()
+        return response.text
+    
+    def _merge_contact_data(self, found, html):
+        """Fill any still-missing email/social fields from one page. Returns the extracted page."""
+        page = extract_page(html)
+        if not found['email']:
+            found['email'] = pick_email(page.emails)
+        for network, handle in page.social.items():
+            if handle and not found['social'][network]:
+                found['social'][network] = handle
+        return page
+    
+    @staticmethod
+    def _is_complete(found):
+        """Good enough to stop crawling: an email and at least one social handle."""
+        return bool(found['email']) and any(found['social'].values())
     
     def scrape_website(self, url):
-        """Scrape website for email and social media."""
+        """
+        Scrape website for email and social media.
+        Starts with the landing page; if that lacks an email or social handle,
+        fetches up to ``max_pages`` likely contact pages (contact, about, team...)
+        one at a time, at the per-domain delay, and stops as soon as both have been found.
+        """
+        found = {
+            'email': None,
+            'social': {
+                'facebook': None,
+                'instagram': None,
+                'tiktok': None,
+                'linkedin': None,
+                'twitter': None
+            }
+        }
         try:
-            response = self.session.get(url, timeout=10, allow_redirects=True)
-            response.raise_for_status()
+            html = self._fetch_html(url, polite=True)
             
-            html = response.text
+            # Extract emails, social media and contact links in one pass
+            page = self._merge_contact_data(found, html)
+            if self._is_complete(found) or self.max_pages <= 0:
+                return found
             
-            # Extract emails and social media
-            emails = self.extract_emails(html, url)
-            social = self.extract_social_media(html, url)
+            candidates = self.find_contact_pages(page.links, url)[:self.max_pages]
+            if not candidates:
+                return found
             
-            return {
-                'email': emails[0] if emails else None,
-                'social': social
-            }
+            # Subpages are requests to the same site, so each one waits for the
+            # domain's next slot like the landing page did (cache hits don't)
+            for page_url in candidates:
+                try:
+                    self._merge_contact_data(found, self._fetch_html(page_url, polite=True))
+                except Exception:
+                    continue  # A broken subpage shouldn't sink the lead
+                if self._is_complete(found):
+                    break
+            
+            return found
             
         except Exception as e:
             print(f"  ⚠️  Error scraping website: {str(e)[:50]}")
-            return {
-                'email': None,
-                'social': {
-                    'facebook': None,
-                    'instagram': None,
-                    'tiktok': None,
-                    'linkedin': None,
-                    'twitter': None
-                }
-            }
+            return found
     
     def calculate_score(self, lead_data):
         """Calculate lead score based on available contact info."""
@@ -269,63 +322,122 @@ P.S. I'm only taking on 3 new clients this month, so if you're interested, let m
         
         return email_template.strip()
     
-    def enrich_leads(self, leads):
-        """Enrich all leads with contact data."""
-        print(f"\n🔍 Enriching {len(leads)} leads...\n")
+    def enrich_lead(self, lead):
+        """Enrich a single lead in place and return it."""
+        # Clean website URL
+        website = self.clean_website_url(lead['website'])
+        
+        if website:
+            # Scrape website
+            contact_data = self.scrape_website(website)
+            lead['email'] = contact_data['email']
+            lead['social'] = contact_data['social']
+        else:
+            lead['email'] = None
+            lead['social'] = {
+                'facebook': None,
+                'instagram': None,
+                'tiktok': None,
+                'linkedin': None,
+                'twitter': None
+            }
         
-        for idx, lead in enumerate(leads, 1):
-            print(f"[{idx}/{len(leads)}] {lead['name'][:40]}...", end=" ")
-            
-            # Clean website URL
-            website = self.clean_website_url(lead['website'])
-            
-            if website:
-                # Scrape website
-                contact_data = self.scrape_website(website)
-                lead['email'] = contact_data['email']
-                lead['social'] = contact_data['social']
-                
-                # Random delay
-                time.sleep(random.uniform(2, 3))
-            else:
-                lead['email'] = None
-                lead['social'] = {
-                    'facebook': None,
-                    'instagram': None,
-                    'tiktok': None,
-                    'linkedin': None,
-                    'twitter': None
-                }
-            
-            # Calculate score
-            lead['score'] = self.calculate_score(lead)
-            
-            # Generate cold email
-            lead['cold_email'] = self.generate_cold_email(lead)
-            
-            # Status
-            status = f"✓ Score: {lead['score']}/5"
-            if lead['email']:
-                status += f" | Email: ✓"
-            social_count = sum(1 for v in lead['social'].values() if v)
-            if social_count > 0:
-                status += f" | Social: {social_count}"
-            
-            print(status)
-            
-            self.enriched_leads.append(lead)
+        # Calculate score
+        lead['score'] = self.calculate_score(lead)
         
-        print(f"\n✅ Enrichment complete!")
+        # Generate cold email
+        lead['cold_email'] = self.generate_cold_email(lead)
+        return lead
+    
+    def enrich_leads(self, leads, checkpoint=None):
+        """
+        Enrich leads with contact data, fetching up to ``concurrency`` websites at once.
+        ``leads`` may be a list or any iterable (e.g. ``iter_gmb_file``); at most
+        2 x ``concurrency`` leads are pulled ahead of the workers, so enrichment
+        starts on the first lead while the rest of the input is still being read.
+
+        With a ``Checkpoint``, every finished lead is appended to it immediately,
+        and leads it already holds (a resumed run) are skipped, not re-fetched.
+        """
+        resumed = []
+        if checkpoint is not None and checkpoint.done:
+            resumed = list(checkpoint.done.values())
+            print(f"\n♻️  Resuming: {len(resumed)} leads already enriched in {checkpoint.path}")
+            # Frozen at start: checkpoint.done grows during the run, and a later lead with
+            # the same key must still be processed, as it would be without --resume
+            done_at_start = set(checkpoint.done)
+            leads = (lead for lead in leads if lead_key(lead) not in done_at_start)
+        total = len(leads) if hasattr(leads, '__len__') else None
+        print(f"\n🔍 Enriching {total if total is not None else 'streamed'} leads "
+              f"({self.concurrency} workers, {self.domain_delay:g}s+ per-domain delay)...\n")
+        
+        started = time.monotonic()
+        results = {}
+        done = 0
+        submitted = 0
+        max_in_flight = self.concurrency * 2
+        lead_iter = iter(leads)
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            in_flight = {}
+            exhausted = False
+            while in_flight or not exhausted:
+                # Top up the window before waiting on the next finished lead
+                while not exhausted and len(in_flight) < max_in_flight:
+                    lead = next(lead_iter, None)
+                    if lead is None:
+                        exhausted = True
+                        break
+                    in_flight[pool.submit(self.enrich_lead, lead)] = (submitted, lead)
+                    submitted += 1
+                if not in_flight:
+                    break
+                
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    idx, lead = in_flight.pop(future)
+                    try:
+                        results[idx] = future.result()
+                    except Exception as e:
+                        print(f"  ⚠️  {lead['name'][:40]}: {str(e)[:50]}")
+                        continue
+                    if checkpoint is not None:
+                        checkpoint.record(lead)
+                    done += 1
+                    
+                    # Status
+                    status = f"✓ Score: {lead['score']}/5"
+                    if lead['email']:
+                        status += f" | Email: ✓"
+                    social_count = sum(1 for v in lead['social'].values() if v)
+                    if social_count > 0:
+                        status += f" | Social: {social_count}"
+                    
+                    rate = done / max(time.monotonic() - started, 1e-6)
+                    progress = f"{done}/{total}" if total is not None else f"{done}"
+                    print(f"[{progress}] {lead['name'][:40]}... {status}  ({rate:.1f} leads/s)")
+        
+        # Keep input order so the score sort in save_to_text stays stable
+        self.enriched_leads.extend(resumed)
+        self.enriched_leads.extend(results[idx] for idx in sorted(results))
+        
+        print(f"\n✅ Enrichment complete! {done}/{submitted} leads in {time.monotonic() - started:.0f}s")
+        if self.cache is not None:
+            print(f"🗄️  HTTP cache: {self.cache.summary()}")
+    
+    def save_to_jsonl(self, output_path):
+        """Save enriched leads as schema-versioned JSONL for export_to_sheets.py."""
+        count = write_jsonl(output_path, self.enriched_leads, stage='enriched')
+        print(f"\n✅ JSONL saved to: {output_path} ({count} leads)")
     
     def save_to_text(self, output_path):
-        """Save enriched leads to text file."""
+        """Save enriched leads to text file (written to a temp file, then swapped in)."""
         output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Sort by score (highest first)
         sorted_leads = sorted(self.enriched_leads, key=lambda x: x['score'], reverse=True)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with atomic_open(output_file) as f:
             f.write("=" * 80 + "\n")
             f.write("ENRICHED LEAD GENERATION REPORT\n")
             f.write("=" * 80 + "\n\n")
@@ -392,6 +504,64 @@ def main():
         default=None,
         help='Output file path (default: input_file with _enriched suffix)'
     )
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        default='text',
+        help='Output format: text report, JSONL for export_to_sheets.py, or both (default: text)'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=8,
+        help='Websites to fetch in parallel (default: 8)'
+    )
+    parser.add_argument(
+        '--domain-delay',
+        type=float,
+        default=2.0,
+        help='Minimum seconds between requests to the same domain (default: 2)'
+    )
+    parser.add_argument(
+        '--max-pages',
+        type=int,
+        default=3,
+        help='Extra contact/about pages to crawl per site when the homepage lacks data (default: 3, 0 = homepage only)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default='.tmp/http_cache',
+        help='On-disk HTTP response cache directory (default: .tmp/http_cache)'
+    )
+    parser.add_argument(
+        '--cache-max-age',
+        type=float,
+        default=168,
+        help='Hours before a cached page is revalidated with the site (default: 168)'
+    )
+    parser.add_argument(
+        '--cache-max-mb',
+        type=float,
+        default=200,
+        help='Cache size limit in MB; least recently used pages are evicted (default: 200)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always download websites, bypassing the response cache'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        type=str,
+        default=None,
+        help='Append-only progress file, one line per finished lead (default: <output>.checkpoint.jsonl)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue an interrupted run from its checkpoint, skipping leads already enriched'
+    )
     
     args = parser.parse_args()
     
@@ -401,31 +571,52 @@ def main():
     else:
         input_path = Path(args.input_file)
         output_path = input_path.parent / f"{input_path.stem}_enriched.txt"
+    text_path, jsonl_path = output_paths(output_path, args.format)
+    checkpoint_path = args.checkpoint or Path(output_path).with_suffix('.checkpoint.jsonl')
     
     print("\n" + "=" * 80)
     print("🚀 LEAD ENRICHMENT ENGINE")
     print("=" * 80)
     
+    checkpoint = None
     try:
-        enricher = LeadEnricher()
-        
-        # Parse GMB file
+        cache = None
+        if not args.no_cache:
+            cache = HTTPCache(args.cache_dir, max_age=args.cache_max_age * 3600,
+                              max_bytes=int(args.cache_max_mb * 1024 * 1024))
+        enricher = LeadEnricher(concurrency=args.concurrency, domain_delay=args.domain_delay,
+                                max_pages=args.max_pages, cache=cache)
+        
+        if not args.resume and Path(checkpoint_path).exists():
+            print(f"⚠️  Found {checkpoint_path} from an unfinished run — starting over (use --resume to continue it)")
+        checkpoint = Checkpoint(checkpoint_path, stage='enriched', resume=args.resume)
+        
+        # Stream the GMB file straight into the workers
         print(f"\n📖 Reading leads from: {args.input_file}")
-        leads = enricher.parse_gmb_file(args.input_file)
-        print(f"✅ Found {len(leads)} leads")
-        
-        # Enrich leads
-        enricher.enrich_leads(leads)
+        enricher.enrich_leads(enricher.iter_gmb_file(args.input_file), checkpoint=checkpoint)
         
         # Save results
-        enricher.save_to_text(output_path)
+        if text_path:
+            enricher.save_to_text(text_path)
+        if jsonl_path:
+            enricher.save_to_jsonl(jsonl_path)
+        
+        # Final output is in place; the progress log is no longer needed
+        checkpoint.discard()
+        checkpoint = None
         
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Enrichment interrupted by user")
     except FileNotFoundError:
         print(f"\n❌ ERROR: File not found: {args.input_file}")
     except Exception as e:
         print(f"\n❌ ERROR: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+            print(f"💾 Progress saved to {checkpoint.path} — re-run with --resume to continue")
     
     print("\n✨ Done!\n")
 
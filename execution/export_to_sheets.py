@@ -12,6 +12,9 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 
+from lead_format import is_jsonl, iter_jsonl
+from lead_store import LEAD_STORE_PATH, LeadStore, lead_store_key
+
 try:
     from google.auth.transport.requests import Request
     from google.oauth2 import service_account
@@ -32,6 +35,8 @@ load_dotenv()
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+HEADERS = ["Name", "Category", "Score", "Website", "Phone", "Email", "Facebook", "Instagram", "TikTok", "LinkedIn", "X"]
+
 class SheetsExporter:
     def __init__(self):
         self.creds = self._authenticate()
@@ -73,17 +78,49 @@ class SheetsExporter:
                     token.write(creds.to_json())
             return creds
 
+    @staticmethod
+    def _category_hint(filepath):
+        """Source category from the filename (e.g. harrisburg_hvac_enriched.txt → HVAC)."""
+        if 'hvac' in filepath.lower(): return "HVAC"
+        elif 'roofing' in filepath.lower() or 'roofer' in filepath.lower(): return "Roofing"
+        elif 'plumber' in filepath.lower() or 'plumbing' in filepath.lower(): return "Plumbing"
+        return ""
+
+    def iter_enriched_jsonl(self, filepath):
+        """Yield leads from enriched JSONL records (enrich_leads.py --format jsonl)."""
+        print(f"📖 Reading {filepath}...")
+        category_hint = self._category_hint(filepath)
+        for lead in iter_jsonl(filepath):
+            if not lead.get('name'):
+                continue
+            social = lead.get('social') or {}
+            website = lead.get('website') or ""
+            yield self._lead_record(
+                lead['name'], category_hint, lead.get('score') or 1,
+                website if website != 'N/A' else "",
+                lead.get('phone') if lead.get('phone') != 'N/A' else "",
+                lead.get('email') or "",
+                social.get('facebook') or "", social.get('instagram') or "", social.get('tiktok') or "",
+                social.get('linkedin') or "", social.get('twitter') or "",
+            )
+
     def parse_enriched_file(self, filepath):
         """Parse enriched lead files and merge into leads_db."""
+        for lead in self.iter_enriched_file(filepath):
+            self._merge_lead(lead)
+
+    def iter_enriched_file(self, filepath):
+        """Yield one lead dict per lead in an enriched text report or JSONL file."""
+        if is_jsonl(filepath):
+            yield from self.iter_enriched_jsonl(filepath)
+            return
+
         print(f"📖 Parsing {filepath}...")
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
 
         # Extract source category from filename
-        category_hint = ""
-        if 'hvac' in filepath.lower(): category_hint = "HVAC"
-        elif 'roofing' in filepath.lower() or 'roofer' in filepath.lower(): category_hint = "Roofing"
-        elif 'plumber' in filepath.lower() or 'plumbing' in filepath.lower(): category_hint = "Plumbing"
+        category_hint = self._category_hint(filepath)
 
         lead_sections = re.split(r'LEAD #\d+ - SCORE: \d+/5 ⭐\n-+', content)
         for section in lead_sections[1:]:
@@ -110,75 +147,128 @@ class SheetsExporter:
             # Standardize "Not found"
             def clean(val): return val if val and "Not found" not in val else ""
 
-            # Use Website + Name as unique key
-            key = f"{name.lower().strip()}|{clean(website).lower()}"
-            
-            if key not in self.leads_db:
-                self.leads_db[key] = {
-                    'Name': name.strip(),
-                    'Categories': {category_hint} if category_hint else set(),
-                    'Score': int(score),
-                    'Website': clean(website),
-                    'Phone': clean(phone),
-                    'Email': clean(email),
-                    'Facebook': clean(fb),
-                    'Instagram': clean(ig),
-                    'TikTok': clean(tk),
-                    'LinkedIn': clean(li),
-                    'X': clean(x)
-                }
-            else:
-                # Merge
-                if category_hint: self.leads_db[key]['Categories'].add(category_hint)
-                self.leads_db[key]['Score'] = max(self.leads_db[key]['Score'], int(score))
-                if not self.leads_db[key]['Email'] and clean(email):
-                    self.leads_db[key]['Email'] = clean(email)
-                if not self.leads_db[key]['Website'] and clean(website):
-                    self.leads_db[key]['Website'] = clean(website)
+            yield self._lead_record(name, category_hint, score, clean(website), clean(phone), clean(email),
+                                    clean(fb), clean(ig), clean(tk), clean(li), clean(x))
+
+    @staticmethod
+    def _lead_record(name, category_hint, score, website, phone, email, fb, ig, tk, li, x):
+        return {
+            'Name': name.strip(),
+            'Categories': {category_hint} if category_hint else set(),
+            'Score': int(score),
+            'Website': website,
+            'Phone': phone,
+            'Email': email,
+            'Facebook': fb,
+            'Instagram': ig,
+            'TikTok': tk,
+            'LinkedIn': li,
+            'X': x
+        }
+
+    def _merge_lead(self, lead):
+        """Adds one lead to leads_db, merging categories/score/contact info with any earlier copy."""
+        # Use Website + Name as unique key
+        key = f"{lead['Name'].lower()}|{lead['Website'].lower()}"
+        
+        if key not in self.leads_db:
+            self.leads_db[key] = lead
+        else:
+            # Merge
+            self.leads_db[key]['Categories'] |= lead['Categories']
+            self.leads_db[key]['Score'] = max(self.leads_db[key]['Score'], lead['Score'])
+            if not self.leads_db[key]['Email'] and lead['Email']:
+                self.leads_db[key]['Email'] = lead['Email']
+            if not self.leads_db[key]['Website'] and lead['Website']:
+                self.leads_db[key]['Website'] = lead['Website']
 
     def _get_field(self, text, pattern):
         match = re.search(pattern, text)
         return match.group(1).strip() if match else None
 
+    @staticmethod
+    def _row_values(lead):
+        # Combine categories
+        cats = sorted(list(lead['Categories']))
+        cat_label = ", ".join(cats) if cats else "Service Business"
+        
+        return [
+            lead['Name'],
+            cat_label,
+            lead['Score'],
+            lead['Website'],
+            lead['Phone'],
+            lead['Email'],
+            lead['Facebook'],
+            lead['Instagram'],
+            lead['TikTok'],
+            lead['LinkedIn'],
+            lead['X']
+        ]
+
+    def _open_spreadsheet(self, title):
+        if self.spreadsheet_id:
+            sheet_id = self.spreadsheet_id
+            print(f"📂 Using existing Spreadsheet ID: {sheet_id}")
+        else:
+            # Create a new Spreadsheet
+            spreadsheet = {
+                'properties': {'title': title}
+            }
+            spreadsheet = self.service.spreadsheets().create(body=spreadsheet, fields='spreadsheetId').execute()
+            sheet_id = spreadsheet.get('spreadsheetId')
+            print(f"✅ Created new Spreadsheet: https://docs.google.com/spreadsheets/d/{sheet_id}")
+        return sheet_id
+
+    @staticmethod
+    def _header_format_requests(grid_id=0):
+        # Format Header (Bold + Freeze)
+        # Note: sheetId 0 is usually the first sheet 'Sheet1'
+        return [
+            {
+                'repeatCell': {
+                    'range': {'sheetId': grid_id, 'startRowIndex': 0, 'endRowIndex': 1},
+                    'cell': {'userEnteredFormat': {'textFormat': {'bold': True}}},
+                    'fields': 'userEnteredFormat(textFormat)'
+                }
+            },
+            {
+                'updateSheetProperties': {
+                    'properties': {'sheetId': grid_id, 'gridProperties': {'frozenRowCount': 1}},
+                    'fields': 'gridProperties.frozenRowCount'
+                }
+            }
+        ]
+
+    def _first_tab(self, sheet_id):
+        """(grid id, A1 range prefix) of the first tab — the one delta export and sync both write to."""
+        result = self.service.spreadsheets().get(
+            spreadsheetId=sheet_id, fields='sheets(properties(sheetId,title))').execute()
+        properties = result['sheets'][0]['properties']
+        title = properties['title'].replace("'", "''")
+        return properties['sheetId'], f"'{title}'!"
+
+    def _format_header(self, sheet_id, grid_id=0):
+        requests = self._header_format_requests(grid_id)
+        
+        # Try to format, but don't fail if sheetId 0 doesn't exist (though it usually does)
+        try:
+            self.service.spreadsheets().batchUpdate(spreadsheetId=sheet_id, body={'requests': requests}).execute()
+        except:
+            pass
+
     def create_and_write(self, title):
         try:
-            if self.spreadsheet_id:
-                sheet_id = self.spreadsheet_id
-                print(f"📂 Using existing Spreadsheet ID: {sheet_id}")
-            else:
-                # Create a new Spreadsheet
-                spreadsheet = {
-                    'properties': {'title': title}
-                }
-                spreadsheet = self.service.spreadsheets().create(body=spreadsheet, fields='spreadsheetId').execute()
-                sheet_id = spreadsheet.get('spreadsheetId')
-                print(f"✅ Created new Spreadsheet: https://docs.google.com/spreadsheets/d/{sheet_id}")
+            sheet_id = self._open_spreadsheet(title)
 
             # Prepare Data
-            headers = ["Name", "Category", "Score", "Website", "Phone", "Email", "Facebook", "Instagram", "TikTok", "LinkedIn", "X"]
-            rows = [headers]
+            rows = [HEADERS]
             
             # Sort by Score descending
             sorted_leads = sorted(self.leads_db.values(), key=lambda x: x['Score'], reverse=True)
             
             for lead in sorted_leads:
-                # Combine categories
-                cats = sorted(list(lead['Categories']))
-                cat_label = ", ".join(cats) if cats else "Service Business"
-                
-                rows.append([
-                    lead['Name'],
-                    cat_label,
-                    lead['Score'],
-                    lead['Website'],
-                    lead['Phone'],
-                    lead['Email'],
-                    lead['Facebook'],
-                    lead['Instagram'],
-                    lead['TikTok'],
-                    lead['LinkedIn'],
-                    lead['X']
-                ])
+                rows.append(self._row_values(lead))
 
             # Write Rows
             body = {'values': rows}
@@ -188,29 +278,7 @@ class SheetsExporter:
                 spreadsheetId=sheet_id, range="Sheet1!A1",
                 valueInputOption="USER_ENTERED", body=body).execute()
 
-            # Format Header (Bold + Freeze)
-            # Note: sheetId 0 is usually the first sheet 'Sheet1'
-            requests = [
-                {
-                    'repeatCell': {
-                        'range': {'sheetId': 0, 'startRowIndex': 0, 'endRowIndex': 1},
-                        'cell': {'userEnteredFormat': {'textFormat': {'bold': True}}},
-                        'fields': 'userEnteredFormat(textFormat)'
-                    }
-                },
-                {
-                    'updateSheetProperties': {
-                        'properties': {'sheetId': 0, 'gridProperties': {'frozenRowCount': 1}},
-                        'fields': 'gridProperties.frozenRowCount'
-                    }
-                }
-            ]
-            
-            # Try to format, but don't fail if sheetId 0 doesn't exist (though it usually does)
-            try:
-                self.service.spreadsheets().batchUpdate(spreadsheetId=sheet_id, body={'requests': requests}).execute()
-            except:
-                pass
+            self._format_header(sheet_id)
 
             print(f"📊 Exported {len(rows)-1} consolidated leads.")
             return sheet_id
@@ -219,25 +287,201 @@ class SheetsExporter:
             print(f"❌ API Error: {err}")
             return None
 
+    def export_delta(self, store, title, full=False):
+        """
+        Push only what the sheet is missing from the lead store: rows for new
+        leads are appended below the last exported row, changed leads are
+        rewritten in place, all in one values().batchUpdate call. ``full``
+        forgets the sheet's export history and rewrites it from row 1.
+        """
+        try:
+            sheet_id = self._open_spreadsheet(title)
+            if full:
+                store.reset_exports(sheet_id)
+
+            updates, appends = store.delta(sheet_id, self._row_values)
+            if not updates and not appends:
+                print(f"✅ Sheet already up to date ({len(store)} leads).")
+                return sheet_id
+
+            # Same tab as sync_sheet, so the row numbers both record refer to one tab
+            grid_id, tab = self._first_tab(sheet_id)
+            first_free = store.next_row(sheet_id)
+            data = []
+            exported = []
+            if first_free == 2:
+                data.append({'range': f"{tab}A1", 'values': [HEADERS]})
+            for lead, sheet_row, values in updates:
+                data.append({'range': f"{tab}A{sheet_row}", 'values': [values]})
+                exported.append((lead['key'], sheet_row, values))
+            if appends:
+                # New leads go in as one contiguous block
+                data.append({'range': f"{tab}A{first_free}", 'values': [values for _, values in appends]})
+                exported.extend((lead['key'], first_free + i, values) for i, (lead, values) in enumerate(appends))
+
+            self.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=sheet_id,
+                body={'valueInputOption': "USER_ENTERED", 'data': data}).execute()
+            store.mark_exported(sheet_id, exported)
+
+            if first_free == 2:
+                self._format_header(sheet_id, grid_id)
+
+            print(f"📊 Synced {len(appends)} new and {len(updates)} updated leads ({len(store)} in store).")
+            return sheet_id
+
+        except HttpError as err:
+            print(f"❌ API Error: {err}")
+            return None
+
+    # ─────────────────────────────────────────────
+    # Diff-based sync (reads the sheet, sends one batchUpdate)
+    # ─────────────────────────────────────────────
+
+    @staticmethod
+    def _cell(value):
+        if value in (None, ""):
+            return {}
+        if isinstance(value, (int, float)):
+            return {'userEnteredValue': {'numberValue': value}}
+        return {'userEnteredValue': {'stringValue': str(value)}}
+
+    def _row_data(self, values):
+        return {'values': [self._cell(v) for v in values]}
+
+    def _read_sheet(self, sheet_id):
+        """
+        (grid id, A1 range prefix, rows as displayed strings) for the first
+        tab, from one spreadsheets().get: its properties come back with the
+        grid data, so no separate ``_first_tab`` lookup is needed.
+        """
+        result = self.service.spreadsheets().get(
+            spreadsheetId=sheet_id, includeGridData=True,
+            fields='sheets(properties(sheetId,title),data(rowData(values(formattedValue))))').execute()
+        sheet = result['sheets'][0]
+        rows = []
+        for data in sheet.get('data', []):
+            for row in data.get('rowData', []):
+                cells = [c.get('formattedValue', "") for c in row.get('values', [])]
+                rows.append(cells + [""] * (len(HEADERS) - len(cells)))
+        title = sheet['properties']['title'].replace("'", "''")
+        return sheet['properties']['sheetId'], f"'{title}'!", rows
+
+    def sync_sheet(self, store, title):
+        """
+        Diff the store's leads against what the sheet actually holds (matched by
+        normalized name + website) and send a single spreadsheets().batchUpdate:
+        updateCells for rows that differ, appendCells for leads not on the
+        sheet, plus header formatting when the header is missing. Rows on the
+        sheet that the store doesn't know about are left untouched.
+        """
+        try:
+            sheet_id = self._open_spreadsheet(title)
+            grid_id, _tab, sheet_rows = self._read_sheet(sheet_id)
+
+            on_sheet = {}
+            for idx, row in enumerate(sheet_rows[1:], start=1):
+                if row[0]:
+                    on_sheet.setdefault(lead_store_key(row[0], row[3]), idx)
+
+            requests = []
+            header_missing = not sheet_rows or sheet_rows[0][:len(HEADERS)] != HEADERS
+            if header_missing:
+                requests.append({'updateCells': {
+                    'rows': [self._row_data(HEADERS)],
+                    'fields': 'userEnteredValue',
+                    'start': {'sheetId': grid_id, 'rowIndex': 0, 'columnIndex': 0},
+                }})
+
+            changed, appended, exported = 0, [], []
+            next_row_index = max(len(sheet_rows), 1)
+            for lead in store.leads():
+                values = self._row_values(lead)
+                row_index = on_sheet.get(lead_store_key(lead['Name'], lead['Website']))
+                if row_index is None:
+                    appended.append(self._row_data(values))
+                    exported.append((lead['key'], next_row_index + 1, values))
+                    next_row_index += 1
+                    continue
+                exported.append((lead['key'], row_index + 1, values))
+                if sheet_rows[row_index][:len(HEADERS)] != ["" if v is None else str(v) for v in values]:
+                    requests.append({'updateCells': {
+                        'rows': [self._row_data(values)],
+                        'fields': 'userEnteredValue',
+                        'start': {'sheetId': grid_id, 'rowIndex': row_index, 'columnIndex': 0},
+                    }})
+                    changed += 1
+
+            if appended:
+                requests.append({'appendCells': {
+                    'sheetId': grid_id, 'rows': appended, 'fields': 'userEnteredValue',
+                }})
+            if header_missing:
+                requests.extend(self._header_format_requests(grid_id))
+
+            if requests:
+                self.service.spreadsheets().batchUpdate(
+                    spreadsheetId=sheet_id, body={'requests': requests}).execute()
+            store.reset_exports(sheet_id)
+            store.mark_exported(sheet_id, exported)
+
+            if not requests:
+                print(f"✅ Sheet already up to date ({len(exported)} leads).")
+            else:
+                print(f"📊 Sheet sync: {len(appended)} appended, {changed} updated, "
+                      f"{len(exported) - len(appended) - changed} unchanged ({len(requests)} requests, one batchUpdate).")
+            return sheet_id
+
+        except HttpError as err:
+            print(f"❌ API Error: {err}")
+            return None
+
 def main():
     parser = argparse.ArgumentParser(description='Export enriched leads to Google Sheets.')
-    parser.add_argument('files', nargs='+', help='Enriched lead text files to parse')
+    parser.add_argument('files', nargs='*', help='Enriched lead files to parse (.txt reports or .jsonl)')
     parser.add_argument('--title', default=f"Leads Export {datetime.now().strftime('%Y-%m-%d')}", help='Spreadsheet title')
+    parser.add_argument('--store', default=LEAD_STORE_PATH, help=f'Cross-run lead store (default: {LEAD_STORE_PATH})')
+    parser.add_argument('--full', action='store_true', help='Rewrite the whole sheet from the store instead of only the changes')
+    parser.add_argument('--sync', action='store_true', help='Read the sheet and diff against it, instead of trusting the local export history')
+    parser.add_argument('--no-store', action='store_true', help='Old behaviour: export only the given files, rewriting the sheet')
     
     args = parser.parse_args()
     
     exporter = SheetsExporter()
+
+    if args.no_store:
+        for f in args.files:
+            if os.path.exists(f):
+                exporter.parse_enriched_file(f)
+            else:
+                print(f"⚠️ Warning: File {f} not found.")
+
+        if not exporter.leads_db:
+            print("❌ No leads found to export.")
+            sys.exit(1)
+
+        exporter.create_and_write(args.title)
+        return
+
+    store = LeadStore(args.store)
     for f in args.files:
-        if os.path.exists(f):
-            exporter.parse_enriched_file(f)
-        else:
+        if not os.path.exists(f):
             print(f"⚠️ Warning: File {f} not found.")
+        elif store.is_ingested(f):
+            print(f"⏭️  {f} unchanged since last ingest — skipping")
+        else:
+            new, updated = store.ingest(f, exporter.iter_enriched_file(f))
+            print(f"   {new} new, {updated} updated leads")
 
-    if not exporter.leads_db:
+    if not len(store):
         print("❌ No leads found to export.")
         sys.exit(1)
 
-    exporter.create_and_write(args.title)
+    if args.sync:
+        exporter.sync_sheet(store, args.title)
+    else:
+        exporter.export_delta(store, args.title, full=args.full)
+    store.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP Response Cache
+On-disk cache for website fetches made during lead enrichment.
+
+Overlapping GMB files (the same business under HVAC and plumbing queries,
+re-runs of the same city) would otherwise re-download every website.
+
+- Keyed by a SHA-256 of the normalized URL (lower-case host, no default port,
+  no fragment, sorted query string).
+- Entries younger than ``max_age`` are served straight from disk.
+- Older entries are revalidated with If-None-Match / If-Modified-Since; a 304
+  refreshes the entry without re-downloading the body.
+- Bodies are stored gzip-compressed; when the cache grows past ``max_bytes``
+  the least recently used entries are evicted.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+
+def normalize_url(url):
+    """Canonical form of ``url`` used as the cache key."""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower() or 'https'
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    path = parsed.path or '/'
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, path, '', query, ''))
+
+
+class HTTPCache:
+    """Fetch-through response cache shared by the enrichment worker threads."""
+
+    def __init__(self, cache_dir='.tmp/http_cache', max_age=7 * 24 * 3600, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._total_bytes = sum(p.stat().st_size for p in self.cache_dir.glob('*.gz'))
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _paths(self, url):
+        key = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.gz"
+
+    def _read(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            body = gzip.decompress(body_path.read_bytes())
+        except (OSError, ValueError, EOFError):
+            return None, None
+        return meta, body
+
+    def _touch(self, url):
+        """Marks an entry as recently used (mtime drives LRU eviction)."""
+        for path in self._paths(url):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def _write(self, url, response):
+        meta_path, body_path = self._paths(url)
+        compressed = gzip.compress(response.content, compresslevel=6)
+        meta = {
+            'url': url,
+            'final_url': response.url,
+            'fetched_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding or response.apparent_encoding or 'utf-8',
+        }
+        with self._lock:
+            old_size = body_path.stat().st_size if body_path.exists() else 0
+            # Write-then-rename so a crash never leaves a half-written entry
+            tmp_body = body_path.with_suffix('.gz.tmp')
+            tmp_body.write_bytes(compressed)
+            os.replace(tmp_body, body_path)
+            tmp_meta = meta_path.with_suffix('.json.tmp')
+            tmp_meta.write_text(json.dumps(meta), encoding='utf-8')
+            os.replace(tmp_meta, meta_path)
+            self._total_bytes += len(compressed) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _refresh(self, url, meta):
+        meta_path, _ = self._paths(url)
+        meta['fetched_at'] = time.time()
+        tmp_meta = meta_path.with_suffix('.json.tmp')
+        tmp_meta.write_text(json.dumps(meta), encoding='utf-8')
+        os.replace(tmp_meta, meta_path)
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is back under 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        bodies = sorted(self.cache_dir.glob('*.gz'), key=lambda p: p.stat().st_mtime)
+        for body_path in bodies:
+            if self._total_bytes <= target:
+                break
+            try:
+                size = body_path.stat().st_size
+                body_path.unlink()
+                body_path.with_suffix('.json').unlink(missing_ok=True)
+            except OSError:
+                continue
+            self._total_bytes -= size
+            self.stats['evictions'] += 1
+
+    def fresh(self, url):
+        """Returns the cached body text if it is still within max_age, else None (no network)."""
+        meta, body = self._read(url)
+        if meta is None or time.time() - meta['fetched_at'] > self.max_age:
+            return None
+        self.stats['hits'] += 1
+        self._touch(url)
+        return body.decode(meta['encoding'], errors='replace')
+
+    def fetch(self, session, url, timeout=10):
+        """
+        Returns the page body for ``url``, from disk when fresh, revalidating
+        when stale, downloading otherwise. Raises like ``requests`` on errors.
+        """
+        text = self.fresh(url)
+        if text is not None:
+            return text
+
+        meta, body = self._read(url)
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = session.get(url, timeout=timeout, allow_redirects=True, headers=headers)
+        if response.status_code == 304 and meta is not None:
+            self.stats['revalidated'] += 1
+            self._refresh(url, meta)
+            self._touch(url)
+            return body.decode(meta['encoding'], errors='replace')
+
+        response.raise_for_status()
+        self.stats['misses'] += 1
+        self._write(url, response)
+        return response.text
+
+    def summary(self):
+        return (f"{self.stats['hits']} hits, {self.stats['revalidated']} revalidated, "
+                f"{self.stats['misses']} downloads, {self.stats['evictions']} evicted, "
+                f"{self._total_bytes / 1024 / 1024:.1f} MB on disk")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Lead Interchange Format
+Machine-readable JSONL format passed between the scrape → enrich → export
+scripts, so no stage has to regex-parse another stage's text report.
+
+One lead per line, one JSON object per lead. Every record carries
+``schema`` (SCHEMA_VERSION) and ``stage`` ("scraped" or "enriched"); the
+rest are the lead's own fields, e.g.:
+
+    {"schema": 1, "stage": "scraped", "name": "...", "category": "...",
+     "address": "...", "phone": "...", "website": "...", "rating": "4.8",
+     "reviews": "112", "hours": "...", "extracted_at": "2026-02-11 10:04:55"}
+
+Enriched records add ``email``, ``social`` (facebook/instagram/tiktok/
+linkedin/twitter → handle or null), ``score`` and ``cold_email``.
+
+The text reports are still written as the human-readable view; readers
+pick the parser by file extension (``.jsonl`` → this module).
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+
+SCHEMA_VERSION = 1
+FORMATS = ('text', 'jsonl', 'both')
+
+
+def is_jsonl(path):
+    return Path(path).suffix.lower() == '.jsonl'
+
+
+def to_record(lead, stage):
+    """Wraps a lead dict as a versioned record for ``stage``."""
+    return {'schema': SCHEMA_VERSION, 'stage': stage, **lead}
+
+
+def iter_jsonl(path):
+    """
+    Yields lead dicts (schema/stage stripped) one line at a time.
+    Raises ValueError for records written by a newer schema than this reader knows.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            version = record.pop('schema', None)
+            if version is None or version > SCHEMA_VERSION:
+                raise ValueError(f"{path}:{line_no}: unsupported lead schema {version!r} (reader is v{SCHEMA_VERSION})")
+            record.pop('stage', None)
+            yield record
+
+
+def lead_key(lead):
+    """Identity of a lead across runs and files: normalized name + website."""
+    website = lead.get('website') or ''
+    if website == 'N/A':
+        website = ''
+    return f"{(lead.get('name') or '').lower().strip()}|{website.lower().strip()}"
+
+
+@contextmanager
+def atomic_open(path):
+    """
+    Text-mode file handle that only replaces ``path`` once the block finishes
+    without error — a crash mid-write leaves the previous file (or none) intact.
+    """
+    output_file = Path(path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output_file.with_name(f".{output_file.name}.tmp")
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, output_file)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+
+def write_jsonl(path, leads, stage):
+    """Atomically writes ``leads`` to ``path`` as JSONL records for ``stage``. Returns the number written."""
+    count = 0
+    with atomic_open(path) as f:
+        for lead in leads:
+            f.write(json.dumps(to_record(lead, stage), ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def output_paths(output_path, fmt):
+    """
+    Resolves where each view goes for ``--format``:
+    text → (output, None); jsonl → (None, output as .jsonl); both → (output, output as .jsonl).
+    An explicit ``.jsonl`` output path always gets JSONL.
+    """
+    output_path = Path(output_path)
+    jsonl_path = output_path.with_suffix('.jsonl')
+    if fmt == 'jsonl' or (fmt == 'text' and is_jsonl(output_path)):
+        return None, jsonl_path
+    if fmt == 'both':
+        if output_path.suffix.lower() == '.jsonl':
+            return output_path.with_suffix('.txt'), output_path
+        return output_path, jsonl_path
+    return output_path, None
+
+
+class Checkpoint:
+    """
+    Append-only JSONL log of finished leads for long batch runs.
+
+    Each ``record()`` is flushed and fsynced, so after a crash the file holds
+    every lead completed so far. Opening with ``resume=True`` loads those
+    leads (``done``, keyed by ``lead_key``) and keeps appending; a torn last
+    line from the crash is cut off first.
+    """
+
+    def __init__(self, path, stage, resume=False):
+        self.path = Path(path)
+        self.stage = stage
+        self.done = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._load()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self):
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    break  # Torn write from the crash; everything after it is suspect
+                if not raw.endswith(b'\n'):
+                    break
+                valid_bytes += len(raw)
+                record.pop('schema', None)
+                record.pop('stage', None)
+                self.done[lead_key(record)] = record
+        with open(self.path, 'r+b') as f:
+            f.truncate(valid_bytes)
+
+    def record(self, lead):
+        self._file.write(json.dumps(to_record(lead, self.stage), ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done[lead_key(lead)] = lead
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """Removes the checkpoint once the final output is safely written."""
+        self.close()
+        self.path.unlink(missing_ok=True)
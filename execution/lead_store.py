@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Lead Store
+Local SQLite database of every lead exported to Google Sheets, kept across runs.
+
+- Leads are keyed by normalized name + website. A lead whose website is
+  missing in one file is still matched to its other copies by phone number,
+  or by name + email domain, through secondary indexes. Once a copy fills
+  in the website, the lead is re-keyed so later copies match it directly.
+- Ingested files are recorded with their size and mtime, so re-running an
+  export over the same files does no parsing work.
+- For each spreadsheet the store remembers which sheet row holds each lead
+  and a hash of the values last written there. The next export pushes only
+  new leads and leads whose row would change.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+
+LEAD_STORE_PATH = '.tmp/leads.sqlite3'
+
+# Store column → lead dict field (the SheetsExporter lead shape)
+FIELDS = {
+    'name': 'Name',
+    'score': 'Score',
+    'website': 'Website',
+    'phone': 'Phone',
+    'email': 'Email',
+    'facebook': 'Facebook',
+    'instagram': 'Instagram',
+    'tiktok': 'TikTok',
+    'linkedin': 'LinkedIn',
+    'x': 'X',
+}
+
+_SCHEME_PATTERN = re.compile(r'^[a-z]+://')
+
+
+def normalize_name(name):
+    return ' '.join((name or '').lower().split())
+
+
+def normalize_website(website):
+    """example.com/ == https://www.example.com == http://example.com/?utm=x"""
+    website = (website or '').strip().lower()
+    if website in ('', 'n/a'):
+        return ''
+    website = _SCHEME_PATTERN.sub('', website).split('?', 1)[0].split('#', 1)[0]
+    return website.removeprefix('www.').rstrip('/')
+
+
+def normalize_phone(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-10:] if len(digits) >= 10 else ''
+
+
+def email_domain(email):
+    return email.rsplit('@', 1)[1].lower() if email and '@' in email else ''
+
+
+def lead_store_key(name, website):
+    return f"{normalize_name(name)}|{normalize_website(website)}"
+
+
+def row_hash(values):
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+class LeadStore:
+    def __init__(self, path=LEAD_STORE_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS leads (
+                key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_norm TEXT NOT NULL,
+                categories TEXT NOT NULL DEFAULT '',
+                score INTEGER NOT NULL DEFAULT 1,
+                website TEXT NOT NULL DEFAULT '',
+                phone TEXT NOT NULL DEFAULT '',
+                phone_norm TEXT NOT NULL DEFAULT '',
+                email TEXT NOT NULL DEFAULT '',
+                email_domain TEXT NOT NULL DEFAULT '',
+                facebook TEXT NOT NULL DEFAULT '',
+                instagram TEXT NOT NULL DEFAULT '',
+                tiktok TEXT NOT NULL DEFAULT '',
+                linkedin TEXT NOT NULL DEFAULT '',
+                x TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_leads_phone ON leads(phone_norm);
+            CREATE INDEX IF NOT EXISTS idx_leads_email_domain ON leads(email_domain);
+
+            CREATE TABLE IF NOT EXISTS ingested_files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                leads INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS exports (
+                spreadsheet_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                sheet_row INTEGER NOT NULL,
+                row_hash TEXT NOT NULL,
+                exported_at REAL NOT NULL,
+                PRIMARY KEY (spreadsheet_id, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_exports_row ON exports(spreadsheet_id, sheet_row);
+        """)
+
+    # ─────────────────────────────────────────────
+    # Ingestion
+    # ─────────────────────────────────────────────
+
+    def is_ingested(self, filepath):
+        """True if this exact file version (same size and mtime) was already ingested."""
+        stat = os.stat(filepath)
+        row = self._conn.execute(
+            "SELECT size, mtime_ns FROM ingested_files WHERE path = ?", (str(Path(filepath).resolve()),)
+        ).fetchone()
+        return row is not None and row['size'] == stat.st_size and row['mtime_ns'] == stat.st_mtime_ns
+
+    def ingest(self, filepath, leads):
+        """Upserts ``leads`` (parsed from ``filepath``) in one transaction. Returns (new, updated)."""
+        stat = os.stat(filepath)
+        new = updated = total = 0
+        with self._conn:
+            for lead in leads:
+                total += 1
+                outcome = self.upsert(lead)
+                new += outcome == 'new'
+                updated += outcome == 'updated'
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingested_files (path, size, mtime_ns, leads, ingested_at) VALUES (?, ?, ?, ?, ?)",
+                (str(Path(filepath).resolve()), stat.st_size, stat.st_mtime_ns, total, time.time()),
+            )
+        return new, updated
+
+    def _find(self, lead):
+        key = lead_store_key(lead['Name'], lead['Website'])
+        row = self._conn.execute("SELECT * FROM leads WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return row
+        # Same business, but one copy is missing its website: fall back to phone, then email domain
+        name_norm = normalize_name(lead['Name'])
+        phone_norm = normalize_phone(lead['Phone'])
+        if phone_norm:
+            row = self._conn.execute(
+                "SELECT * FROM leads WHERE phone_norm = ? AND name_norm = ?", (phone_norm, name_norm)
+            ).fetchone()
+            if row is not None:
+                return row
+        domain = email_domain(lead['Email'])
+        if domain:
+            row = self._conn.execute(
+                "SELECT * FROM leads WHERE email_domain = ? AND name_norm = ?", (domain, name_norm)
+            ).fetchone()
+        return row
+
+    def upsert(self, lead):
+        """
+        Adds or merges one lead (categories unioned, highest score kept, empty
+        contact fields filled). Returns 'new', 'updated', or None if nothing changed.
+        """
+        existing = self._find(lead)
+        now = time.time()
+        if existing is None:
+            self._conn.execute(
+                "INSERT INTO leads (key, name, name_norm, categories, score, website, phone, phone_norm,"
+                " email, email_domain, facebook, instagram, tiktok, linkedin, x, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (lead_store_key(lead['Name'], lead['Website']), lead['Name'].strip(), normalize_name(lead['Name']),
+                 ','.join(sorted(lead['Categories'])), int(lead['Score']), lead['Website'], lead['Phone'],
+                 normalize_phone(lead['Phone']), lead['Email'], email_domain(lead['Email']),
+                 lead['Facebook'], lead['Instagram'], lead['TikTok'], lead['LinkedIn'], lead['X'], now),
+            )
+            return 'new'
+
+        merged = {column: existing[column] for column in FIELDS}
+        merged['score'] = max(existing['score'], int(lead['Score']))
+        for column, field in FIELDS.items():
+            if column not in ('name', 'score') and merged[column] in ('', 'N/A') and lead[field] not in ('', 'N/A'):
+                merged[column] = lead[field]
+        categories = set(filter(None, existing['categories'].split(','))) | set(lead['Categories'])
+        merged['categories'] = ','.join(sorted(categories))
+        if all(merged[c] == existing[c] for c in merged):
+            return None
+        key = existing['key']
+        if merged['website'] != existing['website']:
+            # Stored as "name|" until now: take the full key (and its export rows) unless another row already has it
+            new_key = lead_store_key(existing['name'], merged['website'])
+            if self._conn.execute("SELECT 1 FROM leads WHERE key = ?", (new_key,)).fetchone() is None:
+                self._conn.execute("UPDATE exports SET key = ? WHERE key = ?", (new_key, key))
+                key = new_key
+        self._conn.execute(
+            "UPDATE leads SET key = ?, categories = ?, score = ?, website = ?, phone = ?, phone_norm = ?, email = ?,"
+            " email_domain = ?, facebook = ?, instagram = ?, tiktok = ?, linkedin = ?, x = ?, updated_at = ?"
+            " WHERE key = ?",
+            (key, merged['categories'], merged['score'], merged['website'], merged['phone'],
+             normalize_phone(merged['phone']), merged['email'], email_domain(merged['email']),
+             merged['facebook'], merged['instagram'], merged['tiktok'], merged['linkedin'], merged['x'],
+             now, existing['key']),
+        )
+        return 'updated'
+
+    # ─────────────────────────────────────────────
+    # Export bookkeeping
+    # ─────────────────────────────────────────────
+
+    @staticmethod
+    def _to_lead(row):
+        lead = {field: row[column] for column, field in FIELDS.items()}
+        lead['Categories'] = set(filter(None, row['categories'].split(',')))
+        lead['key'] = row['key']
+        return lead
+
+    def leads(self):
+        """Every stored lead, highest score first."""
+        rows = self._conn.execute("SELECT * FROM leads ORDER BY score DESC, name_norm").fetchall()
+        return [self._to_lead(row) for row in rows]
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def delta(self, spreadsheet_id, row_values):
+        """
+        Splits the store into what ``spreadsheet_id`` is missing:
+        ``updates`` — (lead, sheet_row, values) for exported leads whose row changed;
+        ``appends`` — (lead, values) for leads not on the sheet yet (highest score first).
+        ``row_values(lead)`` renders a lead as its sheet row.
+        """
+        exported = {
+            row['key']: (row['sheet_row'], row['row_hash'])
+            for row in self._conn.execute(
+                "SELECT key, sheet_row, row_hash FROM exports WHERE spreadsheet_id = ?", (spreadsheet_id,)
+            )
+        }
+        updates, appends = [], []
+        for lead in self.leads():
+            values = row_values(lead)
+            if lead['key'] not in exported:
+                appends.append((lead, values))
+            else:
+                sheet_row, last_hash = exported[lead['key']]
+                if row_hash(values) != last_hash:
+                    updates.append((lead, sheet_row, values))
+        return updates, appends
+
+    def next_row(self, spreadsheet_id):
+        """First free sheet row (row 1 is the header)."""
+        row = self._conn.execute(
+            "SELECT MAX(sheet_row) FROM exports WHERE spreadsheet_id = ?", (spreadsheet_id,)
+        ).fetchone()[0]
+        return (row or 1) + 1
+
+    def mark_exported(self, spreadsheet_id, rows):
+        """Records ``rows`` — (key, sheet_row, values) — as now present on the sheet."""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO exports (spreadsheet_id, key, sheet_row, row_hash, exported_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(spreadsheet_id, key, sheet_row, row_hash(values), now) for key, sheet_row, values in rows],
+            )
+
+    def reset_exports(self, spreadsheet_id):
+        """Forgets what is on ``spreadsheet_id`` so the next export rewrites it in full."""
+        with self._conn:
+            self._conn.execute("DELETE FROM exports WHERE spreadsheet_id = ?", (spreadsheet_id,))
+
+    def close(self):
+        self._conn.close()
@@ -5,29 +5,52 @@ Extracts business listing details from Google Maps/GMB profiles.
 """
 
 import argparse
+import json
+import multiprocessing
 import time
 import random
+import re
 import sys
 from datetime import datetime
 from pathlib import Path
 
+from lead_format import FORMATS, iter_jsonl, lead_key, output_paths, to_record, write_jsonl
+
 try:
     from selenium import webdriver
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.webdriver.chrome.options import Options
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 except ImportError:
     print("ERROR: Selenium not installed. Run: pip install selenium")
     sys.exit(1)
 
 
+# Result cards in the left-hand feed, and the open business's title in the details panel
+LISTING_SELECTOR = "div[role='feed'] > div > div > a"
+TITLE_SELECTOR = "h1.DUwDvf"
+
+# Upper bounds for the condition waits; normally they return as soon as the page renders
+FEED_TIMEOUT = 10
+SCROLL_TIMEOUT = 6
+DETAILS_TIMEOUT = 10
+POLL_SECONDS = 0.1
+
+
 class GMBScraper:
     """Scrapes Google My Business listings for lead generation."""
     
-    def __init__(self, headless=True):
-        """Initialize the scraper with Chrome WebDriver."""
+    def __init__(self, headless=True, min_delay=0.5):
+        """
+        Initialize the scraper with Chrome WebDriver.
+
+        min_delay: jitter floor in seconds — after each scroll/click the scraper
+                   waits for the page to render, then pauses min_delay plus up to
+                   min_delay of random jitter so it doesn't act at machine speed
+        """
+        self.min_delay = min_delay
         self.driver = self._setup_driver(headless)
         self.results = []
         
@@ -61,7 +84,6 @@ class GMBScraper:
         
         try:
             self.driver.get(search_url)
-            time.sleep(3)  # Wait for initial load
             
             # Scroll to load more results
             self._scroll_results_panel(max_results)
@@ -74,46 +96,84 @@ class GMBScraper:
             
         return self.results
     
+    def _jitter(self):
+        """Human-like pause on top of the render wait: min_delay to 2 x min_delay."""
+        if self.min_delay > 0:
+            time.sleep(self.min_delay + random.uniform(0, self.min_delay))
+    
+    def _wait_for(self, condition, timeout):
+        """Polls ``condition(driver)`` until truthy; raises TimeoutException after ``timeout`` seconds."""
+        return WebDriverWait(self.driver, timeout, poll_frequency=POLL_SECONDS).until(condition)
+    
+    def _listing_count(self):
+        return len(self.driver.find_elements(By.CSS_SELECTOR, LISTING_SELECTOR))
+    
+    def _title_element(self):
+        try:
+            return self.driver.find_element(By.CSS_SELECTOR, TITLE_SELECTOR)
+        except NoSuchElementException:
+            return None
+    
+    def _current_title(self):
+        try:
+            return self.driver.find_element(By.CSS_SELECTOR, TITLE_SELECTOR).text.strip()
+        except (NoSuchElementException, StaleElementReferenceException):
+            return ''
+    
+    def _details_panel_ready(self, old_title_element, previous_title, previous_url):
+        """
+        Condition for the details panel showing the listing just clicked. Maps
+        changes the URL on click, before the panel re-renders, so the URL alone
+        would match while the previous business is still on screen: the old
+        title element must be gone (or the title text changed) first.
+        """
+        def ready(driver):
+            title = self._current_title()
+            if not title:
+                return False
+            if old_title_element is not None:
+                fresh = EC.staleness_of(old_title_element)(driver) or title != previous_title
+            else:
+                fresh = True
+            return fresh and (title != previous_title or driver.current_url != previous_url)
+        return ready
+    
     def _scroll_results_panel(self, max_results):
         """Scroll the results panel to load more businesses."""
         print("📜 Loading results...")
         
         try:
-            # Find the scrollable results panel
-            results_panel = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']"))
+            # Find the scrollable results panel (returns as soon as the first results render)
+            results_panel = self._wait_for(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']")), FEED_TIMEOUT
             )
             
-            last_height = 0
             scroll_attempts = 0
             max_scrolls = 50  # Prevent infinite scrolling
+            current_results = self._listing_count()
             
             while scroll_attempts < max_scrolls:
-                # Scroll down in the results panel
-                self.driver.execute_script(
-                    "arguments[0].scrollTo(0, arguments[0].scrollHeight);", 
-                    results_panel
-                )
-                
-                time.sleep(random.uniform(1.5, 2.5))  # Random delay
-                
                 # Check if we've loaded enough results
-                current_results = len(self.driver.find_elements(By.CSS_SELECTOR, "div[role='feed'] > div > div > a"))
-                
                 if current_results >= max_results:
                     print(f"✅ Loaded {current_results} results")
                     break
                 
-                # Check if we've reached the bottom
-                new_height = self.driver.execute_script(
-                    "return arguments[0].scrollHeight", results_panel
+                # Scroll down in the results panel
+                self.driver.execute_script(
+                    "arguments[0].scrollTo(0, arguments[0].scrollHeight);", 
+                    results_panel
                 )
                 
-                if new_height == last_height:
+                # Wait for the feed to grow; if it doesn't, we've reached the bottom
+                previous = current_results
+                try:
+                    self._wait_for(lambda d: self._listing_count() > previous, SCROLL_TIMEOUT)
+                except TimeoutException:
                     print(f"⚠️  Reached end of results ({current_results} found)")
                     break
-                    
-                last_height = new_height
+                current_results = self._listing_count()
+                
+                self._jitter()
                 scroll_attempts += 1
                 
         except TimeoutException:
@@ -124,31 +184,39 @@ class GMBScraper:
         print("\n📋 Extracting business details...\n")
         
         try:
-            # Find the results panel for scrolling
-            results_panel = self.driver.find_element(By.CSS_SELECTOR, "div[role='feed']")
+            # Make sure the results feed is there before walking it
+            self.driver.find_element(By.CSS_SELECTOR, "div[role='feed']")
             
             for idx in range(max_results):
                 try:
                     print(f"[{idx+1}/{max_results}] Processing...", end=" ")
                     
-                    # Scroll to make sure the element is in view
-                    self.driver.execute_script(
-                        "arguments[0].scrollTo(0, arguments[1]);", 
-                        results_panel,
-                        idx * 180  # Approximate height per listing
-                    )
-                    time.sleep(0.5)
-                    
                     # Re-find elements each time to avoid stale references
-                    listing_links = self.driver.find_elements(By.CSS_SELECTOR, "div[role='feed'] > div > div > a")
+                    listing_links = self.driver.find_elements(By.CSS_SELECTOR, LISTING_SELECTOR)
                     
                     if idx >= len(listing_links):
                         print(f"✗ No more results available")
                         break
                     
-                    # Click on the listing to open details panel
+                    # Bring the listing into view and open its details panel
+                    self.driver.execute_script(
+                        "arguments[0].scrollIntoView({block: 'center'});", listing_links[idx]
+                    )
+                    old_title_element = self._title_element()
+                    previous_title = self._current_title()
+                    previous_url = self.driver.current_url
                     self.driver.execute_script("arguments[0].click();", listing_links[idx])
-                    time.sleep(random.uniform(2.5, 3.5))
+                    
+                    # Panel is ready once the previous business's title is replaced (the URL
+                    # only disambiguates neighbouring branches of a chain that share a name)
+                    try:
+                        self._wait_for(
+                            self._details_panel_ready(old_title_element, previous_title, previous_url),
+                            DETAILS_TIMEOUT,
+                        )
+                    except TimeoutException:
+                        print("✗ Details panel did not load")
+                        continue
                     
                     # Extract business details
                     business_data = self._extract_business_details()
@@ -160,7 +228,7 @@ class GMBScraper:
                         print("✗ Failed to extract")
                     
                     # Random delay to appear human-like
-                    time.sleep(random.uniform(1, 2))
+                    self._jitter()
                     
                 except Exception as e:
                     print(f"✗ Error: {str(e)[:50]}")
@@ -186,7 +254,7 @@ class GMBScraper:
         try:
             # Business Name
             try:
-                name_elem = self.driver.find_element(By.CSS_SELECTOR, "h1.DUwDvf")
+                name_elem = self.driver.find_element(By.CSS_SELECTOR, TITLE_SELECTOR)
                 data['name'] = name_elem.text
             except NoSuchElementException:
                 pass
@@ -243,36 +311,12 @@ class GMBScraper:
     
     def save_to_text(self, output_path):
         """Save results to a formatted text file."""
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("GOOGLE MY BUSINESS LEAD GENERATION REPORT\n")
-            f.write("=" * 80 + "\n\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Total Leads: {len(self.results)}\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for idx, business in enumerate(self.results, 1):
-                f.write(f"LEAD #{idx}\n")
-                f.write("-" * 80 + "\n")
-                f.write(f"Business Name:    {business['name']}\n")
-                f.write(f"Category:         {business['category']}\n")
-                f.write(f"Address:          {business['address']}\n")
-                f.write(f"Phone:            {business['phone']}\n")
-                f.write(f"Website:          {business['website']}\n")
-                f.write(f"Rating:           {business['rating']} ({business['reviews']} reviews)\n")
-                f.write(f"Hours:            {business['hours']}\n")
-                f.write(f"Extracted:        {business['extracted_at']}\n")
-                f.write("-" * 80 + "\n\n")
-            
-            f.write("=" * 80 + "\n")
-            f.write("END OF REPORT\n")
-            f.write("=" * 80 + "\n")
-        
-        print(f"\n✅ Results saved to: {output_file}")
-        print(f"📊 Total leads extracted: {len(self.results)}")
+        write_text_report(self.results, output_path)
+    
+    def save_to_jsonl(self, output_path):
+        """Save results as schema-versioned JSONL for enrich_leads.py / export_to_sheets.py."""
+        count = write_jsonl(output_path, self.results, stage='scraped')
+        print(f"\n✅ JSONL saved to: {output_path} ({count} leads)")
     
     def close(self):
         """Close the browser and clean up."""
@@ -280,6 +324,166 @@ class GMBScraper:
             self.driver.quit()
 
 
+def write_text_report(results, output_path):
+    """Save results to a formatted text file."""
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("=" * 80 + "\n")
+        f.write("GOOGLE MY BUSINESS LEAD GENERATION REPORT\n")
+        f.write("=" * 80 + "\n\n")
+        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Total Leads: {len(results)}\n")
+        f.write("=" * 80 + "\n\n")
+        
+        for idx, business in enumerate(results, 1):
+            f.write(f"LEAD #{idx}\n")
+            f.write("-" * 80 + "\n")
+            f.write(f"Business Name:    {business['name']}\n")
+            f.write(f"Category:         {business['category']}\n")
+            f.write(f"Address:          {business['address']}\n")
+            f.write(f"Phone:            {business['phone']}\n")
+            f.write(f"Website:          {business['website']}\n")
+            f.write(f"Rating:           {business['rating']} ({business['reviews']} reviews)\n")
+            f.write(f"Hours:            {business['hours']}\n")
+            f.write(f"Extracted:        {business['extracted_at']}\n")
+            f.write("-" * 80 + "\n\n")
+        
+        f.write("=" * 80 + "\n")
+        f.write("END OF REPORT\n")
+        f.write("=" * 80 + "\n")
+    
+    print(f"\n✅ Results saved to: {output_file}")
+    print(f"📊 Total leads extracted: {len(results)}")
+
+
+# ─────────────────────────────────────────────
+# Batch mode: many queries across a pool of browsers
+# ─────────────────────────────────────────────
+
+def _batch_worker(worker_id, task_queue, part_path, headless, max_results, min_delay):
+    """
+    One worker process = one Chrome instance. Pulls queries until it gets the
+    None sentinel, appending each query's leads to its own JSONL part file.
+    """
+    scraper = GMBScraper(headless=headless, min_delay=min_delay)
+    try:
+        with open(part_path, 'w', encoding='utf-8') as part:
+            while True:
+                query = task_queue.get()
+                if query is None:
+                    break
+                scraper.results = []
+                try:
+                    scraper.search(query, max_results)
+                except Exception as e:
+                    print(f"❌ [worker {worker_id}] {query}: {e}")
+                    continue
+                for business in scraper.results:
+                    business['queries'] = [query]
+                    part.write(json.dumps(to_record(business, 'scraped'), ensure_ascii=False) + '\n')
+                part.flush()
+                print(f"📦 [worker {worker_id}] {query}: {len(scraper.results)} leads")
+    finally:
+        scraper.close()
+
+
+def _iter_part(part_path):
+    """Leads in one worker part file; a torn or corrupt line (crashed worker) ends it, and the file is kept as *.unreadable."""
+    try:
+        yield from iter_jsonl(part_path)
+    except ValueError as e:
+        kept = Path(part_path).with_suffix('.jsonl.unreadable')
+        Path(part_path).rename(kept)
+        print(f"⚠️  {Path(part_path).name}: stopped at an unreadable line ({str(e)[:60]}); kept as {kept}")
+
+
+def _merge_key(business):
+    """
+    Name + website plus the phone digits (or the address when there is no phone),
+    so chain branches and same-name businesses without a website stay separate.
+    None when the listing has neither — it is then never merged.
+    """
+    phone = re.sub(r'\D', '', business.get('phone') or '')
+    if phone:
+        return f"{lead_key(business)}|tel:{phone}"
+    address = ' '.join((business.get('address') or '').lower().split())
+    if address and address != 'n/a':
+        return f"{lead_key(business)}|addr:{address}"
+    return None
+
+
+def merge_worker_results(part_paths):
+    """Merges per-worker part files, de-duplicating businesses found by several queries (see ``_merge_key``)."""
+    merged = {}
+    for part_path in part_paths:
+        if not Path(part_path).exists():
+            continue
+        for business in _iter_part(part_path):
+            key = _merge_key(business)
+            if key is None:
+                key = len(merged)  # No identifier to match on — keep it as its own lead
+            if key not in merged:
+                merged[key] = business
+                continue
+            existing = merged[key]
+            existing['queries'] = existing.get('queries', []) + [
+                q for q in business.get('queries', []) if q not in existing.get('queries', [])
+            ]
+            # Fill gaps from the duplicate (one query's panel may have loaded more detail)
+            for field, value in business.items():
+                if existing.get(field) in (None, 'N/A') and value not in (None, 'N/A'):
+                    existing[field] = value
+    return list(merged.values())
+
+
+def run_batch(queries, workers, max_results, headless, parts_dir, min_delay=0.5):
+    """Scrapes ``queries`` across ``workers`` browser processes; returns merged, de-duplicated leads."""
+    workers = max(1, min(workers, len(queries)))
+    parts_dir = Path(parts_dir)
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    print(f"\n🧵 Batch: {len(queries)} queries across {workers} browser workers")
+    
+    task_queue = multiprocessing.Queue()
+    for query in queries:
+        task_queue.put(query)
+    for _ in range(workers):
+        task_queue.put(None)
+    
+    part_paths = [parts_dir / f"worker_{i}.jsonl" for i in range(workers)]
+    processes = [
+        multiprocessing.Process(target=_batch_worker, args=(i, task_queue, str(part_paths[i]), headless, max_results, min_delay))
+        for i in range(workers)
+    ]
+    started = time.monotonic()
+    for proc in processes:
+        proc.start()
+    for proc in processes:
+        proc.join()
+    
+    failed = [i for i, proc in enumerate(processes) if proc.exitcode != 0]
+    if failed:
+        print(f"⚠️  Workers {failed} exited abnormally; their part files hold whatever they finished")
+    
+    raw = 0
+    for path in part_paths:
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                raw += sum(1 for _ in f)
+    results = merge_worker_results(part_paths)
+    print(f"✅ Batch finished in {time.monotonic() - started:.0f}s: {raw} leads scraped, {len(results)} unique")
+    return results
+
+
+def load_queries(args):
+    queries = list(args.query)
+    if args.queries_file:
+        with open(args.queries_file, 'r', encoding='utf-8') as f:
+            queries.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return list(dict.fromkeys(queries))
+
+
 def main():
     """Main execution function."""
     parser = argparse.ArgumentParser(
@@ -288,7 +492,20 @@ def main():
     parser.add_argument(
         'query',
         type=str,
-        help='Search query (e.g., "restaurants in New York")'
+        nargs='*',
+        help='Search query (e.g., "restaurants in New York"); several queries run as a batch'
+    )
+    parser.add_argument(
+        '--queries-file',
+        type=str,
+        default=None,
+        help='File with one query per line (e.g., "HVAC in Harrisburg PA") to scrape as a batch'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Browser processes for batch mode, one Chrome each (default: 4)'
     )
     parser.add_argument(
         '--max-results',
@@ -307,24 +524,68 @@ def main():
         action='store_true',
         help='Run browser in visible mode (not headless)'
     )
+    parser.add_argument(
+        '--min-delay',
+        type=float,
+        default=0.5,
+        help='Jitter floor in seconds after each scroll/click, on top of waiting for the page to render (default: 0.5)'
+    )
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        default='text',
+        help='Output format: text report, JSONL for the next stage, or both (default: text)'
+    )
     
     args = parser.parse_args()
+    queries = load_queries(args)
+    if not queries:
+        parser.error('give a query or --queries-file')
     
     print("\n" + "=" * 80)
     print("🚀 GOOGLE MY BUSINESS LEAD SCRAPER")
     print("=" * 80)
     
+    text_path, jsonl_path = output_paths(args.output, args.format)
+    if len(queries) > 1:
+        try:
+            parts_dir = Path(args.output).parent / f"{Path(args.output).stem}_parts"
+            results = run_batch(queries, args.workers, args.max_results, not args.visible, parts_dir, args.min_delay)
+            if results:
+                if text_path:
+                    write_text_report(results, text_path)
+                if jsonl_path:
+                    count = write_jsonl(jsonl_path, results, stage='scraped')
+                    print(f"\n✅ JSONL saved to: {jsonl_path} ({count} leads)")
+                for part_path in parts_dir.glob('worker_*.jsonl'):
+                    part_path.unlink()
+                try:
+                    parts_dir.rmdir()
+                except OSError:
+                    # Results are already saved; just leave whatever else is in there for inspection
+                    leftover = ', '.join(sorted(p.name for p in parts_dir.iterdir()))
+                    print(f"⚠️  Kept {parts_dir} (leftover files: {leftover})")
+            else:
+                print("\n⚠️  No results found for any query.")
+        except KeyboardInterrupt:
+            print("\n\n⚠️  Batch interrupted by user")
+        print("\n✨ Done!\n")
+        return
+    
     scraper = None
     try:
         # Initialize scraper
-        scraper = GMBScraper(headless=not args.visible)
+        scraper = GMBScraper(headless=not args.visible, min_delay=args.min_delay)
         
         # Perform search and extraction
-        scraper.search(args.query, args.max_results)
+        scraper.search(queries[0], args.max_results)
         
         # Save results
         if scraper.results:
-            scraper.save_to_text(args.output)
+            if text_path:
+                scraper.save_to_text(text_path)
+            if jsonl_path:
+                scraper.save_to_jsonl(jsonl_path)
         else:
             print("\n⚠️  No results found. Try a different search query.")
         